@@ -0,0 +1,75 @@
+"""
+Scalar calculate_cost() loop vs calculate_costs_bulk()
+
+Usage:
+    python benchmarks/bench_bulk_cost.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tokentra import pricing  # noqa: E402
+from tokentra.pricing import calculate_cost, calculate_costs_bulk  # noqa: E402
+
+MODELS = [
+    "gpt-4o",
+    "gpt-4o-mini-2024-07-18",
+    "gpt-4-turbo",
+    "o3-mini",
+    "gpt-3.5-turbo-0125",
+]
+
+
+def timed(label, fn, rows):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:>10.3f}s{rows / elapsed / 1e6:>12.2f}M rows/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    models = [rng.choice(MODELS) for _ in range(args.rows)]
+    input_tokens = [rng.randint(10, 8000) for _ in range(args.rows)]
+    output_tokens = [rng.randint(1, 2000) for _ in range(args.rows)]
+
+    def scalar():
+        for model, inp, out in zip(models, input_tokens, output_tokens):
+            calculate_cost("openai", model, inp, out)
+
+    def bulk():
+        calculate_costs_bulk("openai", models, input_tokens, output_tokens)
+
+    print(f"{'implementation':<28}{'time':>11}{'throughput':>12}")
+    baseline = timed("calculate_cost loop", scalar, args.rows)
+
+    if pricing.np is not None:
+        np = pricing.np
+        arrays = (np.array(models), np.array(input_tokens), np.array(output_tokens))
+        timed("bulk (numpy, lists)", bulk, args.rows)
+        fast = timed(
+            "bulk (numpy, arrays)",
+            lambda: calculate_costs_bulk("openai", *arrays),
+            args.rows,
+        )
+        print(f"speedup vs scalar: {baseline / fast:.1f}x")
+
+    numpy, pricing.np = pricing.np, None
+    try:
+        timed("bulk (pure python)", bulk, args.rows)
+    finally:
+        pricing.np = numpy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Bytes per queued TelemetryEvent
+
+Compares the slotted TelemetryEvent and its generated to_dict() with an
+equivalent dict-backed dataclass and getattr-loop serializer (the previous
+representation).
+
+Usage:
+    python benchmarks/bench_event_memory.py [--events 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import field, fields, make_dataclass
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tokentra.client import TelemetryEvent, _OPTIONAL_FIELDS, _REQUIRED_FIELDS  # noqa: E402
+
+# Same fields, ordinary __dict__ instances and an eager metadata dict
+DictTelemetryEvent = make_dataclass(
+    "DictTelemetryEvent",
+    [
+        (f.name, f.type, field(default_factory=dict))
+        if f.name == "metadata"
+        else (f.name, f.type, f)
+        for f in fields(TelemetryEvent)
+    ],
+)
+
+
+def legacy_to_dict(event):
+    """The getattr loop to_dict() used before the generated serializer"""
+    result = {name: getattr(event, name) for name in _REQUIRED_FIELDS}
+    for field_name in list(_OPTIONAL_FIELDS):
+        value = getattr(event, field_name)
+        if value is not None and value != {} and value is not False:
+            result[field_name] = value
+    if event.metadata:
+        result["metadata"] = event.metadata
+    return result
+
+
+def make_events(cls, count):
+    return [
+        cls(
+            request_id=str(uuid.uuid4()),
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            provider="openai",
+            model="gpt-4o",
+            input_tokens=120,
+            output_tokens=40,
+            total_tokens=160,
+            input_cost=0.0003,
+            output_cost=0.0004,
+            total_cost=0.0007,
+            latency_ms=850,
+            feature="chat",
+            team="product",
+            environment="production",
+        )
+        for _ in range(count)
+    ]
+
+
+def bytes_per_event(cls, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    events = make_events(cls, count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / count, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'representation':<24}{'bytes/event':>14}{'to_dict us/event':>20}")
+    cases = (
+        ("dataclass (__dict__)", DictTelemetryEvent, legacy_to_dict),
+        ("slotted", TelemetryEvent, TelemetryEvent.to_dict),
+    )
+    for name, cls, to_dict in cases:
+        per_event, events = bytes_per_event(cls, args.events)
+
+        start = time.perf_counter()
+        for event in events:
+            to_dict(event)
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<24}{per_event:>14.0f}{elapsed / len(events) * 1e6:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Overhead TokenTra adds to a wrapped provider call
+
+Runs in-process fake OpenAI / Anthropic clients (no network) and a local
+stand-in ingest server:
+
+  overhead  per-call overhead percentiles against the unwrapped client,
+            and the cost of each step on the hot path
+  threads   wrapped-call throughput at 1-64 threads
+  memory    bytes per queued event
+  encoding  size and worker CPU of one batch as JSON or columnar msgpack
+  ingest    end-to-end events/s from wrapped calls into the ingest server
+  outage    wrapped-call latency and buffer size with a full queue and a
+            stalled ingest endpoint, per queue_full_policy
+
+--save writes the results as JSON; --compare checks them against a saved
+baseline and exits with status 1 if any metric is worse by more than
+--tolerance (latency and memory up, throughput down).
+
+Usage:
+    python benchmarks/bench_wrapped_call.py [--calls 100000] [--only overhead,threads]
+    python benchmarks/bench_wrapped_call.py --save baseline.json
+    python benchmarks/bench_wrapped_call.py --compare baseline.json [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tokentra import TokenTra, columnar, transport  # noqa: E402
+from tokentra.ids import new_request_id  # noqa: E402
+from tokentra.pricing import calculate_cost  # noqa: E402
+from tokentra.providers import OPENAI  # noqa: E402
+from tokentra.columnar import COLUMNAR_CONTENT_TYPE  # noqa: E402
+from tokentra.transport import BodyEncoder, Transport, TransportResponse, decode_body  # noqa: E402
+
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+SECTIONS = ("overhead", "threads", "memory", "encoding", "ingest", "outage")
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Summarize the quarterly report in three bullet points."},
+]
+
+
+# --- Fake provider clients ---------------------------------------------------
+
+_OPENAI_RESPONSE = SimpleNamespace(
+    id="chatcmpl-bench",
+    usage=SimpleNamespace(prompt_tokens=120, completion_tokens=40),
+)
+_ANTHROPIC_RESPONSE = SimpleNamespace(
+    id="msg-bench",
+    usage=SimpleNamespace(input_tokens=120, output_tokens=40, cache_read_input_tokens=0),
+)
+
+
+class _Completions:
+    def create(self, **kwargs):
+        return _OPENAI_RESPONSE
+
+
+class _Messages:
+    def create(self, **kwargs):
+        return _ANTHROPIC_RESPONSE
+
+
+class FakeOpenAI:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_Completions())
+
+
+class FakeAnthropic:
+    def __init__(self):
+        self.messages = _Messages()
+
+
+# Detected like the real SDK classes
+FakeOpenAI.__module__ = "openai"
+FakeAnthropic.__module__ = "anthropic"
+
+CLIENTS = {
+    "openai": (FakeOpenAI, lambda c: c.chat.completions.create, "gpt-4o"),
+    "anthropic": (FakeAnthropic, lambda c: c.messages.create, "claude-3-5-sonnet-20241022"),
+}
+
+
+class NullTransport(Transport):
+    """Accepts every batch without sending it"""
+
+    def send(self, url, body, headers, timeout):
+        return TransportResponse(200, {})
+
+
+class StalledTransport(Transport):
+    """Ingest endpoint that never answers until released (a backend outage)"""
+
+    def __init__(self):
+        self.released = threading.Event()
+
+    def send(self, url, body, headers, timeout):
+        self.released.wait()
+        return TransportResponse(200, {})
+
+
+# --- Local ingest server -----------------------------------------------------
+
+class IngestServer(ThreadingHTTPServer):
+    """Stand-in ingest endpoint that decodes batches and counts events"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _IngestHandler)
+        self.events = 0
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def wait_for(self, events: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.events < events:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        payload = decode_body(body, self.headers)
+
+        with self.server.lock:
+            self.server.events += len(payload["events"])
+            self.server.requests += 1
+            self.server.bytes += len(body)
+
+        self.send_response(200)
+        self.send_header("Accept-Encoding", "gzip")
+        self.send_header("Accept-Post", COLUMNAR_CONTENT_TYPE)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+# --- Measurements ------------------------------------------------------------
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def sdk(**overrides) -> TokenTra:
+    config = {"api_key": "tt_test_bench", "transport": NullTransport(), "max_queue_size": 1_000_000}
+    config.update(overrides)
+    return TokenTra(**config)
+
+
+def call_latencies_ns(create, model: str, calls: int) -> List[int]:
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(calls):
+        start = clock()
+        create(model=model, messages=MESSAGES)
+        samples.append(clock() - start)
+    samples.sort()
+    return samples
+
+
+def time_per_op_ns(fn, calls: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter_ns() - start) / calls
+
+
+def bench_overhead(calls: int, results: Dict[str, float]):
+    print(f"\nPer-call overhead ({calls} calls, microseconds)")
+    print(f"{'client':<12}{'raw p50':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}")
+
+    for provider, (cls, method, model) in CLIENTS.items():
+        raw = call_latencies_ns(method(cls()), model, calls)
+        raw_p50 = percentile(raw, 0.5)
+
+        tokentra = sdk()
+        wrapped = call_latencies_ns(method(tokentra.wrap(cls())), model, calls)
+        tokentra.shutdown()
+
+        row = [provider, raw_p50 / 1000]
+        for q in (0.5, 0.9, 0.99, 0.999):
+            overhead_us = (percentile(wrapped, q) - raw_p50) / 1000
+            results[f"overhead_{provider}_p{q * 100:g}_us"] = overhead_us
+            row.append(overhead_us)
+        print(f"{row[0]:<12}" + "".join(f"{value:>10.2f}" for value in row[1:]))
+
+    tokentra = sdk()
+    method = OPENAI.methods[0]
+    attribution = tokentra._resolve_attribution({"feature": "chat", "team": "product"})
+    now = time.time()
+    event = tokentra._build_event(
+        "openai", new_request_id(), "gpt-4o", {"input": 120, "output": 40},
+        now, now, attribution, method_path=method.path,
+    )
+    steps = (
+        ("request_id", new_request_id),
+        ("timestamp", time.time_ns),
+        ("resolve_attribution", lambda: tokentra._resolve_attribution({"feature": "chat"})),
+        ("calculate_cost", lambda: calculate_cost("openai", "gpt-4o", 120, 40)),
+        ("prepare_request", lambda: tokentra._prepare_request(
+            "openai", method, {"model": "gpt-4o", "messages": MESSAGES}, attribution)),
+        ("admit_request", lambda: tokentra._admit_request(
+            "gpt-4o", {"model": "gpt-4o", "messages": MESSAGES}, attribution, {})),
+        ("build_event", lambda: tokentra._build_event(
+            "openai", 0, "gpt-4o", {"input": 120, "output": 40},
+            now, now, attribution, method_path=method.path)),
+        ("to_dict", event.to_dict),
+        ("queue_telemetry", lambda: tokentra._queue_telemetry(event)),
+    )
+
+    print(f"\n{'hot-path step':<20}{'ns/call':>10}")
+    step_calls = max(1000, calls // 2)
+    for name, fn in steps:
+        ns = time_per_op_ns(fn, step_calls)
+        results[f"step_{name}_ns"] = ns
+        print(f"{name:<20}{ns:>10.0f}")
+    tokentra.shutdown()
+
+
+def bench_threads(calls: int, results: Dict[str, float]):
+    print(f"\nThroughput ({calls} calls per run, calls/s)")
+    print(f"{'threads':<10}{'raw':>14}{'wrapped':>14}{'ratio':>8}")
+
+    for threads in THREAD_COUNTS:
+        raw = run_threads(FakeOpenAI(), threads, calls)
+
+        tokentra = sdk(batch_size=100)
+        wrapped = run_threads(tokentra.wrap(FakeOpenAI()), threads, calls)
+        tokentra.shutdown()
+
+        results[f"threads_{threads}_calls_per_s"] = wrapped
+        print(f"{threads:<10}{raw:>14,.0f}{wrapped:>14,.0f}{wrapped / raw:>8.2f}")
+
+
+def run_threads(client, threads: int, calls: int) -> float:
+    per_thread = max(1, calls // threads)
+    create = client.chat.completions.create
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            create(model="gpt-4o", messages=MESSAGES)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def bench_memory(calls: int, results: Dict[str, float]):
+    # Nothing is sent until shutdown, so every event stays queued
+    tokentra = sdk(batch_size=calls + 1, max_queue_size=calls + 1, flush_interval=3600)
+    create = tokentra.wrap(FakeOpenAI()).chat.completions.create
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(calls):
+        create(model="gpt-4o", messages=MESSAGES)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    queued = len(tokentra._buffer)
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tokentra.shutdown()
+
+    results["memory_bytes_per_event"] = allocated / queued
+    print(f"\nMemory: {allocated / queued:.0f} bytes per queued event ({queued} queued)")
+
+
+def bench_ingest(calls: int, batch_size: int, results: Dict[str, float]):
+    print(f"\n{'ingest format':<16}{'requests':>10}{'bytes/event':>13}{'events/s':>12}")
+    for wire_format in ("json", "columnar"):
+        server = IngestServer()
+        tokentra = TokenTra(
+            api_key="tt_test_bench", api_url=server.url, batch_size=batch_size,
+            max_queue_size=1_000_000, wire_format=wire_format,
+        )
+        create = tokentra.wrap(FakeOpenAI()).chat.completions.create
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            create(model="gpt-4o", messages=MESSAGES)
+        tokentra.flush(timeout=60)
+        delivered = server.wait_for(calls, timeout=60)
+        elapsed = time.perf_counter() - start
+        tokentra.shutdown()
+        server.close()
+
+        if not delivered:
+            print(f"{wire_format}: only {server.events} of {calls} events arrived")
+        rate = server.events / elapsed
+        results[f"ingest_{wire_format}_events_per_s"] = rate
+        print(
+            f"{wire_format:<16}{server.requests:>10}"
+            f"{server.bytes / max(server.events, 1):>13.1f}{rate:>12,.0f}"
+        )
+
+
+def bench_encoding(events: int, results: Dict[str, float]):
+    """Worker-side cost of encoding one batch in each wire format"""
+    tokentra = sdk()
+    create = tokentra.wrap(FakeOpenAI()).chat.completions.create
+    features = ("chat", "search", "summarize", "classify")
+    for i in range(events):
+        create(model="gpt-4o", messages=MESSAGES, tokentra={"feature": features[i % 4], "team": "product"})
+    payload = tokentra._build_payload(list(tokentra._buffer))
+    tokentra.shutdown()
+
+    print(f"\nEncoding one {events}-event batch")
+    print(f"{'format':<22}{'bytes':>10}{'bytes/event':>13}{'ms':>8}")
+    for wire_format in ("json", "columnar"):
+        for compression in ("none", "gzip", "zstd"):
+            if (wire_format == "columnar" and columnar._msgpack is None) or (
+                compression == "zstd" and transport._zstd is None
+            ):
+                continue  # optional dependency missing
+            encoder = BodyEncoder(compression, wire_format=wire_format)
+            start = time.perf_counter()
+            body, _ = encoder.encode(payload)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            name = f"{wire_format}+{compression}"
+            results[f"encode_{wire_format}_{compression}_bytes_per_event"] = len(body) / events
+            results[f"encode_{wire_format}_{compression}_ms"] = elapsed_ms
+            print(f"{name:<22}{len(body):>10}{len(body) / events:>13.1f}{elapsed_ms:>8.2f}")
+
+
+def bench_outage(calls: int, results: Dict[str, float]):
+    print(f"\nFull queue during an ingest outage ({calls} calls, max_queue_size=1000)")
+    print(f"{'policy':<14}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'buffered':>10}{'dropped':>10}")
+
+    for policy in ("drop_newest", "drop_oldest", "rollup", "spill", "block"):
+        stalled = StalledTransport()
+        with tempfile.TemporaryDirectory() as spill_dir:
+            tokentra = sdk(
+                transport=stalled, batch_size=100, max_queue_size=1000, log_level="ERROR",
+                queue_full_policy=policy, queue_spill_dir=spill_dir, queue_block_timeout=0.001,
+            )
+            wrapped = tokentra.wrap(FakeOpenAI()).chat.completions.create
+            samples = call_latencies_ns(wrapped, "gpt-4o", calls)
+            buffered = len(tokentra._buffer)
+            dropped = tokentra.get_stats()["telemetry_dropped"]
+            stalled.released.set()
+            tokentra.shutdown()
+
+        for q in (0.5, 0.99):
+            results[f"outage_{policy}_p{q * 100:g}_us"] = percentile(samples, q) / 1000
+        print(
+            f"{policy:<14}{percentile(samples, 0.5) / 1000:>10.2f}{percentile(samples, 0.99) / 1000:>10.2f}"
+            f"{samples[-1] / 1000:>10.0f}{buffered:>10}{dropped:>10}"
+        )
+
+
+# --- Regression gate ---------------------------------------------------------
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> bool:
+    print(f"\n{'metric':<36}{'baseline':>14}{'current':>14}{'change':>9}")
+    ok = True
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if not base:
+            continue
+        change = (value - base) / base
+        worse = -change if higher_is_better(metric) else change
+        flag = ""
+        if worse > tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"{metric:<36}{base:>14.2f}{value:>14.2f}{change:>+9.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--batch-events", type=int, default=5000)
+    parser.add_argument("--ingest-calls", type=int, default=20_000)
+    parser.add_argument("--ingest-batch-size", type=int, default=100)
+    parser.add_argument("--only", help=f"comma-separated sections: {', '.join(SECTIONS)}")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sections = args.only.split(",") if args.only else SECTIONS
+    results: Dict[str, float] = {}
+
+    if "overhead" in sections:
+        bench_overhead(args.calls, results)
+    if "threads" in sections:
+        bench_threads(args.calls, results)
+    if "memory" in sections:
+        bench_memory(args.calls, results)
+    if "encoding" in sections:
+        bench_encoding(args.batch_events, results)
+    if "ingest" in sections:
+        bench_ingest(args.ingest_calls, args.ingest_batch_size, results)
+    if "outage" in sections:
+        bench_outage(args.ingest_calls, results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Shared fixtures: in-process fake provider clients and a recording transport"""
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from tokentra import TokenTra
+from tokentra.transport import MemoryTransport, TransportResponse
+
+
+class _Completions:
+    def __init__(self, error: Optional[Exception] = None):
+        self.error = error
+        self.calls: List[Dict[str, Any]] = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        if kwargs.get("stream"):
+            chunks = [SimpleNamespace(choices=[1], usage=None) for _ in range(3)]
+            if kwargs.get("stream_options", {}).get("include_usage"):
+                chunks.append(SimpleNamespace(
+                    choices=[], usage=SimpleNamespace(prompt_tokens=12, completion_tokens=3),
+                ))
+            return iter(chunks)
+        return SimpleNamespace(
+            id="chatcmpl-test",
+            model=kwargs["model"],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+
+class OpenAI:
+    """Stand-in for openai.OpenAI (matched by class name)"""
+
+    def __init__(self, base_url: str = "https://api.openai.com/v1", error: Optional[Exception] = None):
+        self.base_url = base_url
+        self.chat = SimpleNamespace(completions=_Completions(error))
+
+
+class ScriptedTransport(MemoryTransport):
+    """Answers with the given (status, headers) responses in turn, then 200"""
+
+    def __init__(self, *responses):
+        super().__init__()
+        self.responses = list(responses)
+
+    def send(self, url, body, headers, timeout):
+        response = super().send(url, body, headers, timeout)
+        if not self.responses:
+            return response
+        status, extra = self.responses.pop(0)
+        return TransportResponse(status, {**response.headers, **extra})
+
+
+def sent_events(transport: MemoryTransport) -> List[Dict[str, Any]]:
+    """Every event the transport received, in order"""
+    return [event for request in transport.requests for event in request["payload"]["events"]]
+
+
+def track(client: TokenTra, count: int):
+    """Record `count` manual gpt-4o events with input_tokens 0..count-1"""
+    for i in range(count):
+        client.track(provider="openai", model="gpt-4o", input_tokens=i, output_tokens=1, latency_ms=5)
+
+
+@pytest.fixture
+def transport() -> MemoryTransport:
+    return MemoryTransport()
+
+
+@pytest.fixture
+def make_client(transport):
+    """TokenTra factory defaulting to the recording transport; shuts clients down afterwards"""
+    clients: List[TokenTra] = []
+
+    def make(**kwargs) -> TokenTra:
+        kwargs.setdefault("transport", transport)
+        kwargs.setdefault("flush_interval", 60.0)
+        client = TokenTra(api_key="tt_test_123", **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+
+    for client in clients:
+        if not client._shutdown.is_set():
+            client.shutdown()
@@ -0,0 +1,189 @@
+"""AsyncTokenTra: wrapped async clients, budgets and the context manager"""
+
+import asyncio
+import functools
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import OpenAI, sent_events
+from tokentra import AsyncTokenTra, TokenTra, TokenTraError
+from tokentra.budgets import Budget
+from tokentra.providers import is_async_method
+from tokentra.transport import AsyncTransport, MemoryTransport
+
+
+class AsyncMemoryTransport(AsyncTransport):
+    def __init__(self):
+        self.memory = MemoryTransport()
+
+    async def send(self, url, body, headers, timeout):
+        return self.memory.send(url, body, headers, timeout)
+
+
+class _AsyncCompletions:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(
+            id="chatcmpl-test", model=kwargs["model"],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+
+class AsyncOpenAI:
+    """Stand-in for openai.AsyncOpenAI (matched by class name)"""
+
+    def __init__(self):
+        self.base_url = "https://api.openai.com/v1"
+        self.chat = SimpleNamespace(completions=_AsyncCompletions())
+
+
+def make_client(**kwargs):
+    return AsyncTokenTra(api_key="tt_test_123", transport=AsyncMemoryTransport(), **kwargs)
+
+
+def test_sync_with_is_rejected():
+    client = make_client()
+    with pytest.raises(TypeError, match="async with"):
+        with client:
+            pass
+    asyncio.run(client.shutdown())
+
+
+def test_async_with_sends_on_exit():
+    async def main():
+        async with make_client() as client:
+            openai = client.wrap(AsyncOpenAI())
+            await openai.chat.completions.create(model="gpt-4o", messages=[])
+        return client
+
+    client = asyncio.run(main())
+    assert [e["model"] for e in sent_events(client._transport.memory)] == ["gpt-4o"]
+
+
+def test_cache_hit_is_not_delayed_by_a_budget_like_the_sync_client():
+    rule = {"name": "to-mini", "to": "gpt-4o-mini", "models": "gpt-4o"}
+    # Refills in about 2s once the first call has spent it
+    budget = Budget(name="tiny", limit=0.00001, period=1.0, action="delay", max_delay=5.0)
+
+    async def main():
+        client = make_client(routing_rules=[rule], budgets=[budget], response_cache="memory")
+        openai = client.wrap(AsyncOpenAI())
+        ask = dict(model="gpt-4o", messages=[{"role": "user", "content": "hi"}], temperature=0)
+
+        await openai.chat.completions.create(**ask)
+        started = time.monotonic()
+        cached = await openai.chat.completions.create(**ask)
+        elapsed = time.monotonic() - started
+        await client.shutdown()
+        return openai, cached, elapsed
+
+    openai, cached, elapsed = asyncio.run(main())
+    assert elapsed < 0.5
+    assert cached.model == "gpt-4o-mini"
+    assert [call["model"] for call in openai.chat.completions.calls] == ["gpt-4o-mini"]
+
+
+class _GoogleModels:
+    def generate_content(self, **kwargs):
+        return SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=5))
+
+
+class _AsyncGoogleModels:
+    async def generate_content(self, **kwargs):
+        return SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=5))
+
+
+class GoogleClient:
+    """Stand-in for google.genai.Client: sync `models` and async `aio.models`"""
+
+    def __init__(self):
+        self.models = _GoogleModels()
+        self.aio = SimpleNamespace(models=_AsyncGoogleModels())
+
+
+GoogleClient.__module__ = "google.genai.client"
+
+
+def test_sync_client_is_rejected_by_the_async_wrapper():
+    client = make_client()
+    openai = OpenAI()
+    create = openai.chat.completions.create
+    with pytest.raises(TokenTraError, match="wrap it with TokenTra") as info:
+        client.wrap(openai)
+    assert info.value.code == "UNSUPPORTED_PROVIDER"
+    assert openai.chat.completions.create == create
+    asyncio.run(client.shutdown())
+
+
+def test_async_client_is_rejected_by_the_sync_wrapper():
+    client = TokenTra(api_key="tt_test_123", transport=MemoryTransport())
+    with pytest.raises(TokenTraError, match="wrap it with AsyncTokenTra") as info:
+        client.wrap(AsyncOpenAI())
+    assert info.value.code == "UNSUPPORTED_PROVIDER"
+    client.shutdown()
+
+
+def test_google_client_wraps_the_matching_half():
+    sync_client = TokenTra(api_key="tt_test_123", transport=MemoryTransport())
+    google = sync_client.wrap(GoogleClient())
+    assert "generate_content" in vars(google.models)
+    assert "generate_content" not in vars(google.aio.models)
+    sync_client.shutdown()
+
+    async def main():
+        client = make_client()
+        google = client.wrap(GoogleClient())
+        assert "generate_content" not in vars(google.models)
+        await google.aio.models.generate_content(model="gemini-2.0-flash", contents="hi")
+        await client.shutdown()
+        return client
+
+    client = asyncio.run(main())
+    assert [e["provider"] for e in sent_events(client._transport.memory)] == ["google"]
+
+
+def test_async_method_behind_a_sync_decorator_is_detected():
+    # openai's required_args decorator wraps `async def create` in a plain function
+    def required_args(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return wrapper
+
+    class Completions:
+        @required_args
+        async def create(self, **kwargs):
+            return None
+
+    assert is_async_method(Completions().create)
+    assert not is_async_method(OpenAI().chat.completions.create)
+
+
+def test_worker_task_survives_a_failed_iteration():
+    async def main():
+        client = make_client(batch_size=1, flush_interval=0.05)
+        failures = []
+        collect = client._collect_rollups
+
+        def collect_once_broken(force):
+            if not failures:
+                failures.append(force)
+                raise RuntimeError("bad rollup")
+            collect(force)
+
+        client._collect_rollups = collect_once_broken
+        openai = client.wrap(AsyncOpenAI())
+        await openai.chat.completions.create(model="gpt-4o", messages=[])
+        await asyncio.sleep(0.2)
+        alive = not client._worker_task.done()
+        await client.shutdown()
+        return client, failures, alive
+
+    client, failures, alive = asyncio.run(main())
+    assert failures and alive
+    assert [e["model"] for e in sent_events(client._transport.memory)] == ["gpt-4o"]
@@ -0,0 +1,86 @@
+"""queue_full_policy: what a full telemetry buffer does with new events"""
+
+import time
+
+from conftest import sent_events, track
+from tokentra.replay import Replayer
+from tokentra.sinks import FileSink
+from tokentra.transport import MemoryTransport
+
+
+def dropped_reported(transport):
+    return sum(request["payload"].get("dropped_events", 0) for request in transport.requests)
+
+
+def full_client(make_client, policy, **kwargs):
+    # Two slots and no batch trigger: the third event finds the buffer full
+    return make_client(max_queue_size=2, batch_size=100, queue_full_policy=policy, **kwargs)
+
+
+def test_drop_newest_keeps_buffered_events(make_client, transport):
+    client = full_client(make_client, "drop_newest")
+    track(client, 5)
+    client.flush()
+
+    assert [e["input_tokens"] for e in sent_events(transport)] == [0, 1]
+    assert dropped_reported(transport) == 3
+    assert client.get_stats()["telemetry_dropped"] == 3
+
+
+def test_drop_oldest_keeps_latest_events(make_client, transport):
+    client = full_client(make_client, "drop_oldest")
+    track(client, 5)
+    client.flush()
+
+    assert [e["input_tokens"] for e in sent_events(transport)] == [3, 4]
+    assert dropped_reported(transport) == 3
+
+
+def test_rollup_folds_overflow_into_totals(make_client, transport):
+    client = full_client(make_client, "rollup")
+    track(client, 5)
+    client.shutdown()
+
+    events = sent_events(transport)
+    assert [e["input_tokens"] for e in events if e.get("type") != "rollup"] == [0, 1]
+    (rollup,) = [e for e in events if e.get("type") == "rollup"]
+    assert rollup["count"] == 3
+    assert rollup["input_tokens"] == 2 + 3 + 4
+    assert dropped_reported(transport) == 0
+
+
+def test_spill_sends_overflow_later(make_client, transport, tmp_path):
+    client = full_client(make_client, "spill", queue_spill_dir=str(tmp_path), flush_interval=0.05)
+    track(client, 5)
+
+    deadline = time.monotonic() + 5
+    while len(sent_events(transport)) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert sorted(e["input_tokens"] for e in sent_events(transport)) == list(range(5))
+    assert client.get_stats()["telemetry_spilled"] == 3
+    assert dropped_reported(transport) == 0
+
+
+def test_block_waits_at_most_the_timeout_then_drops(make_client, transport):
+    client = full_client(make_client, "block", queue_block_timeout=0.02)
+    started = time.monotonic()
+    track(client, 5)
+    elapsed = time.monotonic() - started
+    client.flush()
+
+    assert 0.06 <= elapsed < 1.0
+    assert [e["input_tokens"] for e in sent_events(transport)] == [0, 1]
+    assert dropped_reported(transport) == 3
+
+
+def test_drop_count_survives_file_sink_and_replay(make_client, tmp_path):
+    client = full_client(make_client, "drop_newest", sink=FileSink(str(tmp_path)))
+    track(client, 5)
+    client.shutdown()
+
+    replayed = MemoryTransport()
+    Replayer([str(tmp_path)], client=make_client(transport=replayed)).run()
+
+    assert [e["input_tokens"] for e in sent_events(replayed)] == [0, 1]
+    assert dropped_reported(replayed) == 3
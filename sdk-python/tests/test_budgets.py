@@ -0,0 +1,103 @@
+"""Local spend budgets enforced before wrapped calls"""
+
+import pytest
+
+from conftest import OpenAI, sent_events
+from tokentra.budgets import Budget, BudgetLimiter
+from tokentra.errors import BudgetExceededError
+
+CALL_COST = 0.00045  # gpt-4o, 100 input and 20 output tokens
+
+
+def ask(openai, **kwargs):
+    return openai.chat.completions.create(model="gpt-4o", messages=[], **kwargs)
+
+
+def test_limiter_charges_only_matching_scopes():
+    limiter = BudgetLimiter([Budget(name="ml", limit=1.0, team="ml")])
+
+    limiter.record(("web", "chat", None), 5.0)
+    assert limiter.check(("ml", "chat", None)) is None
+
+    limiter.record(("ml", "chat", None), 1.5)
+    budget, wait = limiter.check(("ml", "search", None))
+    assert budget.name == "ml"
+    assert wait > 0
+
+
+def test_spent_budget_refills_over_its_period():
+    budget = Budget(name="b", limit=1.0, period=10.0)
+    limiter = BudgetLimiter([budget])
+    limiter.record((None, None, None), 1.5)
+
+    budget.updated -= 6.0  # 0.6 USD refilled, level is back above zero
+    assert limiter.check((None, None, None)) is None
+
+
+def test_exhausted_budget_blocks_before_the_provider(make_client):
+    client = make_client(budgets=[Budget(name="tiny", limit=CALL_COST / 2)])
+    openai = client.wrap(OpenAI())
+    ask(openai)
+
+    with pytest.raises(BudgetExceededError) as raised:
+        ask(openai)
+
+    assert raised.value.budget == "tiny" and raised.value.retry_after > 0
+    assert len(openai.chat.completions.calls) == 1
+    assert client.get_stats()["budget_blocked"] == 1
+
+
+def test_downgrade_rewrites_the_model(make_client, transport):
+    budget = Budget(name="cap", limit=CALL_COST / 2, action="downgrade", downgrade_to="gpt-4o-mini")
+    client = make_client(budgets=[budget])
+    openai = client.wrap(OpenAI())
+
+    ask(openai)
+    ask(openai)
+    client.flush()
+
+    assert [c["model"] for c in openai.chat.completions.calls] == ["gpt-4o", "gpt-4o-mini"]
+    downgraded = sent_events(transport)[1]
+    assert downgraded["original_model"] == "gpt-4o"
+    assert downgraded["routed_by_rule"] == "budget:cap"
+
+
+def test_delay_waits_then_sends_or_blocks_past_max_delay(make_client, monkeypatch):
+    # Refills CALL_COST in 1s, so the second call waits about half a second
+    budget = Budget(name="slow", limit=CALL_COST / 2, period=0.5, action="delay", max_delay=2.0)
+    client = make_client(budgets=[budget])
+    waits = []
+    monkeypatch.setattr(client, "_wait_for_budget", waits.append)
+    openai = client.wrap(OpenAI())
+
+    ask(openai)
+    ask(openai)
+    assert len(waits) == 1 and 0 < waits[0] <= 2.0
+    assert client.get_stats()["budget_delayed"] == 1
+
+    budget.max_delay = 0.0
+    with pytest.raises(BudgetExceededError):
+        ask(openai)
+
+
+def test_default_team_is_charged_and_checked(make_client):
+    client = make_client(budgets=[Budget(name="ml", limit=CALL_COST / 2, team="ml")], default_team="ml")
+    openai = client.wrap(OpenAI())
+    ask(openai)
+
+    with pytest.raises(BudgetExceededError):
+        ask(openai)
+    ask(openai, tokentra={"team": "web"})  # another team is not limited
+
+
+def test_remote_budgets_set_remaining_and_add_new_ones():
+    limiter = BudgetLimiter([Budget(name="known", limit=10.0)])
+    limiter.apply_remote({"budgets": [
+        {"name": "known", "limit": 10.0, "remaining": 0.0},
+        {"name": "new", "limit": 5.0, "period_seconds": 3600, "feature": "chat", "remaining": 5.0},
+    ]})
+
+    assert [b.name for b in limiter.budgets] == ["known", "new"]
+    assert limiter.budgets[0].level == 0.0
+    assert limiter.budgets[1].feature == "chat"
+    assert limiter.budgets[1].level == 5.0
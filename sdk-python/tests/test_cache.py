@@ -0,0 +1,70 @@
+"""Response cache in wrapped clients"""
+
+import pytest
+
+from conftest import OpenAI, sent_events
+from tokentra.budgets import Budget
+from tokentra.cache import MemoryCache, ResponseCache
+from tokentra.errors import BudgetExceededError
+
+
+class BrokenCache(MemoryCache):
+    def get(self, key):
+        raise OSError("cache unavailable")
+
+    def set(self, key, value):
+        raise OSError("cache unavailable")
+
+
+def ask(openai, **kwargs):
+    return openai.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}],
+                                          temperature=0, **kwargs)
+
+
+def test_hit_skips_the_provider(make_client, transport):
+    client = make_client(response_cache="memory")
+    openai = client.wrap(OpenAI())
+
+    first, second = ask(openai), ask(openai)
+    client.flush()
+
+    assert second is first
+    assert len(openai.chat.completions.calls) == 1
+    events = sent_events(transport)
+    assert [e.get("was_cached", False) for e in events] == [False, True]
+    assert events[1]["total_cost"] == 0 and events[1]["avoided_cost"] > 0
+
+
+def test_broken_cache_does_not_fail_the_call(make_client, transport):
+    client = make_client(response_cache=BrokenCache())
+    openai = client.wrap(OpenAI())
+
+    response = ask(openai)
+    client.flush()
+
+    assert response.usage.prompt_tokens == 100
+    stats = client.get_stats()
+    assert stats["cache_errors"] == 2
+    assert stats["errors"] == 0
+    assert [e.get("is_error", False) for e in sent_events(transport)] == [False]
+
+
+def test_hit_is_served_without_a_budget_check(make_client):
+    budget = Budget(name="tiny", limit=0.0001, action="block")
+    client = make_client(response_cache="memory", budgets=[budget])
+    openai = client.wrap(OpenAI())
+
+    ask(openai)  # spends past the limit
+    assert ask(openai).usage.prompt_tokens == 100  # cached
+
+    with pytest.raises(BudgetExceededError):
+        ask(openai, max_tokens=5)  # a different request goes to the provider
+
+
+def test_cache_without_get_and_set_cannot_be_created():
+    class Incomplete(ResponseCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,24 @@
+"""Pre-flight token and cost estimation"""
+
+from tokentra import estimate_batch
+from tokentra.estimation import MEMO_MAX_CHARS, _count_memo, count_tokens
+
+
+def test_only_short_strings_are_memoized():
+    _count_memo.cache_clear()
+    short, long = "x" * MEMO_MAX_CHARS, "y" * (MEMO_MAX_CHARS + 1)
+
+    assert count_tokens("mistral", "mistral-small", short) == MEMO_MAX_CHARS // 4
+    assert count_tokens("mistral", "mistral-small", long) == (MEMO_MAX_CHARS + 4) // 4
+
+    assert _count_memo.cache_info().currsize == 1
+
+
+def test_estimate_batch_returns_lists():
+    jobs = estimate_batch("openai", "gpt-4o-mini", ["hello there", {"prompt": "hi", "max_tokens": 10}])
+
+    for column in ("input_tokens", "output_tokens", "input_cost", "output_cost", "total_cost"):
+        assert type(jobs[column]) is list and len(jobs[column]) == 2
+        assert all(type(value) in (int, float) for value in jobs[column])
+    assert jobs["output_tokens"] == [0, 10]
+    assert jobs["total"] == sum(jobs["total_cost"])
@@ -0,0 +1,46 @@
+"""TelemetryEvent: slotted storage and the generated to_dict()"""
+
+from dataclasses import fields
+
+import pytest
+
+from tokentra.client import _OPTIONAL_FIELDS, _REQUIRED_FIELDS, TelemetryEvent
+
+
+def event(**kwargs) -> TelemetryEvent:
+    values = dict(
+        request_id="req-1", timestamp="2026-01-01T00:00:00.000000Z", provider="openai",
+        model="gpt-4o", input_tokens=100, output_tokens=20, total_tokens=120,
+        input_cost=0.00025, output_cost=0.0002, total_cost=0.00045, latency_ms=12,
+    )
+    values.update(kwargs)
+    return TelemetryEvent(**values)
+
+
+def test_events_have_no_instance_dict():
+    e = event()
+    assert not hasattr(e, "__dict__")
+    with pytest.raises(AttributeError):
+        e.unknown = 1
+    assert e.metadata is None
+
+
+def test_every_field_is_serialized():
+    names = {f.name for f in fields(TelemetryEvent)}
+    assert names == set(_REQUIRED_FIELDS) | set(_OPTIONAL_FIELDS) | {"metadata"}
+
+
+def test_unset_optional_fields_are_omitted():
+    result = event().to_dict()
+    assert list(result) == list(_REQUIRED_FIELDS)
+    assert result["sdk_language"] == "python"
+
+
+def test_set_optional_fields_and_metadata_are_included():
+    result = event(feature="chat", cached_tokens=0, was_cached=True, metadata={"k": "v"}).to_dict()
+    assert result["feature"] == "chat"
+    assert result["cached_tokens"] == 0  # zero is a value, only None and False are omitted
+    assert result["was_cached"] is True
+    assert result["metadata"] == {"k": "v"}
+    assert "is_error" not in result
+
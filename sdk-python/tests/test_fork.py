@@ -0,0 +1,138 @@
+"""Clients inherited through fork(): re-arming and per-child spools"""
+
+import os
+import time
+
+import pytest
+
+from conftest import sent_events, track
+from tokentra.transport import MemoryTransport
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+def in_child(fn) -> int:
+    """Run fn() in a forked child; returns its exit status"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            code = fn()
+        except BaseException:
+            code = 99
+        os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def test_child_restarts_worker_and_sends_its_own_events(make_client, transport):
+    client = make_client()
+    track(client, 2)  # buffered in the parent before the fork
+    parent_worker = client._worker
+
+    def child():
+        assert client._worker is not parent_worker and client._worker.is_alive()
+        assert len(client._buffer) == 0  # the parent sends its own buffer
+        track(client, 1)
+        assert client.flush(timeout=5)
+        client.shutdown()
+        return 0 if len(sent_events(transport)) == 1 else 1
+
+    assert in_child(child) == 0
+
+    client.flush()
+    assert len(sent_events(transport)) == 2
+
+
+def test_spool_of_exited_child_is_replayed_on_restart(make_client, tmp_path):
+    down = MemoryTransport(status_code=503)
+    client = make_client(transport=down, spool_dir=str(tmp_path), max_retries=0)
+
+    def child():
+        track(client, 3)
+        client.shutdown()
+        return 0
+
+    assert in_child(child) == 0
+    client.shutdown()
+    assert any(name.startswith("pid-") for name in os.listdir(tmp_path))
+
+    up = MemoryTransport()
+    make_client(transport=up, spool_dir=str(tmp_path)).flush()
+
+    assert sorted(e["input_tokens"] for e in sent_events(up)) == [0, 1, 2]
+    assert not any(name.startswith("pid-") for name in os.listdir(tmp_path))
+
+
+def test_spill_of_exited_child_is_replayed_on_restart(make_client, tmp_path):
+    down = MemoryTransport(status_code=503)
+    client = make_client(
+        transport=down, max_queue_size=1, batch_size=100, max_retries=0,
+        queue_full_policy="spill", queue_spill_dir=str(tmp_path),
+    )
+
+    def child():
+        track(client, 4)  # one buffered in memory, three spilled
+        client.shutdown()
+        return 0
+
+    assert in_child(child) == 0
+    client.shutdown()
+
+    up = MemoryTransport()
+    make_client(
+        transport=up, max_queue_size=10, flush_interval=0.05,
+        queue_full_policy="spill", queue_spill_dir=str(tmp_path),
+    )
+    deadline = time.monotonic() + 5
+    while len(sent_events(up)) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert sorted(e["input_tokens"] for e in sent_events(up)) == [1, 2, 3]
+    assert not any(name.startswith("pid-") for name in os.listdir(tmp_path))
+
+
+def test_running_parent_adopts_spool_of_child_that_exits_later(make_client, tmp_path):
+    transport = MemoryTransport(status_code=503)
+    client = make_client(
+        transport=transport, spool_dir=str(tmp_path), max_retries=0, orphan_adopt_interval=0.05,
+    )
+
+    def child():
+        track(client, 3)
+        client.shutdown()
+        return 0
+
+    assert in_child(child) == 0
+    transport.status_code = 200
+    deadline = time.monotonic() + 5
+    while any(name.startswith("pid-") for name in os.listdir(tmp_path)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    client.flush()
+
+    assert sorted(e["input_tokens"] for e in sent_events(transport)) == [0, 1, 2]
+
+
+class ForkAwareTransport(MemoryTransport):
+    def __init__(self):
+        super().__init__()
+        self.forks = 0
+
+    def after_fork(self):
+        self.forks += 1
+        self.requests = []
+
+
+def test_supplied_transport_is_kept_and_told_about_the_fork(make_client):
+    transport = ForkAwareTransport()
+    client = make_client(transport=transport)
+    track(client, 1)
+    client.flush()
+
+    def child():
+        assert client._transport is transport and transport.forks == 1
+        track(client, 1)
+        client.flush()
+        return 0 if len(sent_events(transport)) == 1 else 1
+
+    assert in_child(child) == 0
+    assert transport.forks == 0
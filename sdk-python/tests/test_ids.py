@@ -0,0 +1,60 @@
+"""Request ids (UUIDv7) and raw timestamps, formatted at serialization"""
+
+import os
+import uuid
+
+import pytest
+
+from conftest import sent_events
+from tokentra import ids
+from tokentra.ids import format_request_id, format_timestamp, new_request_id
+
+
+def test_request_ids_are_valid_uuid7():
+    parsed = uuid.UUID(format_request_id(new_request_id()))
+    assert parsed.version == 7
+    assert parsed.variant == uuid.RFC_4122
+
+
+def test_request_ids_embed_milliseconds_and_sort_by_creation():
+    now_ns = 1_767_225_600_123_456_789
+    first, second = new_request_id(now_ns), new_request_id(now_ns)
+    assert first >> 80 == now_ns // 1_000_000
+    assert first < second  # same millisecond: the sequence orders them
+    assert new_request_id(now_ns - 1_000_000) < first
+
+
+def test_formatting_passes_strings_through():
+    assert format_request_id("req-1") == "req-1"
+    assert format_timestamp("2026-01-01T00:00:00Z") == "2026-01-01T00:00:00Z"
+
+
+def test_timestamps_keep_microseconds_across_cached_seconds():
+    second = 1_767_225_600_000_000_000  # 2026-01-01T00:00:00Z
+    assert format_timestamp(second + 123_456_789) == "2026-01-01T00:00:00.123456Z"
+    assert format_timestamp(second + 999_999_999) == "2026-01-01T00:00:00.999999Z"
+    assert format_timestamp(second + 1_000_000_000) == "2026-01-01T00:00:01.000000Z"
+
+
+def test_events_serialize_raw_ids_and_timestamps(make_client, transport):
+    client = make_client()
+    client.track(provider="openai", model="gpt-4o", input_tokens=1, output_tokens=1)
+    client.flush()
+
+    (event,) = sent_events(transport)
+    assert uuid.UUID(event["request_id"]).version == 7
+    assert event["timestamp"].endswith("Z") and len(event["timestamp"]) == 27
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_gets_a_new_node():
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, ids._node.to_bytes(4, "big"))
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child_node = int.from_bytes(os.read(read, 4), "big")
+    os.close(read)
+    os.close(write)
+    assert child_node != ids._node
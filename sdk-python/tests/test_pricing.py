@@ -0,0 +1,207 @@
+"""Pricing tables: model resolution, bulk costing and hot reload"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import tokentra.pricing as pricing_module
+from conftest import sent_events
+from tokentra.pricing import (
+    DEFAULT_PRICING, PricingIndex, PricingSource, calculate_cost, calculate_costs_bulk,
+    get_pricing, get_pricing_version, load_pricing, parse_pricing, set_pricing,
+)
+
+
+def index(*keys: str) -> PricingIndex:
+    """Index over one "openai" table whose input price is the key's position"""
+    return PricingIndex({"openai": {
+        key: {"input_per_1m": float(i), "output_per_1m": 0.0} for i, key in enumerate(keys)
+    }})
+
+
+def test_mini_model_is_not_priced_as_its_parent():
+    assert get_pricing("openai", "gpt-4o-mini").model == "gpt-4o-mini"
+    assert get_pricing("openai", "gpt-4o-mini-2024-07-18").model == "gpt-4o-mini"
+    assert get_pricing("openai", "gpt-4o-2024-08-06").model == "gpt-4o"
+
+
+def test_exact_match_is_case_insensitive():
+    assert index("gpt-4o", "gpt-4o-mini").resolve("OpenAI", "GPT-4o-Mini").model == "gpt-4o-mini"
+
+
+def test_boundary_prefix_beats_a_longer_substring():
+    prices = index("gpt-4", "turbo-preview")
+    assert prices.resolve("openai", "gpt-4-turbo-preview").model == "gpt-4"
+
+
+def test_prefix_only_matches_at_a_boundary():
+    prices = index("o1", "o1-mini")
+    assert prices.resolve("openai", "o1-mini-2024-09-12").model == "o1-mini"
+    assert prices.resolve("openai", "o1:latest").model == "o1"
+    assert prices.resolve("openai", "o1x").model == "o1"  # substring, not prefix
+    assert prices.resolve("openai", "o10").model == "o1"
+
+
+def test_abbreviation_picks_the_shortest_key():
+    prices = index("claude-3-5-sonnet-20241022", "claude-3-5-sonnet-20240620-v2")
+    assert prices.resolve("openai", "claude-3-5-sonnet").model == "claude-3-5-sonnet-20241022"
+
+
+def test_substring_picks_the_longest_key():
+    prices = index("gpt-4o", "gpt-4o-mini")
+    assert prices.resolve("openai", "openai/gpt-4o-mini").model == "gpt-4o-mini"
+
+
+def test_unknown_models_and_providers_use_the_default():
+    prices = index("gpt-4o")
+    assert prices.resolve("openai", "llama-3") is DEFAULT_PRICING
+    assert prices.resolve("nobody", "gpt-4o") is DEFAULT_PRICING
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def bulk_path(request, monkeypatch):
+    """Run a test with the vectorized path (when NumPy is installed) and the pure-Python one"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(pricing_module, "np", None)
+    return request.param
+
+
+COST_COLUMNS = ("input_cost", "output_cost", "cached_cost", "total_cost")
+
+
+def test_bulk_costs_match_calculate_cost_row_for_row(bulk_path):
+    models = ["gpt-4o", "gpt-4o-mini", "unknown-model", "gpt-4o"]
+    inputs, outputs, cached = [1000, 2500, 40, 0], [200, 0, 7, 99], [0, 500, 0, 10]
+
+    bulk = calculate_costs_bulk("openai", models, inputs, outputs, cached)
+    for row, model in enumerate(models):
+        single = calculate_cost("openai", model, inputs[row], outputs[row], cached[row])
+        for column in COST_COLUMNS:
+            assert bulk[column][row] == pytest.approx(single[column])
+    assert bulk["pricing_version"] == single["pricing_version"]
+
+
+def test_bulk_costs_with_one_model_and_no_cached_column(bulk_path):
+    bulk = calculate_costs_bulk("anthropic", "claude-3-5-sonnet-20241022", [1_000_000, 0], [0, 1_000_000])
+    assert list(bulk["input_cost"]) == pytest.approx([3.0, 0.0])
+    assert list(bulk["total_cost"]) == pytest.approx([3.0, 15.0])
+    assert list(bulk["cached_cost"]) == [0.0, 0.0]
+
+
+def test_bulk_costs_accept_arrays():
+    np = pytest.importorskip("numpy")
+    models = np.array(["gpt-4o", "gpt-4o-mini"])
+    bulk = calculate_costs_bulk("openai", models, np.array([1_000_000, 1_000_000]), np.zeros(2))
+    assert isinstance(bulk["total_cost"], np.ndarray)
+    assert bulk["total_cost"].tolist() == pytest.approx([2.5, 0.15])
+
+
+@pytest.fixture
+def restore_pricing():
+    """Put the built-in pricing back after a test swaps it"""
+    active = pricing_module._index
+    yield
+    set_pricing(active)
+
+
+def pricing_document(version: str, gpt4o_input: float) -> dict:
+    return {
+        "version": version,
+        "providers": {"openai": {"gpt-4o": {"input_per_1m": gpt4o_input, "output_per_1m": 0.0}}},
+        "default": {"input_per_1m": 9.0, "output_per_1m": 9.0},
+    }
+
+
+def write_pricing(path, version: str, gpt4o_input: float, mtime: int):
+    path.write_text(json.dumps(pricing_document(version, gpt4o_input)))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_pricing_document_requires_version_and_providers():
+    with pytest.raises(ValueError):
+        parse_pricing({"providers": {}})
+    index = parse_pricing(pricing_document("2026-01-15", 2.0))
+    assert index.version == "2026-01-15"
+    assert index.resolve("openai", "llama-3").input_per_1m == 9.0
+
+
+def test_set_pricing_swaps_the_active_tables(restore_pricing, tmp_path):
+    path = tmp_path / "pricing.json"
+    write_pricing(path, "2026-01-15", 2.0, mtime=1)
+    set_pricing(load_pricing(str(path)))
+
+    assert get_pricing_version() == "2026-01-15"
+    cost = calculate_cost("openai", "gpt-4o", 1_000_000, 0)
+    assert (cost["input_cost"], cost["pricing_version"]) == (2.0, "2026-01-15")
+
+
+def test_msgpack_pricing_file(restore_pricing, tmp_path):
+    msgpack = pytest.importorskip("msgpack")
+    path = tmp_path / "pricing.msgpack"
+    path.write_bytes(msgpack.packb(pricing_document("2026-02-01", 3.0)))
+    assert load_pricing(str(path)).resolve("openai", "gpt-4o").input_per_1m == 3.0
+
+
+def test_file_source_reloads_on_change_and_keeps_pricing_on_a_bad_file(restore_pricing, tmp_path):
+    path = tmp_path / "pricing.json"
+    write_pricing(path, "v1", 2.0, mtime=1)
+    source = PricingSource(path=str(path), interval=0)
+
+    assert source.poll() and get_pricing_version() == "v1"
+    assert not source.poll()  # unchanged mtime
+
+    path.write_text("{not json")
+    os.utime(path, ns=(2, 2))
+    assert not source.poll()
+    assert get_pricing_version() == "v1"
+
+    write_pricing(path, "v2", 4.0, mtime=3)
+    assert source.poll()
+    assert get_pricing("openai", "gpt-4o").input_per_1m == 4.0
+
+
+class FakeSession:
+    """Answers pricing GETs with the queued (status, document, headers) responses"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers, timeout):
+        self.requests.append(headers)
+        status, document, extra = self.responses.pop(0)
+        return SimpleNamespace(
+            status_code=status, headers=extra, json=lambda: document, raise_for_status=lambda: None,
+        )
+
+    def close(self):
+        pass
+
+
+def test_url_source_sends_the_etag_and_skips_unchanged_tables(restore_pricing):
+    source = PricingSource(url="https://pricing.invalid", api_key="tt_test_123", interval=0)
+    source._session = FakeSession(
+        (200, pricing_document("v7", 5.0), {"ETag": '"v7"'}),
+        (304, None, {}),
+    )
+
+    assert source.poll() and get_pricing_version() == "v7"
+    assert not source.poll()
+    first, second = source._session.requests
+    assert first["Authorization"] == "Bearer tt_test_123" and "If-None-Match" not in first
+    assert second["If-None-Match"] == '"v7"'
+
+
+def test_client_prices_events_with_the_pricing_file(restore_pricing, make_client, transport, tmp_path):
+    path = tmp_path / "pricing.json"
+    write_pricing(path, "2026-03-01", 2.0, mtime=1)
+    client = make_client(pricing_file=str(path))
+    client.track(provider="openai", model="gpt-4o", input_tokens=1_000_000, output_tokens=0)
+    client.flush()
+
+    (event,) = sent_events(transport)
+    assert (event["input_cost"], event["pricing_version"]) == (2.0, "2026-03-01")
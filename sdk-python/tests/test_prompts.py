@@ -0,0 +1,77 @@
+"""Prompt fingerprints and repeated-prompt (cache opportunity) detection"""
+
+from types import SimpleNamespace
+
+from conftest import OpenAI, sent_events
+from tokentra.prompts import PromptHasher, PromptTracker, RepeatSketch
+
+
+def chat(*contents, role="user", **kwargs):
+    return {"messages": [{"role": role, "content": content} for content in contents], **kwargs}
+
+
+def test_hash_is_stable_and_covers_model_role_and_content():
+    hasher = PromptHasher("tt_test_123")
+    base = hasher.hash("gpt-4o", chat("hi"))
+
+    assert len(base) == 16 and base == hasher.hash("gpt-4o", chat("hi"))
+    assert base != hasher.hash("gpt-4o-mini", chat("hi"))
+    assert base != hasher.hash("gpt-4o", chat("hi", role="system"))
+    assert base != hasher.hash("gpt-4o", chat("hi!"))
+    assert base != hasher.hash("gpt-4o", chat("hi", system="be brief"))
+
+
+def test_message_objects_hash_like_dicts():
+    hasher = PromptHasher("tt_test_123")
+    message = SimpleNamespace(role="user", content="hi")
+    assert hasher.hash("gpt-4o", {"messages": [message]}) == hasher.hash("gpt-4o", chat("hi"))
+
+
+def test_part_and_message_boundaries_are_kept():
+    hasher = PromptHasher("tt_test_123")
+    assert hasher.hash("m", chat(["ab"])) != hasher.hash("m", chat(["a", "b"]))
+    assert hasher.hash("m", chat("ab")) != hasher.hash("m", chat("a", "b"))
+    assert hasher.hash("m", chat([{"type": "text", "text": "hi"}])) == hasher.hash("m", chat(["hi"]))
+
+
+def test_hash_is_keyed_per_api_key():
+    prompt = chat("hi")
+    assert PromptHasher("tt_test_a").hash("gpt-4o", prompt) != PromptHasher("tt_test_b").hash("gpt-4o", prompt)
+
+
+def test_sketch_counts_repeats_and_forgets_least_recent():
+    sketch = RepeatSketch(capacity=2)
+    assert [sketch.observe(h) for h in ("a", "a", "b", "a", "c")] == [0, 1, 0, 2, 0]
+    assert sketch.observe("b") == 0  # evicted by "c"; "a" was used more recently
+    assert sketch.observe("a") == 0  # evicted by "b" coming back
+
+
+def test_tracker_omits_the_hash_when_asked():
+    tracker = PromptTracker("tt_test_123", include_hash=False)
+    assert tracker.fields("gpt-4o", chat("hi")) == {}
+    assert tracker.fields("gpt-4o", chat("hi")) == {"cache_opportunity": True}
+
+
+def test_repeated_prompt_is_flagged_on_the_event(make_client, transport):
+    client = make_client(privacy_mode="hashed")
+    openai = client.wrap(OpenAI())
+    for _ in range(2):
+        openai.chat.completions.create(model="gpt-4o", **chat("hi"))
+    client.flush()
+
+    first, second = sent_events(transport)
+    assert "cache_opportunity" not in first and second["cache_opportunity"] is True
+    assert first["prompt_hash"] == second["prompt_hash"]
+    assert client.get_stats()["prompt_repeats"] == 1
+
+
+def test_metrics_only_events_carry_no_prompt_hash(make_client, transport):
+    client = make_client()
+    openai = client.wrap(OpenAI())
+    for _ in range(2):
+        openai.chat.completions.create(model="gpt-4o", **chat("hi"))
+    client.flush()
+
+    first, second = sent_events(transport)
+    assert "prompt_hash" not in first and "prompt_hash" not in second
+    assert second["cache_opportunity"] is True
@@ -0,0 +1,39 @@
+"""Provider usage extraction and pricing for wrapped methods"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from tokentra.pricing import calculate_cost
+from tokentra.providers import GOOGLE
+
+EMBED_CONTENT = next(m for m in GOOGLE.methods if m.path == "models.embed_content")
+
+
+@pytest.mark.parametrize("provider, model, per_1m", [
+    ("openai", "text-embedding-3-small", 0.02),
+    ("openai", "text-embedding-3-large", 0.13),
+    ("google", "gemini-embedding-001", 0.15),
+    ("mistral", "mistral-embed", 0.1),
+    ("cohere", "embed-english-v3.0", 0.1),
+])
+def test_embedding_models_have_their_own_prices(provider, model, per_1m):
+    costs = calculate_cost(provider, model, 1_000_000, 0)
+    assert costs["input_cost"] == pytest.approx(per_1m)
+
+
+def test_google_embed_uses_reported_token_counts():
+    response = SimpleNamespace(embeddings=[
+        SimpleNamespace(statistics=SimpleNamespace(token_count=7)),
+        SimpleNamespace(statistics=SimpleNamespace(token_count=5)),
+    ])
+    assert EMBED_CONTENT.tokens(response, {"contents": ["ignored"]}) == {"input": 12, "output": 0}
+
+
+def test_google_embed_counts_request_when_response_has_no_usage():
+    response = SimpleNamespace(embeddings=[SimpleNamespace(values=[0.1], statistics=None)])
+    kwargs = {
+        "model": "gemini-embedding-001",
+        "contents": ["a" * 40, {"parts": [{"text": "b" * 20}]}],
+    }
+    assert EMBED_CONTENT.tokens(response, kwargs) == {"input": 15, "output": 0}
@@ -0,0 +1,92 @@
+"""Retrying failed telemetry batches: backoff, Retry-After and the retry budget"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from conftest import ScriptedTransport, sent_events, track
+from tokentra.errors import NetworkError, error_from_status, parse_retry_after
+from tokentra.retry import RetryPolicy, RetryScheduler
+
+
+def test_retry_after_seconds_and_http_date():
+    assert parse_retry_after("7") == 7
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    assert 110 <= parse_retry_after(later) <= 120
+    assert parse_retry_after("soon", default=60) == 60
+
+
+def test_delay_honors_retry_after():
+    policy = RetryPolicy(base_delay=0.5)
+    error = error_from_status(429, {"Retry-After": "3"})
+
+    assert error.retryable
+    assert all(3 <= policy.delay(1, error) <= 3.5 for _ in range(100))
+
+
+def test_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    for attempt, ceiling in ((1, 0.5), (2, 1.0), (3, 2.0), (10, 2.0)):
+        assert all(0 <= policy.delay(attempt) <= ceiling for _ in range(100))
+
+
+def test_scheduler_gives_up():
+    scheduler = RetryScheduler(RetryPolicy(max_retries=2, budget=10.0))
+    transient = NetworkError("Ingest returned HTTP 503")
+
+    assert scheduler.schedule(["e"], error_from_status(400)) is None  # not retryable
+    assert scheduler.schedule(["e"], error_from_status(429, {"Retry-After": "60"})) is None  # past budget
+
+    first = scheduler.schedule(["e"], transient)
+    second = scheduler.schedule(["e"], transient, first)
+    assert (first.attempt, second.attempt) == (1, 2)
+    assert scheduler.schedule(["e"], transient, second) is None  # max_retries
+
+
+def test_rate_limited_batch_is_resent_after_retry_after(make_client):
+    transport = ScriptedTransport((429, {"Retry-After": "0"}))
+    client = make_client(transport=transport, flush_interval=0.05, retry_base_delay=0.05)
+    track(client, 3)
+    client.flush()
+
+    deadline = time.monotonic() + 5
+    while len(transport.requests) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(transport.requests) == 2  # rejected, then resent
+    assert [e["input_tokens"] for e in transport.requests[1]["payload"]["events"]] == [0, 1, 2]
+    stats = client.get_stats()
+    assert stats["telemetry_retried"] == 3
+    assert stats["telemetry_failed"] == 0
+
+
+def test_rejected_batch_is_not_retried(make_client):
+    transport = ScriptedTransport((400, {}))
+    client = make_client(transport=transport, retry_base_delay=0.01)
+    track(client, 2)
+    client.flush()
+    time.sleep(0.1)
+    client.flush()
+
+    assert len(transport.requests) == 1
+    assert client.get_stats()["telemetry_failed"] == 2
+    assert sent_events(transport)[0]["input_tokens"] == 0
+
+
+def test_flush_reports_a_batch_left_waiting_on_retry(make_client):
+    transport = ScriptedTransport((503, {"Retry-After": "60"}))
+    client = make_client(transport=transport, retry_budget=600.0)
+    track(client, 3)
+
+    assert client.flush(timeout=5) is False
+    assert len(client._retries) == 1
+
+    client._retries.pop_all()
+    track(client, 1)
+    assert client.flush(timeout=5) is True
+
+
+def test_server_errors_carry_retry_after_when_given():
+    assert error_from_status(503, {"Retry-After": "5"}).retry_after == 5
+    assert error_from_status(503).retry_after is None
+    assert NetworkError("connection reset").retry_after is None
@@ -0,0 +1,94 @@
+"""Client-side rollups: exact totals per key and mergeable latency sketches"""
+
+import random
+
+import pytest
+
+from conftest import sent_events, track
+from tokentra.client import TelemetryEvent
+from tokentra.rollup import LatencySketch, RollupAggregator
+
+
+def event(feature="chat", input_tokens=10, latency_ms=100, is_error=False):
+    return TelemetryEvent(
+        request_id=1, timestamp=0, provider="openai", model="gpt-4o",
+        input_tokens=input_tokens, output_tokens=2, total_tokens=input_tokens + 2,
+        input_cost=0.01, output_cost=0.02, total_cost=0.03, latency_ms=latency_ms,
+        feature=feature, is_error=is_error,
+    )
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_sketch_quantiles_are_within_alpha():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(5, 1) for _ in range(5000)]
+    sketch = LatencySketch(alpha=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.01)
+
+
+def test_merged_sketches_match_one_sketch_of_all_values():
+    rng = random.Random(3)
+    left, right = [rng.uniform(1, 500) for _ in range(700)], [rng.uniform(0, 2000) for _ in range(300)]
+    a, b, combined = LatencySketch(), LatencySketch(), LatencySketch()
+    for value in left:
+        a.add(value)
+        combined.add(value)
+    for value in right:
+        b.add(value)
+        combined.add(value)
+
+    a.merge(b)
+
+    assert a.to_dict() == pytest.approx(combined.to_dict())
+    assert a.quantile(0.95) == combined.quantile(0.95)
+
+
+def test_events_are_totalled_per_key():
+    aggregator = RollupAggregator(window=60)
+    for _ in range(3):
+        aggregator.add(event("chat"))
+    aggregator.add(event("search", input_tokens=5, is_error=True))
+
+    rollups = {r.key[2]: r.to_dict() for r in aggregator.drain(force=True)}
+
+    assert rollups["chat"]["count"] == 3
+    assert rollups["chat"]["input_tokens"] == 30
+    assert rollups["chat"]["total_cost"] == pytest.approx(0.09)
+    assert rollups["search"]["error_count"] == 1
+    assert rollups["search"]["latency_ms"]["count"] == 1
+    assert len(aggregator) == 0
+
+
+def test_forced_drains_ship_additive_parts_of_one_window():
+    aggregator = RollupAggregator(window=3600)
+    aggregator.add(event())
+    assert aggregator.drain() == []  # window still open
+
+    (first,) = aggregator.drain(force=True)
+    aggregator.add(event())
+    aggregator.add(event())
+    (second,) = aggregator.drain(force=True)
+
+    assert first.window_start == second.window_start
+    assert first.count + second.count == 3
+
+
+def test_client_sends_rollups_and_raw_samples(make_client, transport):
+    client = make_client(rollup_window=60.0, rollup_raw_sample_rate=1.0)
+    track(client, 4)
+    client.flush()
+
+    events = sent_events(transport)
+    rollups = [e for e in events if e.get("type") == "rollup"]
+    samples = [e for e in events if e.get("type") != "rollup"]
+    assert sum(r["count"] for r in rollups) == 4
+    assert sum(r["input_tokens"] for r in rollups) == sum(range(4))
+    assert len(samples) == 4 and all(s["is_sample"] for s in samples)
@@ -0,0 +1,33 @@
+"""Routing rules applied to wrapped calls"""
+
+from conftest import OpenAI, sent_events
+
+RULE = {"name": "chat-to-mini", "to": "gpt-4o-mini", "models": "gpt-4o", "features": "chat"}
+
+
+def test_rule_matches_default_feature(make_client, transport):
+    client = make_client(routing_rules=[RULE], default_feature="chat")
+    openai = client.wrap(OpenAI())
+
+    openai.chat.completions.create(model="gpt-4o", messages=[])
+    client.flush()
+
+    assert openai.chat.completions.calls[0]["model"] == "gpt-4o-mini"
+    (event,) = sent_events(transport)
+    assert event["feature"] == "chat"
+    assert event["model"] == "gpt-4o-mini"
+    assert event["original_model"] == "gpt-4o"
+    assert event["routed_by_rule"] == "chat-to-mini"
+
+
+def test_explicit_feature_overrides_default(make_client, transport):
+    client = make_client(routing_rules=[RULE], default_feature="chat")
+    openai = client.wrap(OpenAI())
+
+    openai.chat.completions.create(model="gpt-4o", messages=[], tokentra={"feature": "search"})
+    client.flush()
+
+    assert openai.chat.completions.calls[0]["model"] == "gpt-4o"
+    (event,) = sent_events(transport)
+    assert event["feature"] == "search"
+    assert "routed_by_rule" not in event
@@ -0,0 +1,63 @@
+"""Adaptive sampling: what is always kept and how cheap calls are thinned"""
+
+import random
+
+import pytest
+
+from conftest import sent_events
+from tokentra.client import TelemetryEvent
+from tokentra.sampling import SamplingPolicy
+
+
+def event(cost: float = 0.0001, latency_ms: int = 100, is_error: bool = False) -> TelemetryEvent:
+    return TelemetryEvent(
+        request_id="req-1", timestamp="2026-01-01T00:00:00.000000Z", provider="openai",
+        model="gpt-4o-mini", input_tokens=10, output_tokens=5, total_tokens=15,
+        input_cost=cost, output_cost=0.0, total_cost=cost, latency_ms=latency_ms, is_error=is_error,
+    )
+
+
+def test_rate_falls_linearly_from_pressure_start_to_min_rate():
+    policy = SamplingPolicy(min_rate=0.1, pressure_start=0.5)
+    assert policy.rate(0.0) == policy.rate(0.5) == 1.0
+    assert policy.rate(0.75) == pytest.approx(0.5)
+    assert policy.rate(0.99) == 0.1
+    assert policy.rate(1.0) == 0.1
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        SamplingPolicy(min_rate=0.0)
+    with pytest.raises(ValueError):
+        SamplingPolicy(pressure_start=1.0)
+
+
+def test_errors_expensive_and_slow_calls_are_always_kept():
+    policy = SamplingPolicy(min_rate=0.01, cost_threshold=0.01, latency_threshold_ms=5000)
+    for kept in (event(is_error=True), event(cost=0.02), event(latency_ms=6000)):
+        assert all(policy.sample(kept, fill=1.0) for _ in range(100))
+        assert kept.sample_weight is None
+
+
+def test_cheap_calls_are_thinned_and_reweighted(monkeypatch):
+    policy = SamplingPolicy(min_rate=0.25, pressure_start=0.0)
+    assert policy.sample(event(), fill=0.0)  # no pressure: kept unweighted
+
+    draws = iter([0.1, 0.9])
+    monkeypatch.setattr(random, "random", lambda: next(draws))
+    kept, dropped = event(), event()
+    assert policy.sample(kept, fill=1.0)
+    assert not policy.sample(dropped, fill=1.0)
+    assert kept.sample_weight == 4.0
+
+
+def test_client_samples_out_cheap_calls_as_the_queue_fills(make_client, transport, monkeypatch):
+    monkeypatch.setattr(random, "random", lambda: 0.99)
+    client = make_client(adaptive_sampling=True, sample_pressure_start=0.0, max_queue_size=10)
+    for _ in range(3):  # the first sees an empty queue, the rest a 10% full one
+        client.track(provider="openai", model="gpt-4o-mini", input_tokens=10, output_tokens=5)
+    client.track(provider="openai", model="gpt-4o", input_tokens=10_000, output_tokens=0)
+    client.flush()
+
+    assert client.get_stats()["telemetry_sampled_out"] == 2
+    assert [e["model"] for e in sent_events(transport)] == ["gpt-4o-mini", "gpt-4o"]
@@ -0,0 +1,124 @@
+"""FileSink export formats and replay"""
+
+import os
+
+import pytest
+
+from conftest import sent_events
+from tokentra.errors import TokenTraError
+from tokentra.replay import Replayer
+from tokentra.sinks import FileSink, Sink, read_events, sink_files
+from tokentra.transport import MemoryTransport
+
+
+def track(client, count):
+    for i in range(count):
+        client.track(
+            provider="openai", model="gpt-4o", input_tokens=i, output_tokens=1, latency_ms=5,
+            feature="chat", metadata={"i": i},
+        )
+
+
+def exported(directory):
+    return [event for path in sink_files(str(directory)) for event in read_events(path)]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_jsonl_round_trip(make_client, tmp_path, compression):
+    client = make_client(sink=FileSink(str(tmp_path), compression=compression), batch_size=10)
+    track(client, 25)
+    client.shutdown()
+
+    events = exported(tmp_path)
+    assert [e["input_tokens"] for e in events] == list(range(25))
+    assert events[3]["metadata"] == {"i": 3}
+    assert not any(name.endswith(".partial") for name in os.listdir(tmp_path))
+
+
+def test_jsonl_rotates_by_size(make_client, tmp_path):
+    client = make_client(sink=FileSink(str(tmp_path), rotate_bytes=2000), batch_size=5)
+    track(client, 50)
+    client.shutdown()
+
+    assert len(sink_files(str(tmp_path))) > 1
+    assert len(exported(tmp_path)) == 50
+
+
+def test_parquet_round_trip(make_client, tmp_path):
+    pytest.importorskip("pyarrow")
+    client = make_client(sink=FileSink(str(tmp_path), format="parquet", compression="zstd"))
+    track(client, 12)
+    client.shutdown()
+
+    events = exported(tmp_path)
+    assert [e["input_tokens"] for e in events] == list(range(12))
+    assert events[0]["provider"] == "openai"
+    assert events[5]["metadata"] == {"i": 5}
+    assert isinstance(events[0]["request_id"], str)
+
+
+def test_parquet_keeps_rollups(make_client, tmp_path):
+    pytest.importorskip("pyarrow")
+    client = make_client(sink=FileSink(str(tmp_path), format="parquet"), rollup_window=60.0)
+    track(client, 10)
+    client.shutdown()
+
+    assert client.get_stats()["telemetry_failed"] == 0
+    (rollup,) = exported(tmp_path)
+    assert rollup["type"] == "rollup"
+    assert rollup["count"] == 10
+    assert rollup["input_tokens"] == sum(range(10))
+    assert isinstance(rollup["latency_ms"], dict)
+
+
+def test_parquet_encoding_error_is_a_sink_error(tmp_path):
+    pytest.importorskip("pyarrow")
+    sink = FileSink(str(tmp_path), format="parquet")
+
+    with pytest.raises(TokenTraError) as raised:
+        sink.write({"events": [{"provider": "openai", "input_tokens": 2 ** 70}]})
+    sink.close()
+
+    assert raised.value.code == "SINK_ERROR"
+    assert not raised.value.retryable
+
+
+def test_replay_resumes_from_checkpoint(make_client, tmp_path):
+    export = tmp_path / "export"
+    client = make_client(sink=FileSink(str(export), rotate_bytes=1500), batch_size=5)
+    track(client, 40)
+    client.shutdown()
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    class RejectThird(MemoryTransport):
+        def send(self, url, body, headers, timeout):
+            response = super().send(url, body, headers, timeout)
+            if len(self.requests) == 3:
+                self.requests.pop()
+                response.status_code = 400
+            return response
+
+    first = RejectThird()
+    with pytest.raises(TokenTraError):
+        Replayer(
+            [str(export)], client=make_client(transport=first),
+            batch_size=7, concurrency=1, checkpoint=checkpoint,
+        ).run()
+
+    second = MemoryTransport()
+    Replayer([str(export)], client=make_client(transport=second), checkpoint=checkpoint).run()
+
+    delivered = [e["input_tokens"] for e in sent_events(first) + sent_events(second)]
+    assert sorted(set(delivered)) == list(range(40))
+    assert len(sent_events(second)) < 40  # resumed, not restarted
+
+    third = MemoryTransport()
+    assert Replayer([str(export)], client=make_client(transport=third), checkpoint=checkpoint).run() == 0
+
+
+def test_sink_without_write_cannot_be_created():
+    class Incomplete(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,116 @@
+"""Disk spool: replay after restart, crash artifacts and full disks"""
+
+import os
+
+import pytest
+
+from conftest import OpenAI, sent_events, track
+from tokentra.errors import TokenTraError
+from tokentra.spool import DiskSpool
+from tokentra.transport import MemoryTransport
+
+
+def test_undelivered_events_replay_after_restart(make_client, tmp_path):
+    down = MemoryTransport(status_code=503)
+    client = make_client(transport=down, spool_dir=str(tmp_path), max_retries=0)
+    track(client, 3)
+    client.shutdown()
+    assert sent_events(down)  # attempted, rejected, kept on disk
+
+    up = MemoryTransport()
+    client = make_client(transport=up, spool_dir=str(tmp_path))
+    client.flush()
+
+    assert sorted(e["input_tokens"] for e in sent_events(up)) == [0, 1, 2]
+
+
+def test_delivered_events_are_not_replayed(make_client, transport, tmp_path):
+    client = make_client(spool_dir=str(tmp_path))
+    track(client, 3)
+    client.shutdown()
+
+    again = MemoryTransport()
+    make_client(transport=again, spool_dir=str(tmp_path)).flush()
+
+    assert len(sent_events(transport)) == 3
+    assert sent_events(again) == []
+
+
+def test_torn_and_zero_filled_records_are_skipped(make_client, transport, tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b'{"provider":"openai","input_tokens":1}')
+    spool.append(b'{"provider":"open')  # torn by a crash mid-write
+    spool.append(b'{"provider":"openai","input_tokens":2}')
+    spool.close()
+    segment = max(name for name in os.listdir(tmp_path) if name.endswith(".seg"))
+    with open(tmp_path / segment, "ab") as f:
+        f.write(b"\0" * 64)  # preallocated tail never written
+
+    client = make_client(spool_dir=str(tmp_path))
+    assert client.flush(timeout=5)
+
+    assert [e["input_tokens"] for e in sent_events(transport)] == [1, 2]
+    assert client.get_stats()["spool_records_skipped"] > 0
+    assert client._worker.is_alive()
+
+    # The cursor moved past the bad records
+    client.shutdown()
+    again = MemoryTransport()
+    make_client(transport=again, spool_dir=str(tmp_path)).flush()
+    assert sent_events(again) == []
+
+
+def test_full_disk_does_not_fail_the_wrapped_call(make_client, monkeypatch, tmp_path):
+    client = make_client(spool_dir=str(tmp_path))
+
+    def no_space(record):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(client._spool, "append", no_space)
+    openai = client.wrap(OpenAI())
+
+    response = openai.chat.completions.create(model="gpt-4o", messages=[])
+
+    assert response.usage.prompt_tokens == 100
+    stats = client.get_stats()
+    assert stats["telemetry_dropped"] == 1
+    assert stats["errors"] == 0
+
+
+def test_second_client_on_a_spool_dir_gets_its_own_subdirectory(make_client, tmp_path):
+    first, second = MemoryTransport(), MemoryTransport()
+    a = make_client(transport=first, spool_dir=str(tmp_path))
+    b = make_client(transport=second, spool_dir=str(tmp_path))
+
+    track(a, 3)
+    a.flush()
+    for i in range(100, 103):
+        b.track(provider="openai", model="gpt-4o", input_tokens=i, output_tokens=1)
+    b.flush()
+
+    assert [e["input_tokens"] for e in sent_events(first)] == [0, 1, 2]
+    assert [e["input_tokens"] for e in sent_events(second)] == [100, 101, 102]
+    assert b._spool.directory == str(tmp_path / f"pid-{os.getpid()}")
+
+    with pytest.raises(TokenTraError) as raised:
+        make_client(spool_dir=str(tmp_path))
+    assert raised.value.code == "SPOOL_LOCKED"
+
+
+def test_locked_subdirectory_is_not_adopted(tmp_path):
+    owner = DiskSpool(str(tmp_path))
+    live = DiskSpool(str(tmp_path / "pid-999999999"))  # pid not running, but the spool is open
+    live.append(b"{}")
+
+    assert owner.adopt_orphans(str(tmp_path)) == 0
+    assert live.read(10) == [b"{}"]
+    live.close()
+    assert owner.adopt_orphans(str(tmp_path)) == 1
+    owner.close()
+
+
+def test_shutdown_twice_with_a_spool(make_client, tmp_path):
+    client = make_client(spool_dir=str(tmp_path))
+    track(client, 1)
+    client.shutdown()
+    client.shutdown()
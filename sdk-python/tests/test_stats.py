@@ -0,0 +1,68 @@
+"""Sharded SDK statistics: counters, histograms and OpenMetrics output"""
+
+import threading
+
+from tokentra.stats import Stats
+
+
+def make_stats() -> Stats:
+    return Stats(["requests", "queue"], histograms={"latency_ms": (10, 100)}, gauges=["queue"])
+
+
+def run_threads(count: int, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_increments_are_not_lost():
+    stats = make_stats()
+
+    def work():
+        for _ in range(10000):
+            stats.incr("requests")
+            stats.observe("latency_ms", 5)
+
+    run_threads(8, work)
+    assert stats.counters()["requests"] == 80000
+    assert stats.histograms()["latency_ms"]["count"] == 80000
+
+
+def test_shards_of_exited_threads_are_folded_into_the_total():
+    stats = make_stats()
+    run_threads(50, lambda: stats.incr("requests"))
+    stats.incr("requests")
+
+    assert stats.counters()["requests"] == 51
+    assert len(stats._shards) == 1  # only this thread's shard is still live
+    assert stats.counters()["requests"] == 51
+
+
+def test_histogram_summary_uses_bucket_bounds():
+    stats = make_stats()
+    for value in (5, 5, 50, 500):
+        stats.observe("latency_ms", value)
+
+    summary = stats.histograms()["latency_ms"]
+    assert (summary["count"], summary["sum"], summary["mean"]) == (4, 560, 140.0)
+    assert summary["p50"] == 10.0
+    assert summary["p90"] is None  # past the last bound
+    assert make_stats().histograms()["latency_ms"]["p50"] is None
+
+
+def test_openmetrics_output():
+    stats = make_stats()
+    stats.incr("requests", 3)
+    stats.incr("queue", 2)
+    stats.incr("queue", -1)
+    stats.observe("latency_ms", 50)
+
+    lines = stats.render_openmetrics().splitlines()
+    assert "tokentra_requests_total 3" in lines
+    assert "# TYPE tokentra_queue gauge" in lines and "tokentra_queue 1" in lines
+    assert 'tokentra_latency_ms_bucket{le="10"} 0' in lines
+    assert 'tokentra_latency_ms_bucket{le="100"} 1' in lines
+    assert 'tokentra_latency_ms_bucket{le="+Inf"} 1' in lines
+    assert lines[-1] == "# EOF"
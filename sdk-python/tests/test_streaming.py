@@ -0,0 +1,129 @@
+"""Streaming proxies: usage accounting, hidden usage chunks and early exits"""
+
+import asyncio
+import gc
+from types import SimpleNamespace
+
+from conftest import OpenAI, sent_events
+from tokentra.streaming import AsyncStreamProxy, StreamProxy, StreamState
+
+
+def stream(openai, **kwargs):
+    return openai.chat.completions.create(model="gpt-4o", messages=[], stream=True, **kwargs)
+
+
+def test_injected_usage_chunk_is_counted_and_hidden(make_client, transport):
+    client = make_client()
+    openai = client.wrap(OpenAI())
+
+    chunks = list(stream(openai))
+    client.flush()
+
+    assert len(chunks) == 3  # the usage trailer the SDK asked for is not passed on
+    assert openai.chat.completions.calls[0]["stream_options"] == {"include_usage": True}
+    (event,) = sent_events(transport)
+    assert (event["input_tokens"], event["output_tokens"]) == (12, 3)
+    assert event["is_streaming"] is True
+    assert event["time_to_first_token_ms"] is not None
+
+
+def test_callers_own_usage_chunk_is_passed_on(make_client, transport):
+    client = make_client()
+    openai = client.wrap(OpenAI())
+
+    chunks = list(stream(openai, stream_options={"include_usage": True}))
+    client.flush()
+
+    assert len(chunks) == 4
+    assert sent_events(transport)[0]["input_tokens"] == 12
+
+
+def test_without_usage_output_is_counted_from_chunks(make_client, transport):
+    client = make_client(stream_usage=False)
+    openai = client.wrap(OpenAI())
+
+    list(stream(openai))
+    client.flush()
+
+    assert "stream_options" not in openai.chat.completions.calls[0]
+    (event,) = sent_events(transport)
+    assert (event["input_tokens"], event["output_tokens"]) == (0, 3)
+
+
+def test_closing_early_records_one_event(make_client, transport):
+    client = make_client()
+    openai = client.wrap(OpenAI())
+
+    with stream(openai) as chunks:
+        next(chunks)
+    client.flush()
+
+    (event,) = sent_events(transport)
+    assert event["output_tokens"] == 1
+
+
+def test_error_mid_stream_records_an_error_event():
+    def broken():
+        yield SimpleNamespace(choices=[1], usage=None)
+        raise ConnectionError("reset")
+
+    reported = []
+    proxy = StreamProxy(broken(), StreamState("openai"), lambda state, error: reported.append(error))
+
+    next(proxy)
+    try:
+        next(proxy)
+    except ConnectionError:
+        pass
+    proxy.close()
+
+    assert len(reported) == 1 and isinstance(reported[0], ConnectionError)
+
+
+def test_anthropic_usage_comes_from_start_and_delta_events():
+    state = StreamState("anthropic")
+    usage = SimpleNamespace(input_tokens=50, cache_read_input_tokens=20)
+    for event in (
+        SimpleNamespace(type="message_start", message=SimpleNamespace(usage=usage)),
+        SimpleNamespace(type="content_block_delta"),
+        SimpleNamespace(type="content_block_delta"),
+        SimpleNamespace(type="message_delta", usage=SimpleNamespace(output_tokens=9)),
+    ):
+        state.observe(event)
+
+    assert state.tokens() == {"input": 50, "output": 9, "cached": 20}
+    assert state.token_chunks == 2
+
+
+def test_abandoned_stream_is_recorded_when_collected(make_client, transport):
+    client = make_client()
+    openai = client.wrap(OpenAI())
+
+    chunks = stream(openai)
+    for _ in chunks:
+        break
+    del chunks
+    gc.collect()
+    client.flush()
+
+    (event,) = sent_events(transport)
+    assert event["output_tokens"] == 1
+    assert client.get_stats()["requests_tracked"] == 1
+
+
+def test_abandoned_async_stream_is_reported_once():
+    async def chunks():
+        for _ in range(3):
+            yield SimpleNamespace(choices=[1], usage=None)
+
+    reported = []
+
+    async def main():
+        proxy = AsyncStreamProxy(chunks(), StreamState("openai"), lambda state, error: reported.append(state))
+        async for _ in proxy:
+            break
+
+    asyncio.run(main())
+    gc.collect()
+
+    assert len(reported) == 1 and reported[0].token_chunks == 1
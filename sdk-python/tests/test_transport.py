@@ -0,0 +1,153 @@
+"""Ingest transports and body encoding negotiation"""
+
+import threading
+
+import pytest
+
+import tokentra.transport as transport_module
+from conftest import ScriptedTransport, sent_events, track
+from tokentra.transport import (
+    COLUMNAR_CONTENT_TYPE, AsyncTransport, BodyEncoder, Transport, TransportResponse, decode_body,
+)
+
+
+@pytest.mark.parametrize("base", [Transport, AsyncTransport])
+def test_transport_without_send_cannot_be_created(base):
+    class Incomplete(base):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+BIG = {"events": [{"provider": "openai", "model": "gpt-4o", "input_tokens": i} for i in range(100)]}
+
+
+def response(status=200, **headers):
+    return TransportResponse(status, headers)
+
+
+def test_small_bodies_are_not_compressed():
+    body, headers = BodyEncoder(wire_format="json").encode({"events": []})
+    assert "Content-Encoding" not in headers
+    assert decode_body(body, headers) == {"events": []}
+
+
+def test_auto_starts_with_gzip():
+    body, headers = BodyEncoder(wire_format="json").encode(BIG)
+    assert headers["Content-Encoding"] == "gzip"
+    assert decode_body(body, headers) == BIG
+
+
+def test_auto_switches_to_zstd_when_offered():
+    pytest.importorskip("zstandard")
+    encoder = BodyEncoder(wire_format="json")
+    assert not encoder.negotiate(response(**{"Accept-Encoding": "gzip, zstd"}), {})
+
+    body, headers = encoder.encode(BIG)
+    assert headers["Content-Encoding"] == "zstd"
+    assert decode_body(body, headers) == BIG
+
+
+def test_auto_stays_on_gzip_without_zstandard(monkeypatch):
+    monkeypatch.setattr(transport_module, "_zstd", None)
+    encoder = BodyEncoder(wire_format="json")
+    encoder.negotiate(response(**{"Accept-Encoding": "gzip, zstd"}), {})
+
+    assert encoder.encode(BIG)[1]["Content-Encoding"] == "gzip"
+
+
+def test_415_disables_compression():
+    encoder = BodyEncoder(wire_format="json")
+    _, sent = encoder.encode(BIG)
+
+    assert encoder.negotiate(response(415), sent)
+    encoder.negotiate(response(**{"Accept-Encoding": "zstd"}), {})
+    assert "Content-Encoding" not in encoder.encode(BIG)[1]
+
+
+def test_client_resends_a_batch_rejected_for_its_encoding(make_client):
+    transport = ScriptedTransport((415, {}))
+    client = make_client(transport=transport, wire_format="json", batch_size=50)
+    track(client, 50)
+    client.flush()
+
+    first, second = transport.requests
+    assert first["headers"]["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in second["headers"]
+    assert [e["input_tokens"] for e in second["payload"]["events"]] == list(range(50))
+    assert client.get_stats()["telemetry_failed"] == 0
+
+
+def test_columnar_is_used_once_offered():
+    pytest.importorskip("msgpack")
+    encoder = BodyEncoder()
+    assert "Content-Type" not in encoder.encode(BIG)[1]
+
+    encoder.negotiate(response(**{"Accept-Post": COLUMNAR_CONTENT_TYPE}), {})
+    body, headers = encoder.encode(BIG)
+    assert headers["Content-Type"] == COLUMNAR_CONTENT_TYPE
+    assert decode_body(body, headers) == BIG
+
+
+def test_415_on_columnar_falls_back_to_json_for_good():
+    pytest.importorskip("msgpack")
+    encoder = BodyEncoder(wire_format="columnar")
+    _, sent = encoder.encode(BIG)
+
+    assert encoder.negotiate(response(415), sent)
+    encoder.negotiate(response(**{"Accept-Post": COLUMNAR_CONTENT_TYPE}), {})
+    body, headers = encoder.encode(BIG)
+    assert "Content-Type" not in headers
+    assert decode_body(body, headers) == BIG
+
+
+def test_client_negotiates_columnar_and_resends_as_json_on_415(make_client):
+    pytest.importorskip("msgpack")
+    # The first JSON batch advertises columnar; the first columnar batch is refused
+    transport = ScriptedTransport((200, {}), (415, {}))
+    client = make_client(transport=transport, batch_size=5)
+    for i in range(10):
+        client.track(provider="openai", model="gpt-4o", input_tokens=i, output_tokens=1)
+        if i == 4:
+            client.flush()
+    client.flush()
+
+    content_types = [r["headers"].get("Content-Type") for r in transport.requests]
+    assert content_types == ["application/json", COLUMNAR_CONTENT_TYPE, "application/json"]
+    assert [e["input_tokens"] for e in sent_events(transport)][-5:] == list(range(5, 10))
+    assert client.get_stats()["telemetry_failed"] == 0
+
+
+def test_each_thread_gets_its_own_zstd_compressor():
+    pytest.importorskip("zstandard")
+    encoder = BodyEncoder(compression="zstd", wire_format="json")
+    compressors = []
+
+    def encode():
+        body, headers = encoder.encode(BIG)
+        assert decode_body(body, headers) == BIG
+        compressors.append(encoder._zstd_compressor())
+
+    threads = [threading.Thread(target=encode) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(c) for c in compressors}) == 4
+
+
+def test_concurrent_negotiation_settles_on_one_state():
+    encoder = BodyEncoder(wire_format="json")
+    _, sent = encoder.encode(BIG)
+
+    def reject():
+        encoder.negotiate(response(415), sent)
+
+    threads = [threading.Thread(target=reject) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (encoder.encoding, encoder.auto) == ("none", False)
+    assert "Content-Encoding" not in encoder.encode(BIG)[1]
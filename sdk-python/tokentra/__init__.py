@@ -20,6 +20,16 @@ Usage:
 __version__ = "2.0.0"
 
 from .client import TokenTra
-from .errors import TokenTraError
+from .async_client import AsyncTokenTra
+from .errors import BudgetExceededError, TokenTraError
+from .estimation import estimate, estimate_batch
 
-__all__ = ["TokenTra", "TokenTraError", "__version__"]
+__all__ = [
+    "TokenTra",
+    "AsyncTokenTra",
+    "TokenTraError",
+    "BudgetExceededError",
+    "estimate",
+    "estimate_batch",
+    "__version__",
+]
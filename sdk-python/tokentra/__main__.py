@@ -0,0 +1,118 @@
+"""
+TokenTra command line
+    python -m tokentra aggregator --socket /run/tokentra.sock
+    python -m tokentra replay /var/lib/tokentra/export
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+from typing import List, Optional
+
+
+def _run_aggregator(args: argparse.Namespace) -> int:
+    from .aggregator import Aggregator
+
+    options = {
+        "api_url": args.api_url,
+        "batch_size": args.batch_size,
+        "flush_interval": args.flush_interval,
+        "max_queue_size": args.max_queue_size,
+        "spool_dir": args.spool_dir,
+        "log_level": args.log_level,
+    }
+    aggregator = Aggregator(
+        args.socket,
+        api_key=args.api_key,
+        **{k: v for k, v in options.items() if v is not None},
+    )
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    aggregator.start()
+    stop.wait()
+    aggregator.shutdown()
+    return 0
+
+
+def _run_replay(args: argparse.Namespace) -> int:
+    import logging
+
+    from .replay import Replayer
+
+    logging.basicConfig(level=getattr(logging, args.log_level))
+    checkpoint = args.checkpoint
+    if checkpoint is None:
+        first = args.paths[0]
+        directory = first if os.path.isdir(first) else os.path.dirname(first) or "."
+        checkpoint = os.path.join(directory, ".tokentra-replay.json")
+
+    options = {
+        "api_url": args.api_url,
+        "compression": args.compression,
+        "wire_format": args.wire_format,
+        "max_retries": args.max_retries,
+        "log_level": args.log_level,
+    }
+    replayer = Replayer(
+        args.paths,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        checkpoint=checkpoint,
+        api_key=args.api_key,
+        **{k: v for k, v in options.items() if v is not None},
+    )
+    sent = replayer.run()
+    print(f"Replayed {sent} events")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tokentra")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    aggregator = commands.add_parser(
+        "aggregator", help="batch and upload telemetry for every SDK process on this host",
+    )
+    aggregator.add_argument(
+        "--socket",
+        default=os.environ.get("TOKENTRA_AGGREGATOR_SOCKET"),
+        required="TOKENTRA_AGGREGATOR_SOCKET" not in os.environ,
+        help="Unix socket path workers connect to (env: TOKENTRA_AGGREGATOR_SOCKET)",
+    )
+    aggregator.add_argument("--api-key", help="defaults to TOKENTRA_API_KEY")
+    aggregator.add_argument("--api-url")
+    aggregator.add_argument("--batch-size", type=int, default=100)
+    aggregator.add_argument("--flush-interval", type=float)
+    aggregator.add_argument("--max-queue-size", type=int, default=100000)
+    aggregator.add_argument("--spool-dir")
+    aggregator.add_argument("--log-level", default="INFO")
+    aggregator.set_defaults(run=_run_aggregator)
+
+    replay = commands.add_parser(
+        "replay", help="upload telemetry files written by FileSink, resuming from a checkpoint",
+    )
+    replay.add_argument("paths", nargs="+", help="export files or FileSink directories")
+    replay.add_argument("--api-key", help="defaults to TOKENTRA_API_KEY")
+    replay.add_argument("--api-url")
+    replay.add_argument("--batch-size", type=int, default=5000)
+    replay.add_argument("--concurrency", type=int, default=4)
+    replay.add_argument(
+        "--checkpoint", help="progress file (default: .tokentra-replay.json next to the input)",
+    )
+    replay.add_argument("--compression")
+    replay.add_argument("--wire-format")
+    replay.add_argument("--max-retries", type=int, default=10)
+    replay.add_argument("--log-level", default="INFO")
+    replay.set_defaults(run=_run_replay)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
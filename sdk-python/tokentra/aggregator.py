@@ -0,0 +1,160 @@
+"""
+Local telemetry aggregator
+One process per host that batches and uploads events from many SDK processes
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+from dataclasses import fields
+from typing import Any, Dict, List, Optional
+
+from .client import TelemetryEvent, TokenTra
+from .transport import AGGREGATOR_FRAME, AGGREGATOR_STATUS, decode_body, recv_exact
+
+logger = logging.getLogger("tokentra")
+
+_EVENT_FIELDS = frozenset(f.name for f in fields(TelemetryEvent))
+
+
+class Aggregator:
+    """
+    Unix-socket sidecar that collects telemetry from worker processes
+
+    Workers created with `aggregator_socket=...` send their batches here
+    instead of to the ingest API. Events from every worker are re-batched
+    and uploaded through one TokenTra client, so the host keeps a single
+    connection pool, retry queue and (optionally) disk spool.
+
+    Example:
+        aggregator = Aggregator("/run/tokentra.sock", api_key="tt_live_xxx")
+        aggregator.start()
+        ...
+        aggregator.shutdown()
+    """
+
+    def __init__(self, socket_path: str, client: Optional[TokenTra] = None, **kwargs):
+        self.socket_path = socket_path
+        self.client = client or TokenTra(**kwargs)
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> threading.Thread:
+        """Listen on the socket and serve connections from a background thread"""
+        self._remove_stale_socket()
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, _FrameHandler)
+        self._server.daemon_threads = True
+        self._server.aggregator = self
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"TokenTra aggregator listening on {self.socket_path}")
+        return self._thread
+
+    def shutdown(self):
+        """Stop accepting batches, then flush and shut down the upload client"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+        self.client.shutdown()
+
+    def accept(self, events: List[Dict[str, Any]], dropped: int = 0) -> int:
+        """
+        Queue one worker batch; returns the status sent back to the worker
+
+        `dropped` is the worker's own queue-full drop count, reported
+        upstream with the aggregator's next batch.
+        """
+        client = self.client
+        if client._spool is None and len(client._buffer) + len(events) > client.config.max_queue_size:
+            return 503
+
+        try:
+            batch = [
+                _Forwarded(event) if event.get("type") == "rollup"
+                else TelemetryEvent(**{k: v for k, v in event.items() if k in _EVENT_FIELDS})
+                for event in events
+            ]
+        except TypeError as e:
+            logger.warning(f"Rejected malformed telemetry batch: {e}")
+            return 400
+
+        for event in batch:
+            if isinstance(event, _Forwarded):
+                client._enqueue(event)
+            else:
+                client._queue_telemetry(event)
+        client._drops.carry(dropped)
+        return 200
+
+    def _remove_stale_socket(self):
+        """Unlink a socket left by a previous run, refusing if one is still serving"""
+        try:
+            mode = os.stat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{self.socket_path} exists and is not a socket")
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)
+        else:
+            raise OSError(f"Another aggregator is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+
+class _Forwarded:
+    """A worker's rollup, uploaded as-is"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
+
+
+class _FrameHandler(socketserver.BaseRequestHandler):
+    """One worker connection: framed batches in, 2-byte statuses out"""
+
+    def handle(self):
+        aggregator: Aggregator = self.server.aggregator
+
+        while True:
+            try:
+                meta_len, body_len = AGGREGATOR_FRAME.unpack(
+                    recv_exact(self.request, AGGREGATOR_FRAME.size)
+                )
+                meta = json.loads(recv_exact(self.request, meta_len)) if meta_len else {}
+                body = recv_exact(self.request, body_len)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                payload = decode_body(body, meta)
+                status = aggregator.accept(payload["events"], payload.get("dropped_events", 0))
+            except Exception as e:
+                logger.warning(f"Rejected unreadable telemetry batch: {e}")
+                status = 400
+
+            try:
+                self.request.sendall(AGGREGATOR_STATUS.pack(status))
+            except OSError:
+                return
@@ -0,0 +1,341 @@
+"""
+TokenTra Async SDK Client
+Asyncio-native client for AsyncOpenAI / AsyncAnthropic
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .client import TokenTra, TelemetryEvent, _live_clients
+from .errors import TokenTraError, error_from_status
+from .ids import new_request_id
+from .providers import Method
+from .retry import PendingBatch
+from .streaming import AsyncStreamProxy, StreamState
+from .transport import AiohttpTransport, AsyncTransport
+
+logger = logging.getLogger("tokentra")
+
+
+class AsyncTokenTra(TokenTra):
+    """
+    TokenTra SDK for asyncio applications
+
+    Wraps async provider clients (AsyncOpenAI, AsyncAnthropic, ...) and ships telemetry from an
+    asyncio task over a pooled aiohttp session (or any AsyncTransport). No
+    OS threads are started; the worker task is created on first use inside
+    the running event loop.
+
+    Example:
+        tokentra = AsyncTokenTra(api_key="tt_live_xxx")
+        openai = tokentra.wrap(AsyncOpenAI())
+
+        response = await openai.chat.completions.create(...)
+        await tokentra.shutdown()
+    """
+
+    _wraps_async = True
+
+    def _start_worker(self):
+        """Prepare the asyncio worker (started lazily on first event)"""
+        if self._spool is not None:
+            raise TokenTraError(
+                "UNSUPPORTED_OPTION", "spool_dir is not supported by AsyncTokenTra"
+            )
+        if self.config.aggregator_socket and self.config.transport is None:
+            raise TokenTraError(
+                "UNSUPPORTED_OPTION", "aggregator_socket is not supported by AsyncTokenTra"
+            )
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_task: Optional["asyncio.Task[None]"] = None
+        self._closed = False
+
+    def _wrap_method(self, provider: str, method: Method, original_fn):
+        """Async replacement for one client method that tracks each call"""
+        sdk = self
+
+        async def wrapped(*args, tokentra: Optional[Dict] = None, **kwargs):
+            return await sdk._track_request(
+                provider, method, original_fn, args, kwargs, sdk._resolve_attribution(tokentra)
+            )
+
+        return wrapped
+
+    async def _track_request(
+        self, provider: str, method: Method, original_fn, args, kwargs, attribution: Dict
+    ):
+        """Track an async provider request"""
+        if method.stream and kwargs.get("stream"):
+            return await self._track_async_stream(
+                provider, method, original_fn, args, kwargs, attribution
+            )
+
+        request_id = new_request_id()
+        model, extra = self._prepare_request(provider, method, kwargs, attribution)
+        cache_key, cached = self._cache_lookup(
+            provider, method, request_id, model, kwargs, attribution, extra
+        )
+        if cached is not None:
+            return cached
+        model = await self._await_admission(model, kwargs, attribution, extra)
+        start_time = time.time()
+
+        try:
+            response = await original_fn(*args, **kwargs)
+        except Exception as e:
+            end_time = time.time()
+            self._stats.incr("errors")
+
+            event = self._build_error_event(
+                provider, request_id, model, start_time, end_time, e, **extra
+            )
+            self._queue_telemetry(event)
+
+            raise
+
+        end_time = time.time()
+
+        event = self._build_event(
+            provider, request_id, model, method.tokens(response, kwargs),
+            start_time, end_time, attribution, **extra,
+        )
+
+        self._queue_telemetry(event)
+        self._stats.incr("requests_tracked")
+        if cache_key is not None:
+            self._cache_store(cache_key, response)
+
+        return response
+
+    async def _await_admission(self, model: str, kwargs: Dict, attribution: Dict, extra: Dict) -> str:
+        """_admit_request, in the same place as the sync client, with budget delays awaited"""
+        if self._budgets is not None:
+            await self._await_budget(attribution)
+        return self._admit_request(model, kwargs, attribution, extra)
+
+    async def _await_budget(self, attribution: Dict):
+        """Sleep out a "delay" budget on the event loop before the synchronous check"""
+        exhausted = self._budgets.check(self._budget_scope(attribution))
+        if exhausted is not None:
+            budget, wait = exhausted
+            if budget.action == "delay" and wait <= budget.max_delay:
+                await asyncio.sleep(wait)
+
+    def _wait_for_budget(self, seconds: float):
+        # Already waited in _await_budget; never block the event loop
+        pass
+
+    async def _track_async_stream(
+        self, provider: str, method: Method, original_fn, args, kwargs, attribution: Dict
+    ):
+        """Track an async streaming request; the event is queued when the stream ends"""
+        request_id = new_request_id()
+        model, extra = self._prepare_request(provider, method, kwargs, attribution)
+        model = await self._await_admission(model, kwargs, attribution, extra)
+        injected = self._prepare_stream(method, kwargs)
+        start_time = time.time()
+        on_done = self._stream_done_callback(
+            provider, request_id, model, start_time, attribution, **extra
+        )
+
+        try:
+            stream = await original_fn(*args, **kwargs)
+        except Exception as e:
+            on_done(StreamState(method.stream), e)
+            raise
+
+        return AsyncStreamProxy(stream, StreamState(method.stream), on_done, hide_usage_chunks=injected)
+
+    def _enqueue(self, event: Any):
+        """Add an event or rollup to the in-loop telemetry buffer"""
+        if len(self._buffer) >= self.config.max_queue_size and not self._make_room(event):
+            return
+
+        self._buffer.append(event)
+        self._stats.incr("telemetry_buffered")
+
+        if self._ensure_worker() and len(self._buffer) >= self.config.batch_size:
+            self._wakeup.set()
+
+    def _wait_for_room(self) -> bool:
+        """Never block the event loop: "block" drops like "drop_newest" """
+        return False
+
+    def _ensure_worker(self) -> bool:
+        """Start the worker task if an event loop is running"""
+        if self._worker_task is not None and not self._worker_task.done():
+            return True
+        if self._closed:
+            return False
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called outside a loop (e.g. manual track()); picked up on next flush
+            return False
+
+        self._wakeup = asyncio.Event()
+        self._worker_task = loop.create_task(self._telemetry_worker())
+        return True
+
+    async def _telemetry_worker(self):
+        """Background task for sending telemetry"""
+        while not self._closed:
+            timeout = self.config.flush_interval
+            for due in (self._retries.next_due(), self._next_rollup_close()):
+                if due is not None:
+                    timeout = max(0.0, min(timeout, due - time.monotonic()))
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+            try:
+                self._collect_rollups(force=False)
+                await self._drain()
+
+                for pending in self._retries.pop_due():
+                    await self._send_batch(pending.events, pending)
+
+                # Remote refreshes use blocking requests; keep them off the loop
+                loop = asyncio.get_running_loop()
+                if self._pricing_source is not None and self._pricing_source.due():
+                    await loop.run_in_executor(None, self._pricing_source.poll)
+                if self._budget_sync is not None and self._budget_sync.next_due() <= time.monotonic():
+                    await loop.run_in_executor(None, self._budget_sync.poll)
+            except Exception as e:
+                # One bad batch or record must not end delivery for the process
+                logger.error(f"Telemetry worker iteration failed: {e}", exc_info=True)
+
+    async def _drain(self):
+        """Send everything currently buffered in batch_size chunks"""
+        if self._buffer:
+            self._stats.observe("queue_depth", len(self._buffer))
+
+        while True:
+            if self._spill is not None and not self._closed:
+                self._refill_from_spill()
+            if not self._buffer:
+                break
+            await self._send_batch(self._take_batch())
+
+    def _create_transport(self) -> AsyncTransport:
+        """Use the configured transport or a pooled aiohttp session"""
+        if self.config.transport is not None:
+            return self.config.transport
+
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise TokenTraError(
+                "MISSING_DEPENDENCY",
+                "AsyncTokenTra requires aiohttp. Install with: pip install tokentra[async]",
+            )
+
+        return AiohttpTransport(pool_size=self.config.pool_size)
+
+    async def _send_batch(
+        self,
+        events: List[TelemetryEvent],
+        pending: Optional[PendingBatch] = None,
+        final: bool = False,
+    ):
+        """Send telemetry batch to backend, scheduling a retry on transient failure"""
+        try:
+            await self._deliver(self._build_payload(events))
+        except Exception as e:
+            self._on_batch_failed(events, e, pending, final)
+        else:
+            self._on_batch_sent(events)
+
+    async def _deliver(self, payload: Dict[str, Any]):
+        """POST a payload to the ingest endpoint (or sink), raising TokenTraError on failure"""
+        started = time.perf_counter()
+
+        # Events dropped since the last delivered batch ride along with this one
+        dropped = self._drops.take()
+        if dropped:
+            payload = {**payload, "dropped_events": payload.get("dropped_events", 0) + dropped}
+
+        try:
+            if self._sink is not None:
+                # File sinks block on disk I/O
+                await asyncio.get_running_loop().run_in_executor(None, self._sink.write, payload)
+                return
+
+            # Resent only if the endpoint rejected the body format or encoding
+            for _ in range(3):
+                body, encoding_headers = self._encoder.encode(payload)
+                response = await self._transport.send(
+                    self._ingest_url(),
+                    body,
+                    {**self._ingest_headers(), **encoding_headers},
+                    self.config.timeout / 1000,
+                )
+                if not self._encoder.negotiate(response, encoding_headers):
+                    break
+
+            if response.status_code >= 400:
+                raise error_from_status(response.status_code, response.headers)
+        except BaseException:
+            self._drops.carry(dropped)
+            raise
+        finally:
+            self._stats.observe("batch_size", len(payload["events"]))
+            self._stats.observe("flush_duration_ms", (time.perf_counter() - started) * 1000)
+
+    async def flush(self):
+        """Flush pending telemetry immediately"""
+        self._collect_rollups(force=True)
+        await self._drain()
+
+    async def shutdown(self):
+        """Shutdown SDK gracefully"""
+        logger.info("Shutting down TokenTra SDK...")
+        _live_clients.discard(self)
+        self._closed = True
+
+        if self._worker_task is not None:
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._worker_task, timeout=5)
+            except asyncio.TimeoutError:
+                self._worker_task.cancel()
+
+        self._collect_rollups(force=True)
+        await self._drain()
+
+        # Last chance for batches still waiting on backoff
+        for pending in self._retries.pop_all():
+            await self._send_batch(pending.events, pending, final=True)
+
+        if self._pricing_source is not None:
+            self._pricing_source.close()
+        if self._budget_sync is not None:
+            self._budget_sync.close()
+        if self._cache is not None:
+            self._cache.close()
+        if self._sink is not None:
+            self._sink.close()
+        if self._spill is not None:
+            self._spill.close()
+        await self._transport.close()
+
+        logger.info("TokenTra SDK shutdown complete")
+
+    def __enter__(self):
+        raise TypeError("AsyncTokenTra must be used with 'async with', not 'with'")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        raise TypeError("AsyncTokenTra must be used with 'async with', not 'with'")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.shutdown()
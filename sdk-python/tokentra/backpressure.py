@@ -0,0 +1,80 @@
+"""
+Queue backpressure
+What a full telemetry buffer does with new events, and accounting for drops
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger("tokentra")
+
+# drop_newest: discard the arriving event (default)
+# drop_oldest: ring buffer, evict the oldest buffered event to make room
+# rollup:      fold the event into per-window totals instead of dropping it
+# spill:       append the event to an on-disk overflow spool
+# block:       wait up to queue_block_timeout for room, then drop
+QUEUE_FULL_POLICIES = ("drop_newest", "drop_oldest", "rollup", "spill", "block")
+
+
+class DropCounter:
+    """
+    Dropped-event accounting for a full queue
+
+    A warning per dropped event is itself expensive during a telemetry
+    storm, so drops are summarized in at most one warning per
+    `log_interval`. The count not yet reported to the backend is taken by
+    the next batch (as "dropped_events") and carried over again if that
+    batch is not delivered.
+    """
+
+    def __init__(self, policy: str, log_interval: float = 10.0):
+        self.policy = policy
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._unreported = 0
+        self._since_log = 0
+        self._next_log = 0.0
+
+    def add(self, count: int = 1):
+        """Record dropped events, logging a summary if the interval has passed"""
+        now = time.monotonic()
+        with self._lock:
+            self._unreported += count
+            self._since_log += count
+            if now < self._next_log:
+                return
+            dropped, self._since_log = self._since_log, 0
+            self._next_log = now + self.log_interval
+
+        logger.warning(
+            f"Telemetry queue full (queue_full_policy={self.policy}), dropped {dropped} "
+            f"event(s); further drops are summarized every {self.log_interval:g}s"
+        )
+
+    def take(self) -> int:
+        """Unreported drop count, reset to zero"""
+        if not self._unreported:
+            return 0
+        with self._lock:
+            count, self._unreported = self._unreported, 0
+        return count
+
+    def carry(self, count: int):
+        """Add drops to report later (an undelivered batch's, or a worker's)"""
+        if count:
+            with self._lock:
+                self._unreported += count
+
+
+class SpilledEvent:
+    """An event read back from the overflow spool, sent as-is"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
@@ -0,0 +1,221 @@
+"""
+Local spend budgets
+Token-bucket cost limits checked before wrapped calls, synced with the backend
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+
+logger = logging.getLogger("tokentra")
+
+BUDGET_ACTIONS = ("block", "delay", "downgrade")
+_SCOPES = ("team", "feature", "project")
+
+
+@dataclass
+class Budget:
+    """
+    Spend limit in USD per period for a team / feature / project scope
+
+    Unset scope fields match everything. The budget is a token bucket
+    holding up to `limit` USD and refilled at limit / period per second, so
+    spend is smoothed over the period rather than reset at its boundary.
+    When it runs dry, wrapped calls in scope are blocked, delayed (up to
+    `max_delay` seconds, then blocked) or downgraded to `downgrade_to`.
+    """
+
+    name: str
+    limit: float
+    period: float = 86400.0  # seconds
+    team: Optional[str] = None
+    feature: Optional[str] = None
+    project: Optional[str] = None
+    action: str = "block"
+    downgrade_to: Optional[str] = None
+    max_delay: float = 5.0  # seconds, for action="delay"
+    level: float = field(default=-1.0, repr=False)  # USD left; starts full
+    updated: float = field(default_factory=time.monotonic, repr=False)
+
+    def __post_init__(self):
+        if self.action not in BUDGET_ACTIONS:
+            raise ValueError(f"action must be one of {BUDGET_ACTIONS}")
+        if self.action == "downgrade" and not self.downgrade_to:
+            raise ValueError("action='downgrade' needs downgrade_to")
+        if self.level < 0:
+            self.level = self.limit
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period
+
+    def matches(self, scope: Tuple[Optional[str], ...]) -> bool:
+        return all(
+            want is None or want == have
+            for want, have in zip((self.team, self.feature, self.project), scope)
+        )
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the bucket is positive again (0 if spend is allowed)"""
+        level = self.level + (now - self.updated) * self.rate
+        if level > 0:
+            return 0.0
+        return -level / self.rate if self.rate else float("inf")
+
+
+class BudgetLimiter:
+    """
+    Checks and charges budgets for wrapped calls
+
+    check() runs on every wrapped call without taking a lock: it reads the
+    bucket level and projects the refill. Charging actual cost after the
+    call (record) and backend syncs take a per-limiter lock. Matching
+    budgets are cached per scope.
+    """
+
+    def __init__(self, budgets: Iterable[Union[Budget, Dict[str, Any]]]):
+        self._budgets: List[Budget] = [
+            b if isinstance(b, Budget) else Budget(**b) for b in budgets
+        ]
+        self._by_scope: Dict[Tuple[Optional[str], ...], Tuple[Budget, ...]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def budgets(self) -> List[Budget]:
+        return list(self._budgets)
+
+    def check(self, scope: Tuple[Optional[str], ...]) -> Optional[Tuple[Budget, float]]:
+        """First exhausted budget for (team, feature, project) and its wait time"""
+        budgets = self._matching(scope)
+        if not budgets:
+            return None
+
+        now = time.monotonic()
+        for budget in budgets:
+            wait = budget.wait_time(now)
+            if wait:
+                return budget, wait
+        return None
+
+    def record(self, scope: Tuple[Optional[str], ...], cost: float):
+        """Charge the actual cost of a call to every budget in scope"""
+        budgets = self._matching(scope)
+        if not budgets or not cost:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for budget in budgets:
+                budget.level = min(
+                    budget.limit, budget.level + (now - budget.updated) * budget.rate
+                ) - cost
+                budget.updated = now
+
+    def apply_remote(self, document: Dict[str, Any]):
+        """
+        Adopt budgets and remaining amounts from the backend
+
+        Expects {"budgets": [{"name", "limit", "period_seconds", "remaining",
+        scope fields, "action", ...}]}. Known budgets take the backend's
+        remaining amount, which already includes spend from other hosts;
+        unknown budgets are added.
+        """
+        now = time.monotonic()
+        with self._lock:
+            by_name = {b.name: b for b in self._budgets}
+            added = False
+
+            for item in document.get("budgets", []):
+                budget = by_name.get(item["name"])
+                if budget is None:
+                    budget = Budget(
+                        name=item["name"],
+                        limit=float(item["limit"]),
+                        period=float(item.get("period_seconds", 86400)),
+                        action=item.get("action", "block"),
+                        downgrade_to=item.get("downgrade_to"),
+                        max_delay=float(item.get("max_delay", 5.0)),
+                        **{scope: item.get(scope) for scope in _SCOPES},
+                    )
+                    self._budgets.append(budget)
+                    added = True
+                elif "limit" in item:
+                    budget.limit = float(item["limit"])
+
+                if item.get("remaining") is not None:
+                    budget.level = min(budget.limit, float(item["remaining"]))
+                    budget.updated = now
+
+            if added:
+                self._by_scope = {}
+
+    def _matching(self, scope: Tuple[Optional[str], ...]) -> Tuple[Budget, ...]:
+        budgets = self._by_scope.get(scope)
+        if budgets is None:
+            budgets = tuple(b for b in self._budgets if b.matches(scope))
+            if len(self._by_scope) > 4096:
+                self._by_scope = {}
+            self._by_scope[scope] = budgets
+        return budgets
+
+
+class BudgetSync:
+    """
+    Periodically refreshes budgets from the backend
+
+    Polled by the telemetry worker, like PricingSource, so enforcement never
+    adds a network round trip to a wrapped call.
+    """
+
+    def __init__(
+        self,
+        limiter: BudgetLimiter,
+        url: str,
+        api_key: Optional[str] = None,
+        interval: float = 60.0,
+        timeout: float = 10.0,
+    ):
+        self.limiter = limiter
+        self.url = url
+        self.api_key = api_key
+        self.interval = interval
+        self.timeout = timeout
+        self._next_check = 0.0
+        self._session: Optional[requests.Session] = None
+
+    def next_due(self) -> float:
+        return self._next_check
+
+    def poll(self) -> bool:
+        """Fetch budgets if a check is due; returns True if they were applied"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.interval
+
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        try:
+            if self._session is None:
+                self._session = requests.Session()
+            response = self._session.get(self.url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            self.limiter.apply_remote(response.json())
+        except Exception as e:
+            logger.warning(f"Failed to sync budgets from {self.url}: {e}")
+            return False
+        return True
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def after_fork(self):
+        """Drop the parent's HTTP session in a forked child"""
+        self._session = None
@@ -0,0 +1,167 @@
+"""
+Local response cache for wrapped clients
+Exact-match cache of provider responses with TTL and LRU eviction
+"""
+
+import abc
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Request options that never change the response
+_IGNORED_KWARGS = frozenset({
+    "stream", "stream_options", "timeout", "extra_headers", "extra_query",
+    "extra_body", "user", "metadata",
+})
+
+
+def request_key(provider: str, kwargs: Dict[str, Any], deterministic_only: bool = True) -> Optional[str]:
+    """
+    Cache key for a request, or None if it must not be cached
+
+    The key covers every option that can change the response (model,
+    messages, temperature, tools, ...). With `deterministic_only`, only
+    requests with temperature 0 (and a single choice) are cacheable.
+    """
+    if kwargs.get("stream"):
+        return None
+    if deterministic_only and (kwargs.get("temperature") != 0 or kwargs.get("n", 1) != 1):
+        return None
+
+    request = {k: v for k, v in kwargs.items() if k not in _IGNORED_KWARGS}
+    try:
+        body = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    except (TypeError, ValueError):
+        return None
+    return provider + ":" + hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache(abc.ABC):
+    """Base class for response caches"""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Cached response for a key, or None"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any):
+        """Store a response under a key"""
+
+    def close(self):
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    On-disk cache shared by processes on the same host
+
+    Responses are pickled, so only point this at a file your application
+    owns. Entries expire after `ttl`; past `max_entries` the least recently
+    used rows are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl: float = 86400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            return None
+
+    def set(self, key: str, value: Any):
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, blob, now + self.ttl, now),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._evict(now)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+def create_cache(spec: Any, max_entries: int, ttl: float) -> Optional[ResponseCache]:
+    """Build a cache from TokenTraConfig.response_cache: "memory", a SQLite path, or an instance"""
+    if spec is None or spec is False:
+        return None
+    if isinstance(spec, ResponseCache):
+        return spec
+    if spec == "memory":
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    return SQLiteCache(str(spec), max_entries=max_entries, ttl=ttl)
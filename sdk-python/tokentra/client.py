@@ -4,19 +4,40 @@ Main client class for AI cost tracking
 """
 
 import os
+import json
 import time
-import uuid
 import threading
-import queue
+import itertools
 import logging
-from typing import Any, Dict, List, Optional, TypeVar
-from dataclasses import dataclass, field
-from datetime import datetime
-
-import requests
-
-from .errors import TokenTraError, InvalidApiKeyError, NetworkError
-from .pricing import calculate_cost
+import weakref
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, TypeVar, Union
+from dataclasses import dataclass, fields
+
+from .backpressure import QUEUE_FULL_POLICIES, DropCounter, SpilledEvent
+from .budgets import BudgetLimiter, BudgetSync
+from .cache import ResponseCache, create_cache, request_key
+from .errors import BudgetExceededError, TokenTraError, InvalidApiKeyError, error_from_status
+from .ids import format_request_id, format_timestamp, new_request_id
+from .pricing import PricingSource, calculate_cost
+from .prompts import PromptTracker
+from .providers import Method, is_async_method, resolve_adapter, resolve_method, supported_providers
+from .retry import PendingBatch, RetryPolicy, RetryScheduler
+from .routing import Router
+from .spool import DiskSpool, open_spool
+from .stats import (
+    BATCH_SIZE_BUCKETS,
+    FLUSH_BUCKETS_MS,
+    LATENCY_BUCKETS_MS,
+    QUEUE_DEPTH_BUCKETS,
+    Stats,
+)
+from .streaming import StreamProxy, StreamState
+from .transport import BodyEncoder, RequestsTransport, Transport, UnixSocketTransport
+
+if TYPE_CHECKING:
+    from .rollup import RollupAggregator
+    from .sampling import SamplingPolicy
 
 logger = logging.getLogger("tokentra")
 
@@ -35,20 +56,130 @@ class TokenTraConfig:
     batch_size: int = 10
     flush_interval: float = 5.0  # seconds
     max_queue_size: int = 1000
+    queue_full_policy: str = "drop_newest"  # drop_newest, drop_oldest, rollup, spill, block
+    queue_block_timeout: float = 0.05  # seconds a caller may wait for room under "block"
+    queue_spill_dir: Optional[str] = None  # overflow spool directory for "spill"
+    drop_log_interval: float = 10.0  # seconds between queue-full warnings
     default_feature: Optional[str] = None
     default_team: Optional[str] = None
     default_project: Optional[str] = None
     default_environment: Optional[str] = None
     privacy_mode: str = "metrics_only"
     log_level: str = "WARNING"
-
-
+    transport: Optional[Any] = None  # Transport instance; defaults to pooled requests
+    sink: Optional[Any] = None  # Sink (e.g. FileSink) that receives batches instead of the API
+    compression: str = "auto"  # auto, gzip, zstd, none
+    wire_format: str = "auto"  # auto (JSON, columnar msgpack if offered), json, columnar
+    pool_size: int = 4
+    max_retries: int = 5
+    retry_base_delay: float = 0.5  # seconds
+    retry_max_delay: float = 30.0  # seconds
+    retry_budget: float = 300.0  # seconds a batch may keep retrying
+    max_pending_retries: int = 100  # batches
+    spool_dir: Optional[str] = None  # enables the on-disk telemetry spool
+    spool_segment_bytes: int = 16 * 1024 * 1024
+    spool_max_bytes: int = 1024 * 1024 * 1024
+    spool_fsync: str = "batch"  # always, batch, never
+    orphan_adopt_interval: float = 60.0  # seconds between sweeps for spools of exited processes
+    pricing_file: Optional[str] = None  # versioned .json/.msgpack pricing, hot-reloaded
+    pricing_url: Optional[str] = None  # e.g. https://api.tokentra.com/api/v1/sdk/pricing
+    pricing_refresh_interval: float = 60.0  # seconds
+    stream_usage: bool = True  # request OpenAI's usage chunk on streams (hidden from callers)
+    aggregator_socket: Optional[str] = None  # ship batches to `python -m tokentra aggregator`
+    rollup_window: Optional[float] = None  # seconds; ship per-window rollups instead of raw events
+    rollup_raw_sample_rate: float = 0.0  # fraction of events also sent raw while rolling up
+    adaptive_sampling: bool = False  # thin cheap successful calls as the queue fills
+    sample_cost_threshold: float = 0.01  # USD; calls at or above are always kept
+    sample_latency_threshold_ms: int = 10000  # slower calls are always kept
+    sample_min_rate: float = 0.01
+    sample_pressure_start: float = 0.5  # queue fill fraction where sampling starts
+    prompt_tracking: bool = True  # fingerprint prompts to flag repeats (cache opportunities)
+    prompt_sketch_size: int = 10000  # recent distinct prompts remembered
+    response_cache: Optional[Any] = None  # "memory", a SQLite file path, or a ResponseCache
+    cache_ttl: float = 3600.0  # seconds
+    cache_max_entries: int = 10000
+    cache_deterministic_only: bool = True  # only cache temperature=0 requests
+    routing_rules: Optional[List[Any]] = None  # RoutingRule objects or dicts, first match wins
+    budgets: Optional[List[Any]] = None  # Budget objects or dicts enforced before wrapped calls
+    budget_sync_url: Optional[str] = None  # e.g. https://api.tokentra.com/api/v1/sdk/budgets
+    budget_sync_interval: float = 60.0  # seconds
+
+
+def _slotted(cls):
+    """Rebuild a dataclass with __slots__ (dataclass(slots=True) needs Python 3.10+)"""
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = field_names
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+# Field order of the serialized event; always-present fields first
+_REQUIRED_FIELDS = (
+    "request_id", "timestamp", "provider", "model", "input_tokens",
+    "output_tokens", "total_tokens", "input_cost", "output_cost",
+    "total_cost", "latency_ms", "sdk_version", "sdk_language",
+)
+_OPTIONAL_FIELDS = (
+    "feature", "team", "project", "cost_center", "user_id",
+    "environment", "cached_tokens", "cached_cost", "was_cached",
+    "original_model", "routed_by_rule", "is_error", "error_code",
+    "error_message", "prompt_hash", "method_path", "is_streaming",
+    "pricing_version", "time_to_first_token_ms", "inter_token_latency_ms",
+    "is_sample", "sample_weight", "cache_opportunity", "avoided_cost",
+)
+
+
+def _compile_to_dict(required, optional):
+    """Generate a straight-line to_dict() with no per-call field lists or getattr"""
+    # Ids and timestamps are kept raw on the event and formatted here, on the worker
+    formatters = {"request_id": "format_request_id", "timestamp": "format_timestamp"}
+    lines = [
+        "def to_dict(self):",
+        "    result = {" + ", ".join(
+            f"{name!r}: {formatters[name]}(self.{name})" if name in formatters
+            else f"{name!r}: self.{name}"
+            for name in required
+        ) + "}",
+    ]
+    for name in optional:
+        lines += [
+            f"    value = self.{name}",
+            "    if value is not None and value is not False:",
+            f"        result[{name!r}] = value",
+        ]
+    lines += [
+        "    if self.metadata:",
+        "        result['metadata'] = self.metadata",
+        "    return result",
+    ]
+
+    namespace: Dict[str, Any] = {
+        "format_request_id": format_request_id,
+        "format_timestamp": format_timestamp,
+    }
+    exec("\n".join(lines), namespace)
+    to_dict = namespace["to_dict"]
+    to_dict.__doc__ = "Convert to dictionary for JSON serialization"
+    return to_dict
+
+
+@_slotted
 @dataclass
 class TelemetryEvent:
-    """Telemetry event to send to TokenTra"""
+    """
+    Telemetry event to send to TokenTra
 
-    request_id: str
-    timestamp: str
+    Slotted to keep deep telemetry queues cheap: no per-instance __dict__,
+    and metadata stays None unless attribution supplies it. Wrapped calls
+    store the request id and timestamp as ints; to_dict() renders them.
+    """
+
+    request_id: Union[str, int]  # or a UUIDv7 int from new_request_id()
+    timestamp: Union[str, int]  # or time.time_ns(); both formatted by to_dict()
     provider: str
     model: str
     input_tokens: int
@@ -66,7 +197,7 @@ class TelemetryEvent:
     cost_center: Optional[str] = None
     user_id: Optional[str] = None
     environment: Optional[str] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    metadata: Optional[Dict[str, Any]] = None
     cached_tokens: Optional[int] = None
     cached_cost: Optional[float] = None
     was_cached: bool = False
@@ -78,42 +209,15 @@ class TelemetryEvent:
     prompt_hash: Optional[str] = None
     method_path: Optional[str] = None
     is_streaming: bool = False
+    pricing_version: Optional[str] = None
+    time_to_first_token_ms: Optional[int] = None
+    inter_token_latency_ms: Optional[float] = None
+    is_sample: bool = False  # raw copy of an event already counted in a rollup
+    sample_weight: Optional[float] = None  # events this one stands for when sampled
+    cache_opportunity: bool = False  # same prompt was sent recently
+    avoided_cost: Optional[float] = None  # what a response served from cache would have cost
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for JSON serialization"""
-        result = {
-            "request_id": self.request_id,
-            "timestamp": self.timestamp,
-            "provider": self.provider,
-            "model": self.model,
-            "input_tokens": self.input_tokens,
-            "output_tokens": self.output_tokens,
-            "total_tokens": self.total_tokens,
-            "input_cost": self.input_cost,
-            "output_cost": self.output_cost,
-            "total_cost": self.total_cost,
-            "latency_ms": self.latency_ms,
-            "sdk_version": self.sdk_version,
-            "sdk_language": self.sdk_language,
-        }
-
-        # Add optional fields if set
-        optional_fields = [
-            "feature", "team", "project", "cost_center", "user_id",
-            "environment", "cached_tokens", "cached_cost", "was_cached",
-            "original_model", "routed_by_rule", "is_error", "error_code",
-            "error_message", "prompt_hash", "method_path", "is_streaming",
-        ]
-
-        for field_name in optional_fields:
-            value = getattr(self, field_name)
-            if value is not None and value != {} and value is not False:
-                result[field_name] = value
-
-        if self.metadata:
-            result["metadata"] = self.metadata
-
-        return result
+    to_dict = _compile_to_dict(_REQUIRED_FIELDS, _OPTIONAL_FIELDS)
 
 
 class TokenTra:
@@ -125,6 +229,9 @@ class TokenTra:
         openai = tokentra.wrap(OpenAI())
     """
 
+    # Whether wrap() expects coroutine client methods
+    _wraps_async = False
+
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         # Get API key from param or environment
         api_key = api_key or os.environ.get("TOKENTRA_API_KEY")
@@ -145,283 +252,1041 @@ class TokenTra:
         # Configure logging
         logging.basicConfig(level=getattr(logging, self.config.log_level))
 
+        if self.config.queue_full_policy not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"queue_full_policy must be one of {QUEUE_FULL_POLICIES}")
+        if self.config.queue_full_policy == "spill" and not self.config.queue_spill_dir:
+            raise ValueError("queue_full_policy='spill' needs queue_spill_dir")
+
         # Initialize state
-        self._stats = {
-            "requests_tracked": 0,
-            "telemetry_sent": 0,
-            "telemetry_failed": 0,
-            "telemetry_buffered": 0,
-            "cache_hits": 0,
-            "cache_misses": 0,
-            "errors": 0,
-        }
+        self._stats = self._create_stats()
 
-        # Telemetry queue
-        self._telemetry_queue: queue.Queue[TelemetryEvent] = queue.Queue(
-            maxsize=self.config.max_queue_size
-        )
+        # Ingest transport
+        # Batches to a local aggregator stay uncompressed; it re-batches and compresses
+        if self.config.aggregator_socket:
+            # Local socket: nothing to gain from compressing or pivoting a batch
+            self._encoder = BodyEncoder("none", wire_format="json")
+        else:
+            self._encoder = BodyEncoder(self.config.compression, wire_format=self.config.wire_format)
+        self._transport = self._create_transport()
+        self._sink = self.config.sink
+        self._retries = RetryScheduler(RetryPolicy(
+            max_retries=self.config.max_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay,
+            budget=self.config.retry_budget,
+            max_pending=self.config.max_pending_retries,
+        ))
+
+        # Pricing hot reload (file now, backend from the worker)
+        self._pricing_source: Optional[PricingSource] = None
+        if self.config.pricing_file or self.config.pricing_url:
+            self._pricing_source = PricingSource(
+                path=self.config.pricing_file,
+                url=self.config.pricing_url,
+                api_key=self.config.api_key,
+                interval=self.config.pricing_refresh_interval,
+                timeout=self.config.timeout / 1000,
+            )
+            self._pricing_source.poll(remote=False)
+
+        # Optional pre-aggregation into per-window rollups
+        self._rollups = self._create_rollups()
+        self._sampler = self._create_sampler()
+
+        # Optional cost-based model routing for wrapped clients
+        self._router = Router(self.config.routing_rules) if self.config.routing_rules else None
+
+        # Optional local spend budgets, refreshed from the backend by the worker
+        self._budgets: Optional[BudgetLimiter] = None
+        self._budget_sync: Optional[BudgetSync] = None
+        if self.config.budgets or self.config.budget_sync_url:
+            self._budgets = BudgetLimiter(self.config.budgets or [])
+        if self.config.budget_sync_url:
+            self._budget_sync = BudgetSync(
+                self._budgets,
+                self.config.budget_sync_url,
+                api_key=self.config.api_key,
+                interval=self.config.budget_sync_interval,
+                timeout=self.config.timeout / 1000,
+            )
+
+        # Optional local response cache for wrapped clients
+        self._cache = self._create_cache()
+
+        # Prompt hashes leave the process only when privacy_mode allows it
+        self._prompts: Optional[PromptTracker] = None
+        if self.config.prompt_tracking:
+            self._prompts = PromptTracker(
+                self.config.api_key,
+                capacity=self.config.prompt_sketch_size,
+                include_hash=self.config.privacy_mode != "metrics_only",
+            )
+
+        # Optional disk spool replaces the in-memory queue
+        self._spool: Optional[DiskSpool] = None
+        self._spool_lock = threading.Lock()
+        self._spool_attempt = 0
+        if self.config.spool_dir:
+            self._spool = open_spool(
+                self.config.spool_dir,
+                segment_bytes=self.config.spool_segment_bytes,
+                max_bytes=self.config.spool_max_bytes,
+                fsync=self.config.spool_fsync,
+            )
+            self._spool.adopt_orphans(self.config.spool_dir)
+
+        # Telemetry buffer; the worker sleeps on _cond until there is work
+        self._buffer: Deque[TelemetryEvent] = deque()
+        self._cond = threading.Condition(threading.Lock())
+
+        # What a full buffer does with new events (queue_full_policy)
+        self._drops = DropCounter(self.config.queue_full_policy, self.config.drop_log_interval)
+        self._overflow_rollups = self._create_overflow_rollups()
+        self._spill = self._create_spill(self.config.queue_spill_dir, open_spool)
+        if self._spill is not None:
+            self._spill.adopt_orphans(self.config.queue_spill_dir)
+        # Children keep exiting after startup; the worker sweeps again periodically
+        self._orphans_due = time.monotonic() + self.config.orphan_adopt_interval
+        self._space = threading.Condition(threading.Lock())
+        self._space_waiters = 0
+        self._batch_ready = False
+        self._spool_appended = itertools.count(1)
+        self._spool_backoff_until = 0.0
+        self._flush_requested = 0
+        self._flush_completed = 0
+        self._flush_undelivered = False  # batches left waiting on a retry by the last pass
 
         # Background worker
         self._shutdown = threading.Event()
+        self._released = False  # shutdown() finished; later calls are no-ops
+        self._start_worker()
+        _live_clients.add(self)
+
+        logger.info(f"TokenTra SDK initialized (v{__version__})")
+
+    def _create_stats(self) -> Stats:
+        """Counters and histograms reported by get_stats()"""
+        return Stats(
+            counters=(
+                "requests_tracked",
+                "telemetry_sent",
+                "telemetry_failed",
+                "telemetry_retried",
+                "telemetry_buffered",
+                "telemetry_rolled_up",
+                "telemetry_sampled_out",
+                "telemetry_dropped",
+                "telemetry_spilled",
+                "spool_records_skipped",
+                "cache_hits",
+                "cache_misses",
+                "cache_errors",
+                "prompt_repeats",
+                "budget_blocked",
+                "budget_delayed",
+                "budget_downgraded",
+                "errors",
+            ),
+            histograms={
+                "latency_ms": LATENCY_BUCKETS_MS,
+                "batch_size": BATCH_SIZE_BUCKETS,
+                "flush_duration_ms": FLUSH_BUCKETS_MS,
+                "queue_depth": QUEUE_DEPTH_BUCKETS,
+            },
+            gauges=("telemetry_buffered",),
+        )
+
+    def _create_rollups(self) -> Optional["RollupAggregator"]:
+        """Rollup stage, if rollup_window is configured"""
+        if not self.config.rollup_window:
+            return None
+
+        from .rollup import RollupAggregator
+
+        return RollupAggregator(self.config.rollup_window, self.config.rollup_raw_sample_rate)
+
+    def _create_overflow_rollups(self) -> Optional["RollupAggregator"]:
+        """Rollups for events arriving at a full buffer, under queue_full_policy="rollup" """
+        if self.config.queue_full_policy != "rollup":
+            return None
+
+        from .rollup import RollupAggregator
+
+        return RollupAggregator(self.config.rollup_window or 60.0)
+
+    def _create_spill(self, directory: Optional[str], opener=DiskSpool) -> Optional[DiskSpool]:
+        """Overflow spool under queue_full_policy="spill" """
+        if self.config.queue_full_policy != "spill":
+            return None
+        # Overflow, not a durability guarantee: leave flushing to the OS
+        return opener(
+            directory,
+            segment_bytes=self.config.spool_segment_bytes,
+            max_bytes=self.config.spool_max_bytes,
+            fsync="never",
+        )
+
+    def _create_sampler(self) -> Optional["SamplingPolicy"]:
+        """Adaptive sampling policy, if enabled"""
+        if not self.config.adaptive_sampling:
+            return None
+
+        from .sampling import SamplingPolicy
+
+        return SamplingPolicy(
+            cost_threshold=self.config.sample_cost_threshold,
+            latency_threshold_ms=self.config.sample_latency_threshold_ms,
+            min_rate=self.config.sample_min_rate,
+            pressure_start=self.config.sample_pressure_start,
+        )
+
+    def _create_cache(self) -> Optional[ResponseCache]:
+        """Response cache built from response_cache, if configured"""
+        return create_cache(
+            self.config.response_cache,
+            max_entries=self.config.cache_max_entries,
+            ttl=self.config.cache_ttl,
+        )
+
+    def _create_transport(self) -> Transport:
+        """Use the configured transport, the local aggregator, or a pooled requests session"""
+        if self.config.transport is not None:
+            return self.config.transport
+        if self.config.aggregator_socket:
+            return UnixSocketTransport(self.config.aggregator_socket)
+        return RequestsTransport(pool_size=self.config.pool_size)
+
+    def _start_worker(self):
+        """Start the background telemetry worker"""
         self._worker = threading.Thread(target=self._telemetry_worker, daemon=True)
         self._worker.start()
 
-        logger.info(f"TokenTra SDK initialized (v{__version__})")
+    def _after_fork(self):
+        """
+        Re-arm a client inherited through fork()
+
+        Only the forking thread survives in the child, so the worker is
+        restarted and every lock, connection pool and buffer copied from the
+        parent is replaced. Events buffered before the fork stay with the
+        parent, which still sends them. A spool moves to a per-process
+        subdirectory so parent and children never append to the same segment.
+        """
+        if self._shutdown.is_set():
+            return
+
+        self._buffer = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._batch_ready = False
+        self._flush_requested = self._flush_completed = 0
+        self._flush_undelivered = False
+        self._spool_backoff_until = 0.0
+        self._shutdown = threading.Event()
+        self._stats = self._create_stats()
+        self._retries = RetryScheduler(self._retries.policy)
+        self._rollups = self._create_rollups()
+        self._drops = DropCounter(self.config.queue_full_policy, self.config.drop_log_interval)
+        self._overflow_rollups = self._create_overflow_rollups()
+        self._space = threading.Condition(threading.Lock())
+        self._space_waiters = 0
+        if self._spill is not None:
+            self._spill.detach()
+            self._spill = self._create_spill(
+                os.path.join(self.config.queue_spill_dir, f"pid-{os.getpid()}")
+            )
+        if not isinstance(self.config.response_cache, ResponseCache):
+            # SQLite connections must not cross fork()
+            self._cache = self._create_cache()
+        if self.config.transport is None:
+            self._transport = self._create_transport()
+        elif hasattr(self._transport, "after_fork"):
+            # A supplied transport is kept; it drops the parent's connections itself
+            self._transport.after_fork()
+        self._encoder.after_fork()
+        if self._pricing_source is not None:
+            self._pricing_source.after_fork()
+        if self._budget_sync is not None:
+            self._budget_sync.after_fork()
+        if self._sink is not None:
+            self._sink.after_fork()
+
+        if self._spool is not None:
+            self._spool_lock = threading.Lock()
+            self._spool_attempt = 0
+            self._spool.detach()
+            self._spool = DiskSpool(
+                os.path.join(self.config.spool_dir, f"pid-{os.getpid()}"),
+                segment_bytes=self.config.spool_segment_bytes,
+                max_bytes=self.config.spool_max_bytes,
+                fsync=self.config.spool_fsync,
+            )
+
+        self._start_worker()
+        logger.debug(f"TokenTra SDK re-initialized after fork (pid {os.getpid()})")
 
     def wrap(self, client: T) -> T:
         """
         Wrap an AI client for automatic tracking
 
         Args:
-            client: AI provider client (OpenAI, Anthropic, etc.)
+            client: AI provider client (OpenAI, Anthropic, Google, Mistral,
+                Cohere, Groq, or an OpenAI client pointed at a compatible API)
 
         Returns:
             Wrapped client with identical API
         """
-        provider = self._detect_provider(client)
-
-        if provider == "openai":
-            return self._wrap_openai(client)
-        elif provider == "anthropic":
-            return self._wrap_anthropic(client)
-        else:
+        adapter = resolve_adapter(client)
+        if adapter is None:
             raise TokenTraError(
                 "UNSUPPORTED_PROVIDER",
-                f"Unsupported AI client. Supported: OpenAI, Anthropic"
+                f"Unsupported AI client {type(client).__name__}. Supported: {supported_providers()}"
             )
 
-    def _detect_provider(self, client: Any) -> str:
-        """Detect the AI provider from client instance"""
-        class_name = client.__class__.__name__
-        module_name = client.__class__.__module__
-
-        if "openai" in module_name.lower() or class_name == "OpenAI":
-            return "openai"
-        elif "anthropic" in module_name.lower() or class_name == "Anthropic":
-            return "anthropic"
+        provider = adapter.provider_for(client)
+        targets = []
+        mismatched = 0
+        for method in adapter.methods:
+            target = resolve_method(client, method.path)
+            if target is None:
+                continue
+            owner, name = target
+            # Sync methods need TokenTra and coroutine methods AsyncTokenTra
+            if is_async_method(getattr(owner, name)) != self._wraps_async:
+                mismatched += 1
+                continue
+            targets.append((method, owner, name))
+
+        if not targets and mismatched:
+            kind, sdk = ("a sync", "TokenTra") if self._wraps_async else ("an async", "AsyncTokenTra")
+            raise TokenTraError(
+                "UNSUPPORTED_PROVIDER",
+                f"{type(client).__name__} is {kind} client; wrap it with {sdk}"
+            )
+        if not targets:
+            raise TokenTraError(
+                "UNSUPPORTED_PROVIDER",
+                f"{type(client).__name__} has none of the {adapter.name} methods TokenTra tracks"
+            )
 
-        return "unknown"
+        for method, owner, name in targets:
+            setattr(owner, name, self._wrap_method(provider, method, getattr(owner, name)))
+        return client
 
-    def _wrap_openai(self, client: T) -> T:
-        """Wrap OpenAI client"""
+    def _wrap_method(self, provider: str, method: Method, original_fn):
+        """Replacement for one client method that tracks each call"""
         sdk = self
-        original_create = client.chat.completions.create
 
-        def wrapped_create(*args, tokentra: Optional[Dict] = None, **kwargs):
-            return sdk._track_openai_request(
-                original_create, args, kwargs, tokentra or {}
+        def wrapped(*args, tokentra: Optional[Dict] = None, **kwargs):
+            return sdk._track_request(
+                provider, method, original_fn, args, kwargs, sdk._resolve_attribution(tokentra)
             )
 
-        client.chat.completions.create = wrapped_create
-        return client
+        return wrapped
+
+    def _resolve_attribution(self, attribution: Optional[Dict]) -> Dict:
+        """
+        A call's tokentra={...} attribution with the config defaults applied
 
-    def _track_openai_request(
-        self, original_fn, args, kwargs, attribution: Dict
+        Resolved once per call, so routing rules, budgets and the recorded
+        event all see the same feature, team and project.
+        """
+        resolved = dict(attribution or ())
+        resolved["feature"] = resolved.get("feature") or self.config.default_feature
+        resolved["team"] = resolved.get("team") or self.config.default_team
+        resolved["project"] = resolved.get("project") or self.config.default_project
+        resolved["environment"] = (
+            resolved.get("environment") or self.config.default_environment or "production"
+        )
+        return resolved
+
+    def _track_request(
+        self, provider: str, method: Method, original_fn, args, kwargs, attribution: Dict
     ):
-        """Track an OpenAI request"""
-        request_id = str(uuid.uuid4())
-        model = kwargs.get("model", "unknown")
+        """Track a call made through a wrapped method"""
+        if method.stream and kwargs.get("stream"):
+            return self._track_stream(provider, method, original_fn, args, kwargs, attribution)
+
+        request_id = new_request_id()
+        model, extra = self._prepare_request(provider, method, kwargs, attribution)
+        cache_key, cached = self._cache_lookup(
+            provider, method, request_id, model, kwargs, attribution, extra
+        )
+        if cached is not None:
+            return cached
+        model = self._admit_request(model, kwargs, attribution, extra)
         start_time = time.time()
 
         try:
             response = original_fn(*args, **kwargs)
+        except Exception as e:
             end_time = time.time()
+            self._stats.incr("errors")
 
-            tokens = self._extract_openai_tokens(response)
-            costs = calculate_cost("openai", model, tokens["input"], tokens["output"])
-
-            event = TelemetryEvent(
-                request_id=request_id,
-                timestamp=datetime.utcnow().isoformat() + "Z",
-                provider="openai",
-                model=model,
-                input_tokens=tokens["input"],
-                output_tokens=tokens["output"],
-                total_tokens=tokens["input"] + tokens["output"],
-                input_cost=costs["input_cost"],
-                output_cost=costs["output_cost"],
-                total_cost=costs["total_cost"],
-                latency_ms=int((end_time - start_time) * 1000),
-                feature=attribution.get("feature") or self.config.default_feature,
-                team=attribution.get("team") or self.config.default_team,
-                project=attribution.get("project") or self.config.default_project,
-                user_id=attribution.get("user_id"),
-                environment=attribution.get("environment") or self.config.default_environment or "production",
-                metadata=attribution.get("metadata", {}),
+            event = self._build_error_event(
+                provider, request_id, model, start_time, end_time, e, **extra
             )
-
             self._queue_telemetry(event)
-            self._stats["requests_tracked"] += 1
 
-            return response
+            raise
 
-        except Exception as e:
-            end_time = time.time()
-            self._stats["errors"] += 1
-
-            event = TelemetryEvent(
-                request_id=request_id,
-                timestamp=datetime.utcnow().isoformat() + "Z",
-                provider="openai",
-                model=model,
-                input_tokens=0,
-                output_tokens=0,
-                total_tokens=0,
-                input_cost=0,
-                output_cost=0,
-                total_cost=0,
-                latency_ms=int((end_time - start_time) * 1000),
-                is_error=True,
-                error_code=type(e).__name__,
-                error_message=str(e)[:500],
-            )
-            self._queue_telemetry(event)
+        end_time = time.time()
+
+        event = self._build_event(
+            provider, request_id, model, method.tokens(response, kwargs),
+            start_time, end_time, attribution, **extra,
+        )
+        self._queue_telemetry(event)
+        self._stats.incr("requests_tracked")
+        if cache_key is not None:
+            self._cache_store(cache_key, response)
+
+        return response
+
+    def _build_event(
+        self, provider: str, request_id: int, model: str, tokens: Dict[str, int],
+        start_time: float, end_time: float, attribution: Dict, **extra
+    ) -> "TelemetryEvent":
+        """Build a telemetry event from token usage"""
+        cached = tokens.get("cached")
+        costs = calculate_cost(provider, model, tokens["input"], tokens["output"], cached or 0)
+
+        return TelemetryEvent(
+            request_id=request_id,
+            timestamp=time.time_ns(),
+            provider=provider,
+            model=model,
+            input_tokens=tokens["input"],
+            output_tokens=tokens["output"],
+            total_tokens=tokens["input"] + tokens["output"],
+            input_cost=costs["input_cost"],
+            output_cost=costs["output_cost"],
+            total_cost=costs["total_cost"],
+            pricing_version=costs["pricing_version"],
+            latency_ms=int((end_time - start_time) * 1000),
+            cached_tokens=cached,
+            cached_cost=costs["cached_cost"] if cached is not None else None,
+            feature=attribution["feature"],
+            team=attribution["team"],
+            project=attribution["project"],
+            user_id=attribution.get("user_id"),
+            environment=attribution["environment"],
+            metadata=attribution.get("metadata"),
+            **extra,
+        )
+
+    def _build_error_event(
+        self, provider: str, request_id: int, model: str, start_time: float,
+        end_time: float, error: BaseException, **extra
+    ) -> "TelemetryEvent":
+        """Build a telemetry event for a failed provider call"""
+        return TelemetryEvent(
+            request_id=request_id,
+            timestamp=time.time_ns(),
+            provider=provider,
+            model=model,
+            input_tokens=0,
+            output_tokens=0,
+            total_tokens=0,
+            input_cost=0,
+            output_cost=0,
+            total_cost=0,
+            latency_ms=int((end_time - start_time) * 1000),
+            is_error=True,
+            error_code=type(error).__name__,
+            error_message=str(error)[:500],
+            **extra,
+        )
+
+    def _track_stream(
+        self, provider: str, method: Method, original_fn, args, kwargs, attribution: Dict
+    ):
+        """Track a streaming request; the event is queued when the stream ends"""
+        request_id = new_request_id()
+        model, extra = self._prepare_request(provider, method, kwargs, attribution)
+        model = self._admit_request(model, kwargs, attribution, extra)
+        injected = self._prepare_stream(method, kwargs)
+        start_time = time.time()
+        on_done = self._stream_done_callback(
+            provider, request_id, model, start_time, attribution, **extra
+        )
 
+        try:
+            stream = original_fn(*args, **kwargs)
+        except Exception as e:
+            on_done(StreamState(method.stream), e)
             raise
 
-    def _wrap_anthropic(self, client: T) -> T:
-        """Wrap Anthropic client"""
-        sdk = self
-        original_create = client.messages.create
+        return StreamProxy(stream, StreamState(method.stream), on_done, hide_usage_chunks=injected)
 
-        def wrapped_create(*args, tokentra: Optional[Dict] = None, **kwargs):
-            return sdk._track_anthropic_request(
-                original_create, args, kwargs, tokentra or {}
-            )
+    def _prepare_request(self, provider: str, method: Method, kwargs: Dict, attribution: Dict):
+        """
+        Apply routing rules before a call
 
-        client.messages.create = wrapped_create
-        return client
+        Returns the model actually requested and extra TelemetryEvent fields.
+        """
+        model = kwargs.get("model", "unknown")
+        extra: Dict[str, Any] = {"method_path": method.path}
 
-    def _track_anthropic_request(
-        self, original_fn, args, kwargs, attribution: Dict
+        if self._router is not None:
+            decision = self._router.route(provider, model, attribution, kwargs)
+            if decision is not None:
+                extra["original_model"] = model
+                model, extra["routed_by_rule"] = decision
+                kwargs["model"] = model
+        return model, extra
+
+    def _admit_request(self, model: str, kwargs: Dict, attribution: Dict, extra: Dict) -> str:
+        """
+        Enforce budgets and fingerprint the prompt of a call that goes to the provider
+
+        Runs after the cache lookup, so a cache hit skips both. Returns the
+        model, which a "downgrade" budget may have changed.
+        """
+        if self._budgets is not None:
+            model = self._enforce_budget(model, kwargs, attribution, extra)
+
+        if self._prompts is not None:
+            extra.update(self._prompts.fields(model, kwargs))
+            if "cache_opportunity" in extra:
+                self._stats.incr("prompt_repeats")
+        return model
+
+    def _budget_scope(self, attribution: Dict) -> tuple:
+        """(team, feature, project) a call is charged to, as recorded on its event"""
+        return (attribution["team"], attribution["feature"], attribution["project"])
+
+    def _enforce_budget(self, model: str, kwargs: Dict, attribution: Dict, extra: Dict) -> str:
+        """Block, delay or downgrade a call whose budget is exhausted; returns the model"""
+        exhausted = self._budgets.check(self._budget_scope(attribution))
+        if exhausted is None:
+            return model
+
+        budget, wait = exhausted
+        if budget.action == "downgrade":
+            self._stats.incr("budget_downgraded")
+            extra.setdefault("original_model", model)
+            extra["routed_by_rule"] = f"budget:{budget.name}"
+            kwargs["model"] = budget.downgrade_to
+            return budget.downgrade_to
+
+        if budget.action == "delay" and wait <= budget.max_delay:
+            self._stats.incr("budget_delayed")
+            self._wait_for_budget(wait)
+            return model
+
+        self._stats.incr("budget_blocked")
+        raise BudgetExceededError(budget.name, wait)
+
+    def _wait_for_budget(self, seconds: float):
+        time.sleep(seconds)
+
+    def _cache_lookup(
+        self, provider: str, method: Method, request_id: int, model: str, kwargs: Dict,
+        attribution: Dict, extra: Dict
     ):
-        """Track an Anthropic request"""
-        request_id = str(uuid.uuid4())
-        model = kwargs.get("model", "unknown")
+        """
+        Look a request up in the response cache
+
+        Returns (cache_key, cached_response). On a hit the event is queued
+        with was_cached set, zero cost and the cost avoided. cache_key is
+        None when the request is not cacheable. Pass tokentra={"cache": True}
+        to cache a non-deterministic request, or {"cache": False} to bypass.
+        """
+        override = attribution.get("cache")
+        if self._cache is None or override is False:
+            return None, None
+
+        key = request_key(provider, kwargs, self.config.cache_deterministic_only and not override)
+        if key is None:
+            return None, None
+
         start_time = time.time()
+        try:
+            response = self._cache.get(key)
+        except Exception as e:
+            # A broken cache is a miss, never a failed call
+            self._stats.incr("cache_errors")
+            logger.warning(f"Response cache lookup failed: {e}")
+            return key, None
+        if response is None:
+            self._stats.incr("cache_misses")
+            return key, None
+
+        self._stats.incr("cache_hits")
+        event = self._build_event(
+            provider, request_id, model, method.tokens(response, kwargs), start_time, time.time(),
+            attribution, was_cached=True, **extra,
+        )
+        event.avoided_cost = event.total_cost
+        event.input_cost = event.output_cost = event.total_cost = 0.0
+        event.cached_cost = None
+        self._queue_telemetry(event)
+        self._stats.incr("requests_tracked")
+        return None, response
 
+    def _cache_store(self, key: str, response: Any):
+        """Cache a response; the call has already succeeded, so failures are only logged"""
         try:
-            response = original_fn(*args, **kwargs)
-            end_time = time.time()
+            self._cache.set(key, response)
+        except Exception as e:
+            self._stats.incr("cache_errors")
+            logger.warning(f"Failed to cache response: {e}")
+
+    def _prepare_stream(self, method: Method, kwargs: Dict) -> bool:
+        """Ask the API to append a usage chunk to the stream; True if we injected it"""
+        if method.stream_usage_option and self.config.stream_usage and "stream_options" not in kwargs:
+            kwargs["stream_options"] = {"include_usage": True}
+            return True
+        return False
+
+    def _stream_done_callback(
+        self, provider: str, request_id: int, model: str, start_time: float,
+        attribution: Dict, **extra
+    ):
+        """Callback that turns a finished StreamState into a telemetry event"""
 
-            tokens = self._extract_anthropic_tokens(response)
-            costs = calculate_cost(
-                "anthropic", model, tokens["input"], tokens["output"], tokens.get("cached", 0)
-            )
+        def on_done(state: StreamState, error: Optional[BaseException]):
+            end_time = time.time()
 
-            event = TelemetryEvent(
-                request_id=request_id,
-                timestamp=datetime.utcnow().isoformat() + "Z",
-                provider="anthropic",
-                model=model,
-                input_tokens=tokens["input"],
-                output_tokens=tokens["output"],
-                total_tokens=tokens["input"] + tokens["output"],
-                input_cost=costs["input_cost"],
-                output_cost=costs["output_cost"],
-                total_cost=costs["total_cost"],
-                latency_ms=int((end_time - start_time) * 1000),
-                cached_tokens=tokens.get("cached"),
-                cached_cost=costs.get("cached_cost"),
-                feature=attribution.get("feature") or self.config.default_feature,
-                team=attribution.get("team") or self.config.default_team,
-                project=attribution.get("project") or self.config.default_project,
-                user_id=attribution.get("user_id"),
-                environment=attribution.get("environment") or self.config.default_environment,
-                metadata=attribution.get("metadata", {}),
-            )
+            if error is not None:
+                self._stats.incr("errors")
+                event = self._build_error_event(
+                    provider, request_id, model, start_time, end_time, error,
+                    is_streaming=True, **extra,
+                )
+            else:
+                event = self._build_event(
+                    provider, request_id, model, state.tokens(), start_time, end_time, attribution,
+                    is_streaming=True,
+                    time_to_first_token_ms=state.time_to_first_token_ms(start_time),
+                    inter_token_latency_ms=state.inter_token_latency_ms(),
+                    **extra,
+                )
+                self._stats.incr("requests_tracked")
 
             self._queue_telemetry(event)
-            self._stats["requests_tracked"] += 1
 
-            return response
+        return on_done
 
-        except Exception as e:
-            end_time = time.time()
-            self._stats["errors"] += 1
-            raise
+    def _queue_telemetry(self, event: TelemetryEvent):
+        """Add event to telemetry queue, or fold it into a rollup"""
+        self._stats.observe("latency_ms", event.latency_ms)
 
-    def _extract_openai_tokens(self, response) -> Dict[str, int]:
-        """Extract token counts from OpenAI response"""
-        usage = getattr(response, "usage", None)
-        if not usage:
-            return {"input": 0, "output": 0}
+        if self._budgets is not None:
+            self._budgets.record((event.team, event.feature, event.project), event.total_cost)
 
-        return {
-            "input": getattr(usage, "prompt_tokens", 0),
-            "output": getattr(usage, "completion_tokens", 0),
-        }
+        if self._rollups is not None and not self._rollups.add(event):
+            self._stats.incr("telemetry_rolled_up")
+            return
 
-    def _extract_anthropic_tokens(self, response) -> Dict[str, int]:
-        """Extract token counts from Anthropic response"""
-        usage = getattr(response, "usage", None)
-        if not usage:
-            return {"input": 0, "output": 0}
+        if self._sampler is not None and not self._sampler.sample(event, self._queue_fill()):
+            self._stats.incr("telemetry_sampled_out")
+            return
 
-        return {
-            "input": getattr(usage, "input_tokens", 0),
-            "output": getattr(usage, "output_tokens", 0),
-            "cached": getattr(usage, "cache_read_input_tokens", 0),
-        }
+        self._enqueue(event)
 
-    def _queue_telemetry(self, event: TelemetryEvent):
-        """Add event to telemetry queue"""
-        try:
-            self._telemetry_queue.put_nowait(event)
-            self._stats["telemetry_buffered"] += 1
-        except queue.Full:
-            logger.warning("Telemetry queue full, dropping event")
+    def _queue_fill(self) -> float:
+        """Fraction of buffer (or spool) capacity in use"""
+        if self._spool is not None:
+            return self._spool.pending_bytes / self._spool.max_bytes
+        return len(self._buffer) / self.config.max_queue_size
+
+    def _enqueue(self, event: Any):
+        """Buffer an event or rollup (anything with to_dict()) for sending"""
+        if self._spool is not None:
+            try:
+                self._spool.append(json.dumps(event.to_dict(), separators=(",", ":")).encode("utf-8"))
+            except OSError as e:
+                # Runs on the caller's thread: a full disk must not fail the wrapped call
+                self._stats.incr("telemetry_dropped")
+                self._drops.add()
+                logger.debug(f"Failed to spool telemetry event: {e}")
+                return
+            self._stats.incr("telemetry_buffered")
+            if next(self._spool_appended) % self.config.batch_size == 0:
+                self._signal_batch_ready()
+            return
+
+        if len(self._buffer) >= self.config.max_queue_size and not self._make_room(event):
+            return
+
+        self._buffer.append(event)
+        self._stats.incr("telemetry_buffered")
+
+        # Only the append that completes a batch takes the lock
+        if len(self._buffer) >= self.config.batch_size and not self._batch_ready:
+            self._signal_batch_ready()
+
+    def _make_room(self, event: Any) -> bool:
+        """
+        Apply queue_full_policy to an event arriving at a full buffer
+
+        Returns True if the event should still be appended, False if it was
+        dropped or diverted to a rollup or the spill spool. Only the block
+        policy ever waits, and never longer than queue_block_timeout.
+        """
+        policy = self.config.queue_full_policy
+
+        if policy == "drop_oldest":
+            try:
+                self._buffer.popleft()
+            except IndexError:  # the worker emptied it meanwhile
+                return True
+            self._stats.incr("telemetry_buffered", -1)
+            self._stats.incr("telemetry_dropped")
+            self._drops.add()
+            return True
+
+        if policy == "rollup":
+            if not isinstance(event, TelemetryEvent):
+                return True  # rollups themselves: at most one per key per window
+            if event.is_sample:
+                # Already counted in a rollup_window rollup
+                self._stats.incr("telemetry_sampled_out")
+                return False
+            self._overflow_rollups.add(event)
+            self._stats.incr("telemetry_rolled_up")
+            return False
+
+        if policy == "spill":
+            try:
+                self._spill.append(json.dumps(event.to_dict(), separators=(",", ":")).encode("utf-8"))
+            except OSError as e:
+                logger.debug(f"Failed to spill telemetry event: {e}")
+            else:
+                self._stats.incr("telemetry_spilled")
+                self._stats.incr("telemetry_buffered")
+                return False
+
+        if policy == "block" and self._wait_for_room():
+            return True
+
+        self._stats.incr("telemetry_dropped")
+        self._drops.add()
+        return False
+
+    def _wait_for_room(self) -> bool:
+        """Wait up to queue_block_timeout for the worker to take a batch"""
+        if threading.current_thread() is self._worker:
+            return False  # the worker is the one that makes room
+
+        deadline = time.monotonic() + self.config.queue_block_timeout
+        with self._space:
+            self._space_waiters += 1
+            try:
+                while len(self._buffer) >= self.config.max_queue_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._space.wait(remaining)
+            finally:
+                self._space_waiters -= 1
+        return True
+
+    def _refill_from_spill(self):
+        """
+        Move spilled events back into the buffer
+
+        Only while the buffer has room and no batch is waiting on a retry,
+        so a backend outage keeps the overflow on disk instead of in memory.
+        """
+        room = self.config.max_queue_size - len(self._buffer)
+        if room <= 0 or len(self._retries):
+            return
+
+        records = self._spill.read(room)
+        if records:
+            self._buffer.extend(SpilledEvent(event) for event in self._decode_records(records))
+            self._spill.commit()
+
+    def _decode_records(self, records: List[bytes]) -> List[Dict[str, Any]]:
+        """
+        Spooled records as event dicts
+
+        Torn or zero-filled records at the tail of a segment are a normal
+        crash artifact; they are counted and skipped so the cursor can move
+        past them instead of failing on the same record after every restart.
+        """
+        events = []
+        for record in records:
+            try:
+                event = json.loads(record)
+            except ValueError:  # JSONDecodeError, UnicodeDecodeError
+                event = None
+            if isinstance(event, dict):
+                events.append(event)
+            else:
+                self._stats.incr("spool_records_skipped")
+        if len(events) < len(records):
+            logger.warning(f"Skipped {len(records) - len(events)} unreadable spooled record(s)")
+        return events
+
+    def _signal_batch_ready(self):
+        """Wake the worker because a full batch is waiting"""
+        with self._cond:
+            self._batch_ready = True
+            self._cond.notify_all()
 
     def _telemetry_worker(self):
-        """Background worker for sending telemetry"""
-        batch: List[TelemetryEvent] = []
-        last_flush = time.time()
+        """
+        Background worker for sending telemetry
+
+        Sleeps on a condition until a full batch is buffered, the flush
+        interval expires, a retry or pricing check is due, or flush() or
+        shutdown() asks for a drain, then drains the buffer in bulk.
+        """
+        deadline = time.monotonic() + self.config.flush_interval
+
+        while True:
+            with self._cond:
+                while not (
+                    self._batch_ready
+                    or self._shutdown.is_set()
+                    or self._flush_requested != self._flush_completed
+                ):
+                    timeout = self._next_wakeup(deadline) - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+
+                self._batch_ready = False
+                flush_target = self._flush_requested
+                stopping = self._shutdown.is_set()
+
+            now = time.monotonic()
+            flushing = stopping or flush_target != self._flush_completed
+            force = flushing or now >= deadline
+            if force:
+                deadline = now + self.config.flush_interval
 
-        while not self._shutdown.is_set():
             try:
-                event = self._telemetry_queue.get(timeout=0.1)
-                batch.append(event)
-                self._telemetry_queue.task_done()
-            except queue.Empty:
-                pass
-
-            should_flush = (
-                len(batch) >= self.config.batch_size or
-                (batch and time.time() - last_flush >= self.config.flush_interval)
-            )
+                self._collect_rollups(force=flushing)
+                self._drain_buffer(force=force, final=flushing)
+
+                # On shutdown, last chance for batches still waiting on backoff
+                for pending in self._retries.pop_all() if stopping else self._retries.pop_due():
+                    self._send_batch(pending.events, pending, final=stopping)
+
+                if self._pricing_source is not None and not stopping:
+                    self._pricing_source.poll()
+                if self._budget_sync is not None and not stopping:
+                    self._budget_sync.poll()
+                if not stopping and now >= self._orphans_due:
+                    self._adopt_orphans()
+            except Exception as e:
+                # One bad batch or record must not end delivery for the process
+                logger.error(f"Telemetry worker iteration failed: {e}", exc_info=True)
+
+            with self._cond:
+                self._flush_completed = flush_target
+                self._flush_undelivered = self._has_undelivered()
+                self._cond.notify_all()
+
+            if stopping:
+                return
+
+    def _next_wakeup(self, deadline: float) -> float:
+        """Monotonic time at which the worker next has something to do"""
+        wakeup = max(deadline, self._spool_backoff_until)
+        for due in (
+            self._retries.next_due(),
+            self._pricing_source.next_due() if self._pricing_source is not None else None,
+            self._budget_sync.next_due() if self._budget_sync is not None else None,
+            self._next_rollup_close(),
+            self._orphans_due if self._spool is not None or self._spill is not None else None,
+        ):
+            if due is not None:
+                wakeup = min(wakeup, due)
+        return wakeup
+
+    def _adopt_orphans(self):
+        """Merge spool and spill directories left by processes that exited since the last sweep"""
+        self._orphans_due = time.monotonic() + self.config.orphan_adopt_interval
+        for spool, root in ((self._spool, self.config.spool_dir), (self._spill, self.config.queue_spill_dir)):
+            if spool is not None:
+                adopted = spool.adopt_orphans(root)
+                if adopted:
+                    logger.info(f"Adopted {adopted} telemetry records left by exited processes in {root}")
+
+    def _next_rollup_close(self) -> Optional[float]:
+        """Monotonic time the oldest open rollup window closes"""
+        closes = []
+        for stage in (self._rollups, self._overflow_rollups):
+            remaining = stage.time_to_next_close() if stage is not None else None
+            if remaining is not None:
+                closes.append(remaining)
+        return time.monotonic() + min(closes) if closes else None
+
+    def _collect_rollups(self, force: bool):
+        """Move closed rollup windows (every window when forced) into the send buffer"""
+        for stage in (self._rollups, self._overflow_rollups):
+            if stage is not None:
+                for rollup in stage.drain(force=force):
+                    self._enqueue(rollup)
+
+    def _drain_buffer(self, force: bool, final: bool = False):
+        """Send full batches, plus the partial remainder when forced"""
+        if self._spool is not None:
+            if final or time.monotonic() >= self._spool_backoff_until:
+                delay = self._drain_spool(force=force)
+                self._spool_backoff_until = time.monotonic() + delay if delay else 0.0
+            return
+
+        if self._buffer:
+            self._stats.observe("queue_depth", len(self._buffer))
+
+        while True:
+            # Spilled events left at shutdown stay on disk for the next client
+            if self._spill is not None and not final:
+                self._refill_from_spill()
+            if not (len(self._buffer) >= self.config.batch_size or (force and self._buffer)):
+                break
+            self._send_batch(self._take_batch())
 
-            if should_flush and batch:
-                self._send_batch(batch)
-                batch = []
-                last_flush = time.time()
+    def _take_batch(self) -> List[TelemetryEvent]:
+        """Pop up to batch_size events off the buffer, waking callers blocked on a full one"""
+        buffer = self._buffer
+        batch = []
+        try:
+            for _ in range(min(self.config.batch_size, len(buffer))):
+                batch.append(buffer.popleft())
+        except IndexError:  # drop_oldest callers pop concurrently
+            pass
 
-        # Final flush on shutdown
-        if batch:
-            self._send_batch(batch)
+        if self._space_waiters:
+            with self._space:
+                self._space.notify_all()
+        return batch
 
-    def _send_batch(self, events: List[TelemetryEvent]):
-        """Send telemetry batch to backend"""
+    def _drain_spool(self, force: bool = True) -> Optional[float]:
+        """
+        Send spooled events in batch_size chunks
+
+        Partial batches are only sent when forced (flush interval elapsed).
+        A batch is committed once delivered or rejected as non-retryable;
+        on a retryable failure the cursor is rewound so it stays on disk.
+        Returns the backoff after a retryable failure, otherwise None.
+        """
+        with self._spool_lock:
+            self._spool.sync()
+
+            while True:
+                records = self._spool.read(self.config.batch_size)
+                if not records or (len(records) < self.config.batch_size and not force):
+                    self._spool.rewind()
+                    return None
+
+                events = self._decode_records(records)
+                if not events:
+                    self._spool.commit()
+                    continue
+
+                try:
+                    self._deliver({"events": events})
+                except Exception as e:
+                    if isinstance(e, TokenTraError) and e.retryable:
+                        self._spool.rewind()
+                        self._spool_attempt += 1
+                        logger.warning(f"Failed to send spooled telemetry, keeping on disk: {e}")
+                        return self._retries.policy.delay(self._spool_attempt, e)
+
+                    self._on_batch_failed(events, e, None, final=True)
+                else:
+                    self._on_batch_sent(events)
+
+                self._spool_attempt = 0
+                self._spool.commit()
+
+    def _send_batch(
+        self,
+        events: List[TelemetryEvent],
+        pending: Optional[PendingBatch] = None,
+        final: bool = False,
+    ):
+        """Send telemetry batch to backend, scheduling a retry on transient failure"""
         try:
-            response = requests.post(
-                f"{self.config.api_url}/api/v1/sdk/ingest",
-                json={"events": [e.to_dict() for e in events]},
-                headers={
-                    "Authorization": f"Bearer {self.config.api_key}",
-                    "Content-Type": "application/json",
-                    "X-SDK-Version": __version__,
-                    "X-SDK-Language": "python",
-                },
-                timeout=self.config.timeout / 1000,
+            self._deliver(self._build_payload(events))
+        except Exception as e:
+            self._on_batch_failed(events, e, pending, final)
+        else:
+            self._on_batch_sent(events)
+
+    def _build_payload(self, events: List[TelemetryEvent]) -> Dict[str, Any]:
+        """Ingest request body"""
+        return {"events": [e.to_dict() for e in events]}
+
+    def _deliver(self, payload: Dict[str, Any]):
+        """POST a payload to the ingest endpoint (or sink), raising TokenTraError on failure"""
+        started = time.perf_counter()
+
+        # Events dropped since the last delivered batch ride along with this one
+        dropped = self._drops.take()
+        if dropped:
+            payload = {**payload, "dropped_events": payload.get("dropped_events", 0) + dropped}
+
+        try:
+            if self._sink is not None:
+                self._sink.write(payload)
+                return
+
+            # Resent only if the endpoint rejected the body format or encoding
+            for _ in range(3):
+                body, encoding_headers = self._encoder.encode(payload)
+                response = self._transport.send(
+                    self._ingest_url(),
+                    body,
+                    {**self._ingest_headers(), **encoding_headers},
+                    self.config.timeout / 1000,
+                )
+                if not self._encoder.negotiate(response, encoding_headers):
+                    break
+
+            if response.status_code >= 400:
+                raise error_from_status(response.status_code, response.headers)
+        except BaseException:
+            self._drops.carry(dropped)
+            raise
+        finally:
+            self._stats.observe("batch_size", len(payload["events"]))
+            self._stats.observe("flush_duration_ms", (time.perf_counter() - started) * 1000)
+
+    def _on_batch_sent(self, events: List[TelemetryEvent]):
+        """Record a delivered batch"""
+        self._stats.incr("telemetry_sent", len(events))
+        self._stats.incr("telemetry_buffered", -len(events))
+        logger.debug(f"Sent {len(events)} telemetry events")
+
+    def _on_batch_failed(
+        self,
+        events: List[TelemetryEvent],
+        error: Exception,
+        pending: Optional[PendingBatch],
+        final: bool,
+    ):
+        """Schedule a failed batch for retry, or record it as dropped"""
+        retry = None if final else self._retries.schedule(events, error, pending)
+
+        if retry is not None:
+            self._stats.incr("telemetry_retried", len(events))
+            logger.debug(
+                f"Telemetry batch failed ({error}), retry {retry.attempt} "
+                f"in {retry.due - time.monotonic():.1f}s"
             )
-            response.raise_for_status()
+        else:
+            self._stats.incr("telemetry_failed", len(events))
+            logger.warning(f"Failed to send telemetry: {error}")
 
-            self._stats["telemetry_sent"] += len(events)
-            self._stats["telemetry_buffered"] -= len(events)
-            logger.debug(f"Sent {len(events)} telemetry events")
+    def _ingest_url(self) -> str:
+        """Telemetry ingest endpoint"""
+        return f"{self.config.api_url}/api/v1/sdk/ingest"
 
-        except Exception as e:
-            self._stats["telemetry_failed"] += len(events)
-            logger.warning(f"Failed to send telemetry: {e}")
+    def _ingest_headers(self) -> Dict[str, str]:
+        """Headers sent with every telemetry batch"""
+        return {
+            "Authorization": f"Bearer {self.config.api_key}",
+            "Content-Type": "application/json",
+            "X-SDK-Version": __version__,
+            "X-SDK-Language": "python",
+        }
 
     def track(
         self,
@@ -436,8 +1301,8 @@ class TokenTra:
         costs = calculate_cost(provider, model, input_tokens, output_tokens)
 
         event = TelemetryEvent(
-            request_id=str(uuid.uuid4()),
-            timestamp=datetime.utcnow().isoformat() + "Z",
+            request_id=new_request_id(),
+            timestamp=time.time_ns(),
             provider=provider,
             model=model,
             input_tokens=input_tokens,
@@ -446,39 +1311,97 @@ class TokenTra:
             input_cost=costs["input_cost"],
             output_cost=costs["output_cost"],
             total_cost=costs["total_cost"],
+            pricing_version=costs["pricing_version"],
             latency_ms=latency_ms,
             **kwargs,
         )
 
         self._queue_telemetry(event)
-        self._stats["requests_tracked"] += 1
+        self._stats.incr("requests_tracked")
 
-    def flush(self):
-        """Flush pending telemetry immediately"""
-        events = []
-        while not self._telemetry_queue.empty():
-            try:
-                events.append(self._telemetry_queue.get_nowait())
-            except queue.Empty:
-                break
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush pending telemetry and wait until the worker has sent it
 
-        if events:
-            self._send_batch(events)
+        Returns False if `timeout` seconds passed first, or if a batch failed
+        and is still waiting to be retried.
+        """
+        if not self._worker.is_alive():
+            self._collect_rollups(force=True)
+            self._drain_buffer(force=True, final=True)
+            return not self._has_undelivered()
+
+        with self._cond:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: self._flush_completed >= target, timeout):
+                return False
+            return not self._flush_undelivered
+
+    def _has_undelivered(self) -> bool:
+        """Whether failed batches are held for retry (in memory or on a backed-off spool)"""
+        return len(self._retries) > 0 or self._spool_backoff_until > 0
 
     def shutdown(self):
-        """Shutdown SDK gracefully"""
+        """Shutdown SDK gracefully (safe to call more than once)"""
+        if self._released:
+            return
         logger.info("Shutting down TokenTra SDK...")
-        self._shutdown.set()
+        _live_clients.discard(self)
+        with self._cond:
+            self._shutdown.set()
+            self._cond.notify_all()
         self._worker.join(timeout=5)
-        self.flush()
+
+        if self._worker.is_alive():
+            logger.warning("Telemetry worker did not stop in time, pending telemetry may be lost")
+        else:
+            # Events queued while the worker was stopping
+            self._collect_rollups(force=True)
+            self._drain_buffer(force=True, final=True)
+
+        if self._spool is not None:
+            self._spool.close()
+        if self._spill is not None:
+            self._spill.close()
+        if self._pricing_source is not None:
+            self._pricing_source.close()
+        if self._budget_sync is not None:
+            self._budget_sync.close()
+        if self._cache is not None:
+            self._cache.close()
+        if self._sink is not None:
+            self._sink.close()
+        self._transport.close()
+        self._released = True
         logger.info("TokenTra SDK shutdown complete")
 
-    def get_stats(self) -> Dict[str, int]:
-        """Get SDK statistics"""
-        return self._stats.copy()
+    def get_stats(self) -> Dict[str, Any]:
+        """Get SDK statistics (counters plus histogram summaries)"""
+        stats: Dict[str, Any] = self._stats.counters()
+        stats["histograms"] = self._stats.histograms()
+        return stats
+
+    def render_metrics(self, prefix: str = "tokentra") -> str:
+        """SDK statistics in OpenMetrics / Prometheus text exposition format"""
+        return self._stats.render_openmetrics(prefix)
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.shutdown()
+
+
+# Clients to re-arm in forked children (prefork servers, multiprocessing)
+_live_clients: "weakref.WeakSet[TokenTra]" = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for client in list(_live_clients):
+        client._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,80 @@
+"""
+Columnar batch encoding
+Ingest batches as msgpack columns, with repeated strings dictionary-encoded
+"""
+
+import itertools
+from typing import Any, Dict, List
+
+try:
+    import msgpack as _msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    _msgpack = None
+
+COLUMNAR_CONTENT_TYPE = "application/vnd.tokentra.columnar+msgpack"
+COLUMNAR_VERSION = 1
+
+# A string column is dictionary-encoded when it has at most 1/4 as many
+# distinct values as rows (provider, model, feature, team, ...)
+_DICTIONARY_RATIO = 4
+
+
+def to_columns(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Pivot a list of event dicts into columns
+
+    Every key seen in any item becomes a column with one value per row
+    (None where the item lacks the key). Low-cardinality string columns
+    become {"values": [distinct...], "codes": [index or None per row]};
+    all others are plain lists.
+    """
+    columns: Dict[str, Any] = {}
+    for name in dict.fromkeys(itertools.chain.from_iterable(items)):
+        values = [item.get(name) for item in items]
+        columns[name] = _dictionary_encode(values) or values
+    return {"version": COLUMNAR_VERSION, "count": len(items), "columns": columns}
+
+
+def _dictionary_encode(values: List[Any]) -> Any:
+    try:
+        distinct = set(values)
+    except TypeError:  # dicts / lists (metadata, rollup sketches)
+        return None
+
+    distinct.discard(None)
+    if len(distinct) * _DICTIONARY_RATIO > len(values) or not all(type(v) is str for v in distinct):
+        return None
+
+    dictionary = sorted(distinct)
+    index = {value: i for i, value in enumerate(dictionary)}
+    index[None] = None
+    return {"values": dictionary, "codes": [index[value] for value in values]}
+
+
+def from_columns(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild the event dicts from to_columns() output, omitting None values"""
+    count = document["count"]
+    items: List[Dict[str, Any]] = [{} for _ in range(count)]
+
+    for name, column in document["columns"].items():
+        if isinstance(column, dict):
+            dictionary = column["values"]
+            column = [None if code is None else dictionary[code] for code in column["codes"]]
+        for item, value in zip(items, column):
+            if value is not None:
+                item[name] = value
+    return items
+
+
+def encode_columnar(payload: Dict[str, Any]) -> bytes:
+    """msgpack body for an ingest payload, with its "events" list pivoted to columns"""
+    document = dict(payload)
+    document["events"] = to_columns(payload["events"])
+    return _msgpack.packb(document, use_bin_type=True)
+
+
+def decode_columnar(body: bytes) -> Dict[str, Any]:
+    """Inverse of encode_columnar"""
+    payload = _msgpack.unpackb(body, raw=False)
+    payload["events"] = from_columns(payload["events"])
+    return payload
@@ -2,24 +2,30 @@
 TokenTra SDK Errors
 """
 
-from typing import Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
 
 
 class TokenTraError(Exception):
     """Base exception for TokenTra SDK errors"""
 
+    retry_after: Optional[float] = None  # seconds to wait before retrying, if the server said
+
     def __init__(
         self,
         code: str,
         message: str,
         cause: Optional[Exception] = None,
         retryable: bool = False,
+        retry_after: Optional[float] = None,
     ):
         super().__init__(message)
         self.code = code
         self.message = message
         self.cause = cause
         self.retryable = retryable
+        self.retry_after = retry_after
 
     def __str__(self) -> str:
         return f"[{self.code}] {self.message}"
@@ -35,16 +41,29 @@ class InvalidApiKeyError(TokenTraError):
 class RateLimitError(TokenTraError):
     """Raised when rate limit is exceeded"""
 
-    def __init__(self, message: str = "Rate limit exceeded", retry_after: int = 60):
-        super().__init__("RATE_LIMIT_EXCEEDED", message, retryable=True)
-        self.retry_after = retry_after
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: float = 60):
+        super().__init__("RATE_LIMIT_EXCEEDED", message, retryable=True, retry_after=retry_after)
+
+
+class BudgetExceededError(TokenTraError):
+    """Raised before a wrapped call when a local spend budget is exhausted"""
+
+    def __init__(self, budget: str, retry_after: float):
+        super().__init__(
+            "BUDGET_EXCEEDED",
+            f"Budget '{budget}' exhausted; next spend allowed in {retry_after:.1f}s",
+            retry_after=retry_after,
+        )
+        self.budget = budget
 
 
 class NetworkError(TokenTraError):
     """Raised on network failures"""
 
-    def __init__(self, message: str, cause: Optional[Exception] = None):
-        super().__init__("NETWORK_ERROR", message, cause=cause, retryable=True)
+    def __init__(
+        self, message: str, cause: Optional[Exception] = None, retry_after: Optional[float] = None
+    ):
+        super().__init__("NETWORK_ERROR", message, cause=cause, retryable=True, retry_after=retry_after)
 
 
 class TimeoutError(TokenTraError):
@@ -52,3 +71,37 @@ class TimeoutError(TokenTraError):
 
     def __init__(self, message: str = "Request timed out"):
         super().__init__("TIMEOUT", message, retryable=True)
+
+
+def parse_retry_after(value: Optional[str], default: int = 60) -> int:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return default
+
+    try:
+        return max(0, int(float(value)))
+    except ValueError:
+        pass
+
+    try:
+        delta = parsedate_to_datetime(value) - datetime.now(timezone.utc)
+        return max(0, int(delta.total_seconds()))
+    except (TypeError, ValueError):
+        return default
+
+
+def error_from_status(status_code: int, headers: Optional[Mapping[str, str]] = None) -> TokenTraError:
+    """Classify a failed ingest HTTP response"""
+    headers = headers or {}
+
+    if status_code == 429:
+        return RateLimitError(retry_after=parse_retry_after(headers.get("Retry-After")))
+    if status_code in (401, 403):
+        return InvalidApiKeyError(f"Ingest rejected API key (HTTP {status_code})")
+    if status_code in (408, 504):
+        return TimeoutError(f"Ingest timed out (HTTP {status_code})")
+    if status_code >= 500:
+        retry_after = parse_retry_after(headers["Retry-After"]) if "Retry-After" in headers else None
+        return NetworkError(f"Ingest returned HTTP {status_code}", retry_after=retry_after)
+
+    return TokenTraError("HTTP_ERROR", f"Ingest returned HTTP {status_code}")
@@ -0,0 +1,190 @@
+"""
+Pre-flight token and cost estimation
+Count prompt tokens locally and price them without calling the provider
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .pricing import calculate_cost, calculate_costs_bulk
+
+try:
+    import tiktoken as _tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    _tiktoken = None
+
+# (model, text) -> token count
+TokenCounter = Callable[[str, str], int]
+
+# Chat formatting overhead per message, and for priming the reply (OpenAI's figures)
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_OVERHEAD_TOKENS = 3
+
+# Only strings up to this length are memoized: system prompts and templates
+# repeat, long user prompts rarely do and would pin megabytes in the cache
+MEMO_MAX_CHARS = 2048
+
+_tokenizers: Dict[str, TokenCounter] = {}
+
+
+def register_tokenizer(provider: str, counter: TokenCounter):
+    """Use `counter(model, text)` to count tokens for a provider"""
+    _tokenizers[provider] = counter
+    _count_memo.cache_clear()
+
+
+def heuristic_tokens(model: str, text: str) -> int:
+    """Tokenizer-free estimate: ~4 characters per token, one per non-ASCII character"""
+    if text.isascii():
+        return (len(text) + 3) // 4
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+if _tiktoken is not None:
+    _encodings: Dict[str, Any] = {}
+
+    def _tiktoken_tokens(model: str, text: str) -> int:
+        encoding = _encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = _tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = _tiktoken.get_encoding("o200k_base")
+            _encodings[model] = encoding
+        return len(encoding.encode(text, disallowed_special=()))
+
+    _tokenizers["openai"] = _tiktoken_tokens
+
+
+@lru_cache(maxsize=4096)
+def _count_memo(provider: str, model: str, text: str) -> int:
+    return _tokenizers.get(provider, heuristic_tokens)(model, text)
+
+
+def _count_cached(provider: str, model: str, text: str) -> int:
+    if len(text) > MEMO_MAX_CHARS:
+        return _tokenizers.get(provider, heuristic_tokens)(model, text)
+    return _count_memo(provider, model, text)
+
+
+def count_tokens(provider: str, model: str, text: str) -> int:
+    """Token count of one string (short strings are memoized, so repeated system prompts are free)"""
+    return _count_cached(provider, model, text)
+
+
+def count_message_tokens(
+    provider: str,
+    model: str,
+    messages: Optional[Sequence[Any]] = None,
+    system: Optional[Any] = None,
+) -> int:
+    """Prompt tokens of a chat request, including per-message formatting overhead"""
+    total = 0
+    if system is not None:
+        total += _content_tokens(provider, model, system) + MESSAGE_OVERHEAD_TOKENS
+
+    for message in messages or ():
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        total += _content_tokens(provider, model, content) + MESSAGE_OVERHEAD_TOKENS
+
+    if messages:
+        total += REPLY_OVERHEAD_TOKENS
+    return total
+
+
+def _content_tokens(provider: str, model: str, content: Any) -> int:
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return _count_cached(provider, model, content)
+    if isinstance(content, (list, tuple)):
+        total = 0
+        for part in content:
+            if isinstance(part, str):
+                total += _count_cached(provider, model, part)
+            elif isinstance(part, dict) and isinstance(part.get("text"), str):
+                total += _count_cached(provider, model, part["text"])
+        return total
+    return _count_cached(provider, model, str(content))
+
+
+def estimate(
+    provider: str,
+    model: str,
+    messages: Optional[Sequence[Any]] = None,
+    max_tokens: int = 0,
+    system: Optional[Any] = None,
+    prompt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Estimate tokens and cost of a request before sending it
+
+    Pass chat `messages` (and Anthropic's `system`) or a plain `prompt`.
+    Output is priced at `max_tokens`, so total_cost is an upper bound.
+    """
+    input_tokens = count_message_tokens(provider, model, messages, system)
+    if prompt is not None:
+        input_tokens += _count_cached(provider, model, prompt)
+
+    costs = calculate_cost(provider, model, input_tokens, max_tokens)
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": max_tokens,
+        "input_cost": costs["input_cost"],
+        "output_cost": costs["output_cost"],
+        "total_cost": costs["total_cost"],
+        "pricing_version": costs["pricing_version"],
+    }
+
+
+def estimate_batch(
+    provider: str,
+    model: str,
+    requests: Iterable[Any],
+    max_tokens: int = 0,
+) -> Dict[str, Any]:
+    """
+    Estimate many requests at once
+
+    Each request is a list of messages, a prompt string, or a dict with
+    "messages" / "system" / "prompt" / "max_tokens". Returns per-request
+    columns (input_tokens, output_tokens, costs) as lists, plus totals;
+    pricing is resolved once through calculate_costs_bulk.
+    """
+    input_tokens: List[int] = []
+    output_tokens: List[int] = []
+
+    for request in requests:
+        if isinstance(request, str):
+            tokens, out = _count_cached(provider, model, request), max_tokens
+        elif isinstance(request, dict):
+            tokens = count_message_tokens(
+                provider, model, request.get("messages"), request.get("system")
+            )
+            if request.get("prompt") is not None:
+                tokens += _count_cached(provider, model, request["prompt"])
+            out = request.get("max_tokens", max_tokens)
+        else:
+            tokens, out = count_message_tokens(provider, model, request), max_tokens
+        input_tokens.append(tokens)
+        output_tokens.append(out)
+
+    costs = calculate_costs_bulk(provider, model, input_tokens, output_tokens)
+    total_cost = _as_list(costs["total_cost"])
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "input_cost": _as_list(costs["input_cost"]),
+        "output_cost": _as_list(costs["output_cost"]),
+        "total_cost": total_cost,
+        "total_input_tokens": sum(input_tokens),
+        "total_output_tokens": sum(output_tokens),
+        "total": float(sum(total_cost)),
+        "pricing_version": costs["pricing_version"],
+    }
+
+
+def _as_list(column: Any) -> List[float]:
+    """Cost column as a list of floats (calculate_costs_bulk returns arrays with NumPy)"""
+    return column.tolist() if hasattr(column, "tolist") else list(column)
@@ -0,0 +1,72 @@
+"""
+Event identity and timestamps
+Time-ordered request ids and raw timestamps, formatted only when serialized
+"""
+
+import itertools
+import os
+import time
+from typing import Union
+
+_COUNTER_MASK = (1 << 44) - 1
+
+_node = 0
+_counter = itertools.count()
+
+
+def _reseed():
+    """Pick a new per-process random node (at import and in forked children)"""
+    global _node, _counter
+    _node = int.from_bytes(os.urandom(4), "big") & ((1 << 30) - 1)
+    _counter = itertools.count()
+
+
+_reseed()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def new_request_id(now_ns: int = 0) -> int:
+    """
+    UUIDv7 as a 128-bit int
+
+    48-bit Unix milliseconds, then a 44-bit per-process sequence (split
+    around the version and variant bits) and a 30-bit random process node.
+    Ids sort by creation time and need no syscall or formatting; to_dict()
+    renders them as the usual hyphenated string.
+    """
+    seq = next(_counter) & _COUNTER_MASK
+    ms = (now_ns or time.time_ns()) // 1_000_000
+    return (
+        (ms & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76
+        | (seq >> 32) << 64
+        | 0b10 << 62
+        | _node << 32
+        | (seq & 0xFFFFFFFF)
+    )
+
+
+def format_request_id(value: Union[int, str]) -> str:
+    if not isinstance(value, int):
+        return value
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# (second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp
+_last_second = (-1, "")
+
+
+def format_timestamp(value: Union[int, str]) -> str:
+    """ISO 8601 UTC with microseconds for a time.time_ns() value"""
+    global _last_second
+    if not isinstance(value, int):
+        return value
+
+    seconds, ns = divmod(value, 1_000_000_000)
+    cached = _last_second
+    if cached[0] != seconds:
+        cached = (seconds, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)))
+        _last_second = cached
+    return f"{cached[1]}.{ns // 1000:06d}Z"
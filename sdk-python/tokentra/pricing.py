@@ -1,8 +1,31 @@
 """
 Pricing tables for cost calculation
 Updated: December 2025
+
+The built-in tables can be replaced at runtime from a versioned JSON or
+msgpack file (load_pricing / set_pricing). Swaps are a single reference
+assignment, so calculate_cost() never takes a lock.
 """
 
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import requests
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger("tokentra")
+
+PRICING_VERSION = "builtin-2025-12.1"
+
 # Prices are per 1M tokens
 PRICING_TABLES = {
     "openai": {
@@ -15,6 +38,9 @@ PRICING_TABLES = {
         "o1-mini": {"input_per_1m": 3.0, "output_per_1m": 12.0},
         "o1-pro": {"input_per_1m": 150.0, "output_per_1m": 600.0},
         "o3-mini": {"input_per_1m": 1.1, "output_per_1m": 4.4},
+        "text-embedding-3-small": {"input_per_1m": 0.02, "output_per_1m": 0.0},
+        "text-embedding-3-large": {"input_per_1m": 0.13, "output_per_1m": 0.0},
+        "text-embedding-ada-002": {"input_per_1m": 0.1, "output_per_1m": 0.0},
     },
     "anthropic": {
         "claude-3-5-sonnet-20241022": {"input_per_1m": 3.0, "output_per_1m": 15.0, "cached_per_1m": 0.3},
@@ -27,6 +53,8 @@ PRICING_TABLES = {
         "gemini-2.0-flash": {"input_per_1m": 0.1, "output_per_1m": 0.4},
         "gemini-1.5-pro": {"input_per_1m": 1.25, "output_per_1m": 5.0},
         "gemini-1.5-flash": {"input_per_1m": 0.075, "output_per_1m": 0.3},
+        "gemini-embedding-001": {"input_per_1m": 0.15, "output_per_1m": 0.0},
+        "text-embedding-004": {"input_per_1m": 0.0, "output_per_1m": 0.0},
     },
     "xai": {
         "grok-2": {"input_per_1m": 2.0, "output_per_1m": 10.0},
@@ -39,10 +67,16 @@ PRICING_TABLES = {
     "mistral": {
         "mistral-large": {"input_per_1m": 2.0, "output_per_1m": 6.0},
         "mistral-small": {"input_per_1m": 0.2, "output_per_1m": 0.6},
+        "mistral-embed": {"input_per_1m": 0.1, "output_per_1m": 0.0},
     },
     "cohere": {
         "command-r-plus": {"input_per_1m": 2.5, "output_per_1m": 10.0},
         "command-r": {"input_per_1m": 0.15, "output_per_1m": 0.6},
+        "embed-v4.0": {"input_per_1m": 0.12, "output_per_1m": 0.0},
+        "embed-english-v3.0": {"input_per_1m": 0.1, "output_per_1m": 0.0},
+        "embed-multilingual-v3.0": {"input_per_1m": 0.1, "output_per_1m": 0.0},
+        "embed-english-light-v3.0": {"input_per_1m": 0.1, "output_per_1m": 0.0},
+        "embed-multilingual-light-v3.0": {"input_per_1m": 0.1, "output_per_1m": 0.0},
     },
     "groq": {
         "llama-3.3-70b": {"input_per_1m": 0.59, "output_per_1m": 0.79},
@@ -51,6 +85,267 @@ PRICING_TABLES = {
 }
 
 
+_BOUNDARY = "-:@"
+
+
+@dataclass(frozen=True)
+class ModelPricing:
+    """Resolved prices for one model, per 1M tokens"""
+
+    model: str  # pricing table key that matched
+    input_per_1m: float
+    output_per_1m: float
+    cached_per_1m: float = 0.0
+
+
+DEFAULT_PRICING = ModelPricing("default", 1.0, 3.0, 0.1)
+
+
+class PricingIndex:
+    """
+    Precompiled model lookup over a pricing table
+
+    Resolution order for a (provider, model) pair:
+        1. exact key (case-insensitive)
+        2. longest key that prefixes the model at a "-", ":" or "@"
+           boundary, e.g. "gpt-4o-mini-2024-07-18" -> "gpt-4o-mini"
+        3. shortest key the model abbreviates, e.g. "claude-3-5-sonnet"
+        4. longest key contained in the model, e.g. "openai/gpt-4o"
+        5. DEFAULT_PRICING
+
+    Results are memoized in a bounded LRU cache, so steady-state lookups
+    are a single dict hit.
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, Dict[str, Dict[str, float]]],
+        version: str = PRICING_VERSION,
+        default: ModelPricing = DEFAULT_PRICING,
+        cache_size: int = 4096,
+    ):
+        self.version = version
+        self.default = default
+        self._models: Dict[str, Dict[str, ModelPricing]] = {}
+        self._prefix_lengths: Dict[str, Tuple[int, ...]] = {}
+
+        for provider, models in tables.items():
+            compiled = {
+                key.lower(): ModelPricing(
+                    key,
+                    prices["input_per_1m"],
+                    prices["output_per_1m"],
+                    prices.get("cached_per_1m", 0.0),
+                )
+                for key, prices in models.items()
+            }
+            self._models[provider.lower()] = compiled
+            self._prefix_lengths[provider.lower()] = tuple(
+                sorted({len(key) for key in compiled}, reverse=True)
+            )
+
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, provider: str, model: str) -> ModelPricing:
+        provider = provider.lower()
+        models = self._models.get(provider)
+        if not models:
+            return self.default
+
+        name = model.lower()
+        pricing = models.get(name)
+        if pricing:
+            return pricing
+
+        for length in self._prefix_lengths[provider]:
+            if length < len(name) and name[length] in _BOUNDARY:
+                pricing = models.get(name[:length])
+                if pricing:
+                    return pricing
+
+        for key in sorted(models, key=lambda k: (len(k), k)):
+            if key.startswith(name):
+                return models[key]
+
+        for key in sorted(models, key=lambda k: (-len(k), k)):
+            if key in name:
+                return models[key]
+
+        return self.default
+
+
+_index = PricingIndex(PRICING_TABLES)
+
+
+def refresh_pricing_index():
+    """Recompile the lookup index after editing PRICING_TABLES in place"""
+    set_pricing(PricingIndex(PRICING_TABLES))
+
+
+def parse_pricing(document: Dict[str, Any]) -> PricingIndex:
+    """
+    Build an index from a pricing document
+
+    Format:
+        {
+            "version": "2026-01-15",
+            "providers": {"openai": {"gpt-4o": {"input_per_1m": 2.5, ...}}},
+            "default": {"input_per_1m": 1.0, "output_per_1m": 3.0}   # optional
+        }
+    """
+    if "version" not in document or "providers" not in document:
+        raise ValueError("Pricing document requires 'version' and 'providers'")
+
+    default = DEFAULT_PRICING
+    if document.get("default"):
+        prices = document["default"]
+        default = ModelPricing(
+            "default",
+            prices["input_per_1m"],
+            prices["output_per_1m"],
+            prices.get("cached_per_1m", 0.0),
+        )
+
+    return PricingIndex(document["providers"], version=str(document["version"]), default=default)
+
+
+def load_pricing(path: str) -> PricingIndex:
+    """Load a pricing document from a .json or .msgpack file"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if path.endswith((".msgpack", ".mpk")):
+        import msgpack
+
+        return parse_pricing(msgpack.unpackb(data, raw=False))
+    return parse_pricing(json.loads(data))
+
+
+def set_pricing(index: PricingIndex):
+    """Atomically make `index` the active pricing for all calculations"""
+    global _index
+    _index = index
+
+
+def get_pricing_version() -> str:
+    """Version of the active pricing tables"""
+    return _index.version
+
+
+class PricingSource:
+    """
+    Keeps the active pricing in sync with a local file and/or the backend
+
+    The file is reloaded when its mtime changes; the URL is polled with
+    If-None-Match so unchanged tables cost a 304. poll() returns quickly
+    when no check is due, so the telemetry worker can call it every loop.
+    Failed loads are logged and the current pricing stays active.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        interval: float = 60.0,
+        timeout: float = 10.0,
+    ):
+        self.path = path
+        self.url = url
+        self.api_key = api_key
+        self.interval = interval
+        self.timeout = timeout
+        self._mtime: Optional[int] = None
+        self._etag: Optional[str] = None
+        self._next_file_check = 0.0
+        self._next_url_check = 0.0
+        self._session: Optional[requests.Session] = None
+
+    def due(self) -> bool:
+        """Whether poll() has any work to do right now"""
+        now = time.monotonic()
+        return bool(
+            (self.path and now >= self._next_file_check)
+            or (self.url and now >= self._next_url_check)
+        )
+
+    def next_due(self, remote: bool = True) -> Optional[float]:
+        """Monotonic time of the next scheduled check, None if nothing to watch"""
+        checks = []
+        if self.path:
+            checks.append(self._next_file_check)
+        if remote and self.url:
+            checks.append(self._next_url_check)
+        return min(checks, default=None)
+
+    def poll(self, remote: bool = True) -> bool:
+        """Reload pricing if a check is due; returns True if pricing changed"""
+        now = time.monotonic()
+        changed = False
+
+        if self.path and now >= self._next_file_check:
+            self._next_file_check = now + self.interval
+            changed = self._check_file() or changed
+
+        if remote and self.url and now >= self._next_url_check:
+            self._next_url_check = now + self.interval
+            changed = self._check_url() or changed
+
+        return changed
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def after_fork(self):
+        """Drop the parent's HTTP session in a forked child"""
+        self._session = None
+
+    def _check_file(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            index = load_pricing(self.path)
+        except Exception as e:
+            logger.warning(f"Failed to load pricing from {self.path}: {e}")
+            return False
+
+        self._mtime = mtime
+        set_pricing(index)
+        logger.info(f"Loaded pricing {index.version} from {self.path}")
+        return True
+
+    def _check_url(self) -> bool:
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+
+        try:
+            if self._session is None:
+                self._session = requests.Session()
+            response = self._session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+            index = parse_pricing(response.json())
+        except Exception as e:
+            logger.warning(f"Failed to refresh pricing from {self.url}: {e}")
+            return False
+
+        self._etag = response.headers.get("ETag")
+        set_pricing(index)
+        logger.info(f"Loaded pricing {index.version} from {self.url}")
+        return True
+
+
+def get_pricing(provider: str, model: str) -> ModelPricing:
+    """Resolve the pricing record used for a provider/model pair"""
+    return _index.resolve(provider, model)
+
+
 def calculate_cost(
     provider: str,
     model: str,
@@ -59,30 +354,112 @@ def calculate_cost(
     cached_tokens: int = 0,
 ) -> dict:
     """Calculate cost from token counts"""
-    provider_pricing = PRICING_TABLES.get(provider.lower(), {})
-    pricing = provider_pricing.get(model)
-
-    # Try partial match if exact match not found
-    if not pricing:
-        for model_key, model_pricing in provider_pricing.items():
-            if model_key in model.lower() or model.lower() in model_key:
-                pricing = model_pricing
-                break
-
-    # Default pricing if not found
-    if not pricing:
-        pricing = {"input_per_1m": 1.0, "output_per_1m": 3.0, "cached_per_1m": 0.1}
-
-    input_cost = (input_tokens / 1_000_000) * pricing["input_per_1m"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output_per_1m"]
+    index = _index
+    pricing = index.resolve(provider, model)
+
+    input_cost = (input_tokens / 1_000_000) * pricing.input_per_1m
+    output_cost = (output_tokens / 1_000_000) * pricing.output_per_1m
     cached_cost = 0.0
 
-    if cached_tokens and pricing.get("cached_per_1m"):
-        cached_cost = (cached_tokens / 1_000_000) * pricing["cached_per_1m"]
+    if cached_tokens and pricing.cached_per_1m:
+        cached_cost = (cached_tokens / 1_000_000) * pricing.cached_per_1m
+
+    return {
+        "input_cost": input_cost,
+        "output_cost": output_cost,
+        "cached_cost": cached_cost,
+        "total_cost": input_cost + output_cost + cached_cost,
+        "pricing_version": index.version,
+    }
+
+
+def calculate_costs_bulk(
+    provider: str,
+    models: Union[str, Sequence[str]],
+    input_tokens: Sequence[int],
+    output_tokens: Sequence[int],
+    cached_tokens: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Calculate costs for many rows in one pass
+
+    `models` is either one model name for every row or a per-row sequence.
+    Each distinct model is resolved once. With NumPy installed the token
+    columns may be arrays and every cost column is computed vectorized,
+    returning float64 arrays; otherwise lists are returned. Values match
+    calculate_cost() row for row.
+    """
+    index = _index
+    if np is not None:
+        return _calculate_costs_numpy(
+            index, provider, models, input_tokens, output_tokens, cached_tokens
+        )
+
+    rows = len(input_tokens)
+    if isinstance(models, str):
+        models = [models] * rows
+    if cached_tokens is None:
+        cached_tokens = [0] * rows
+
+    resolve = index.resolve
+    input_cost, output_cost, cached_cost, total_cost = [], [], [], []
+
+    for model, inp, out, cached in zip(models, input_tokens, output_tokens, cached_tokens):
+        pricing = resolve(provider, model)
+        i = (inp / 1_000_000) * pricing.input_per_1m
+        o = (out / 1_000_000) * pricing.output_per_1m
+        c = (cached / 1_000_000) * pricing.cached_per_1m if cached else 0.0
+        input_cost.append(i)
+        output_cost.append(o)
+        cached_cost.append(c)
+        total_cost.append(i + o + c)
+
+    return {
+        "input_cost": input_cost,
+        "output_cost": output_cost,
+        "cached_cost": cached_cost,
+        "total_cost": total_cost,
+        "pricing_version": index.version,
+    }
+
+
+def _calculate_costs_numpy(index, provider, models, input_tokens, output_tokens, cached_tokens):
+    """Vectorized calculate_costs_bulk(): factorize models, gather rates, multiply columns"""
+    input_tokens = np.asarray(input_tokens, dtype=np.float64)
+    output_tokens = np.asarray(output_tokens, dtype=np.float64)
+    rows = len(input_tokens)
+
+    if isinstance(models, str):
+        pricing = [index.resolve(provider, models)]
+        codes = np.zeros(rows, dtype=np.intp)
+    else:
+        if isinstance(models, np.ndarray):
+            # Native str iterates far faster than np.str_ scalars
+            models = models.tolist()
+
+        # Dict factorization is O(n); np.unique would sort every string
+        seen: Dict[str, int] = {}
+        codes = np.fromiter(
+            (seen.setdefault(model, len(seen)) for model in models), dtype=np.intp, count=rows
+        )
+        pricing = [index.resolve(provider, model) for model in seen]
+
+    input_rates = np.array([p.input_per_1m for p in pricing])[codes]
+    output_rates = np.array([p.output_per_1m for p in pricing])[codes]
+
+    input_cost = (input_tokens / 1_000_000) * input_rates
+    output_cost = (output_tokens / 1_000_000) * output_rates
+
+    if cached_tokens is None:
+        cached_cost = np.zeros(rows)
+    else:
+        cached_rates = np.array([p.cached_per_1m for p in pricing])[codes]
+        cached_cost = (np.asarray(cached_tokens, dtype=np.float64) / 1_000_000) * cached_rates
 
     return {
         "input_cost": input_cost,
         "output_cost": output_cost,
         "cached_cost": cached_cost,
         "total_cost": input_cost + output_cost + cached_cost,
+        "pricing_version": index.version,
     }
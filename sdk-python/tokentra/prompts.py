@@ -0,0 +1,117 @@
+"""
+Prompt fingerprinting
+Keyed request hashes and a bounded repeat sketch for cache-opportunity detection
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+_FIELD = b"\x1e"  # separates message fields in the hash stream
+_PART = b"\x1f"  # separates content parts
+
+# Request kwargs that carry prompt content, across chat, messages, completions,
+# embeddings and responses APIs
+_PROMPT_KWARGS = ("system", "instructions", "prompt", "input")
+
+
+class PromptHasher:
+    """
+    Fast, keyed 64-bit fingerprint of a request's prompt
+
+    The prompt is fed to blake2b piece by piece (model, system prompt, then
+    each message's role and content) without serializing the request. The
+    hash is keyed per API key so fingerprints cannot be matched against
+    guessed prompts by anyone without the key.
+    """
+
+    def __init__(self, secret: str):
+        key = hashlib.blake2b(secret.encode("utf-8"), digest_size=32).digest()
+        # Keyed state is set up once; each hash starts from a copy
+        self._base = hashlib.blake2b(digest_size=8, key=key)
+
+    def hash(self, model: str, kwargs: Dict[str, Any]) -> str:
+        h = self._base.copy()
+        update = h.update
+        update(model.encode("utf-8"))
+
+        for name in _PROMPT_KWARGS:
+            value = kwargs.get(name)
+            if value is not None:
+                _feed(update, name, value)
+
+        for message in kwargs.get("messages") or ():
+            if isinstance(message, dict):
+                _feed(update, message.get("role") or "", message.get("content"))
+            else:
+                _feed(update, getattr(message, "role", "") or "", getattr(message, "content", None))
+
+        return h.hexdigest()
+
+
+def _feed(update: Callable[[bytes], None], tag: str, content: Any):
+    update(_FIELD)
+    update(tag.encode("utf-8"))
+
+    if isinstance(content, str):
+        update(_PART)
+        update(content.encode("utf-8"))
+    elif isinstance(content, (list, tuple)):
+        for part in content:
+            update(_PART)
+            if isinstance(part, str):
+                update(part.encode("utf-8"))
+            elif isinstance(part, dict) and isinstance(part.get("text"), str):
+                update(part["text"].encode("utf-8"))
+            else:
+                # Images, tool results, token arrays: small, so serialize them
+                update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+    elif content is not None:
+        update(_PART)
+        update(json.dumps(content, sort_keys=True, default=str).encode("utf-8"))
+
+
+class RepeatSketch:
+    """
+    Bounded LRU of recently seen prompt hashes
+
+    observe() returns how often a hash was seen before while it stayed in
+    the window of the `capacity` most recently used prompts.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, prompt_hash: str) -> int:
+        with self._lock:
+            previous = self._counts.get(prompt_hash, 0)
+            self._counts[prompt_hash] = previous + 1
+            if previous:
+                self._counts.move_to_end(prompt_hash)
+            elif len(self._counts) > self.capacity:
+                self._counts.popitem(last=False)
+        return previous
+
+
+class PromptTracker:
+    """Fingerprints requests and flags prompts that were recently sent before"""
+
+    def __init__(self, secret: str, capacity: int = 10000, include_hash: bool = True):
+        self.hasher = PromptHasher(secret)
+        self.sketch = RepeatSketch(capacity)
+        self.include_hash = include_hash
+
+    def fields(self, model: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """TelemetryEvent fields for this request"""
+        prompt_hash = self.hasher.hash(model, kwargs)
+        result: Dict[str, Any] = {}
+        if self.include_hash:
+            result["prompt_hash"] = prompt_hash
+        if self.sketch.observe(prompt_hash):
+            result["cache_opportunity"] = True
+        return result
+
@@ -0,0 +1,296 @@
+"""
+Provider adapters
+How each AI client is detected, which of its methods are wrapped and how usage is read
+"""
+
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .estimation import count_tokens
+
+# response -> {"input": int, "output": int[, "cached": int]}
+UsageExtractor = Callable[[Any], Dict[str, int]]
+
+# request kwargs -> input tokens, for responses that report no usage
+InputCounter = Callable[[Dict[str, Any]], int]
+
+
+def chat_usage(response: Any) -> Dict[str, int]:
+    """OpenAI-style usage (chat and legacy completions, embeddings, Mistral, Groq)"""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return {"input": 0, "output": 0}
+
+    return {
+        "input": getattr(usage, "prompt_tokens", 0) or 0,
+        "output": getattr(usage, "completion_tokens", 0) or 0,
+    }
+
+
+def responses_usage(response: Any) -> Dict[str, int]:
+    """OpenAI Responses API usage"""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return {"input": 0, "output": 0}
+
+    return {
+        "input": getattr(usage, "input_tokens", 0) or 0,
+        "output": getattr(usage, "output_tokens", 0) or 0,
+    }
+
+
+def anthropic_usage(response: Any) -> Dict[str, int]:
+    """Anthropic usage; cache reads are billed separately from input tokens"""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return {"input": 0, "output": 0}
+
+    return {
+        "input": getattr(usage, "input_tokens", 0) or 0,
+        "output": getattr(usage, "output_tokens", 0) or 0,
+        "cached": getattr(usage, "cache_read_input_tokens", 0) or 0,
+    }
+
+
+def google_usage(response: Any) -> Dict[str, int]:
+    """Gemini usage_metadata; thinking tokens are billed as output"""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return {"input": 0, "output": 0}
+
+    return {
+        "input": getattr(usage, "prompt_token_count", 0) or 0,
+        "output": (getattr(usage, "candidates_token_count", 0) or 0)
+        + (getattr(usage, "thoughts_token_count", 0) or 0),
+    }
+
+
+def google_embed_usage(response: Any) -> Dict[str, int]:
+    """Gemini embeddings: per-embedding token counts (Vertex AI) or usage_metadata"""
+    counts = [
+        getattr(getattr(embedding, "statistics", None), "token_count", None)
+        for embedding in getattr(response, "embeddings", None) or ()
+    ]
+    if counts and all(count is not None for count in counts):
+        return {"input": int(sum(counts)), "output": 0}
+    return google_usage(response)
+
+
+def google_embed_input(kwargs: Dict[str, Any]) -> int:
+    """Embedded tokens counted from the request (the Gemini API reports none)"""
+    model = kwargs.get("model") or ""
+    return sum(count_tokens("google", model, text) for text in _google_texts(kwargs.get("contents")))
+
+
+def _google_texts(contents: Any):
+    """Text parts of google-genai `contents`: strings, Content objects or dicts"""
+    if contents is None:
+        return
+    if isinstance(contents, str):
+        yield contents
+        return
+    if isinstance(contents, (list, tuple)):
+        for item in contents:
+            yield from _google_texts(item)
+        return
+    parts = contents.get("parts") if isinstance(contents, dict) else getattr(contents, "parts", None)
+    for part in parts or ():
+        text = part.get("text") if isinstance(part, dict) else getattr(part, "text", None)
+        if isinstance(text, str):
+            yield text
+
+
+def cohere_usage(response: Any) -> Dict[str, int]:
+    """Cohere billed units (v2 `usage`, v1 `meta`)"""
+    usage = getattr(response, "usage", None) or getattr(response, "meta", None)
+    billed = getattr(usage, "billed_units", None)
+    if not billed:
+        return {"input": 0, "output": 0}
+
+    return {
+        "input": int(getattr(billed, "input_tokens", 0) or 0),
+        "output": int(getattr(billed, "output_tokens", 0) or 0),
+    }
+
+
+@dataclass(frozen=True)
+class Method:
+    """
+    A client method to wrap
+
+    `stream` is the StreamState style used when the method is called with
+    stream=True ("openai", "anthropic" or "responses"); None means streaming
+    is not tracked for it. `stream_usage_option` marks methods that accept
+    stream_options={"include_usage": True}. `count_input` counts input
+    tokens from the request when the response reports none.
+    """
+
+    path: str
+    usage: UsageExtractor
+    stream: Optional[str] = None
+    stream_usage_option: bool = False
+    count_input: Optional[InputCounter] = None
+
+    def tokens(self, response: Any, kwargs: Dict[str, Any]) -> Dict[str, int]:
+        """Token usage of one call"""
+        tokens = self.usage(response)
+        if not tokens["input"] and self.count_input is not None:
+            tokens["input"] = self.count_input(kwargs)
+        return tokens
+
+
+@dataclass(frozen=True)
+class ProviderAdapter:
+    """
+    Detection and method table for one client SDK
+
+    A client matches when a class in its MRO is defined in one of `modules`
+    (or its submodules) or is named in `class_names`. `base_urls` maps API
+    hosts to pricing providers for SDKs that also talk to compatible
+    endpoints, e.g. the OpenAI client pointed at DeepSeek or Groq.
+    """
+
+    name: str
+    modules: Tuple[str, ...]
+    methods: Tuple[Method, ...]
+    class_names: Tuple[str, ...] = ()
+    base_urls: Tuple[Tuple[str, str], ...] = ()
+
+    def matches(self, cls: type) -> bool:
+        module = cls.__module__ or ""
+        if cls.__name__ in self.class_names:
+            return True
+        return any(module == prefix or module.startswith(prefix + ".") for prefix in self.modules)
+
+    def provider_for(self, client: Any) -> str:
+        """Pricing provider for this client instance"""
+        base_url = getattr(client, "base_url", None)
+        if not base_url or not self.base_urls:
+            return self.name
+
+        host = urlsplit(str(base_url)).hostname or ""
+        for suffix, provider in self.base_urls:
+            if host == suffix or host.endswith("." + suffix):
+                return provider
+        return self.name
+
+
+OPENAI = ProviderAdapter(
+    name="openai",
+    modules=("openai",),
+    class_names=("OpenAI", "AsyncOpenAI", "AzureOpenAI", "AsyncAzureOpenAI"),
+    methods=(
+        Method("chat.completions.create", chat_usage, stream="openai", stream_usage_option=True),
+        Method("completions.create", chat_usage, stream="openai", stream_usage_option=True),
+        Method("embeddings.create", chat_usage),
+        Method("responses.create", responses_usage, stream="responses"),
+    ),
+    base_urls=(
+        ("api.deepseek.com", "deepseek"),
+        ("api.groq.com", "groq"),
+        ("api.x.ai", "xai"),
+        ("api.mistral.ai", "mistral"),
+        ("generativelanguage.googleapis.com", "google"),
+        ("api.cohere.ai", "cohere"),
+        ("api.cohere.com", "cohere"),
+    ),
+)
+
+ANTHROPIC = ProviderAdapter(
+    name="anthropic",
+    modules=("anthropic",),
+    class_names=("Anthropic", "AsyncAnthropic"),
+    methods=(
+        Method("messages.create", anthropic_usage, stream="anthropic"),
+    ),
+)
+
+GOOGLE = ProviderAdapter(
+    name="google",
+    modules=("google.genai",),
+    methods=(
+        Method("models.generate_content", google_usage),
+        Method("models.embed_content", google_embed_usage, count_input=google_embed_input),
+        Method("aio.models.generate_content", google_usage),
+        Method("aio.models.embed_content", google_embed_usage, count_input=google_embed_input),
+    ),
+)
+
+MISTRAL = ProviderAdapter(
+    name="mistral",
+    modules=("mistralai",),
+    methods=(
+        Method("chat.complete", chat_usage),
+        Method("embeddings.create", chat_usage),
+    ),
+)
+
+COHERE = ProviderAdapter(
+    name="cohere",
+    modules=("cohere",),
+    methods=(
+        Method("chat", cohere_usage),
+        Method("embed", cohere_usage),
+    ),
+)
+
+GROQ = ProviderAdapter(
+    name="groq",
+    modules=("groq",),
+    methods=(
+        Method("chat.completions.create", chat_usage, stream="openai"),
+        Method("embeddings.create", chat_usage),
+    ),
+)
+
+_adapters: List[ProviderAdapter] = [OPENAI, ANTHROPIC, GOOGLE, MISTRAL, COHERE, GROQ]
+_by_type: Dict[type, Optional[ProviderAdapter]] = {}
+
+
+def register_adapter(adapter: ProviderAdapter):
+    """Add an adapter; it takes precedence over the built-in ones"""
+    _adapters.insert(0, adapter)
+    _by_type.clear()
+
+
+def supported_providers() -> str:
+    return ", ".join(adapter.name for adapter in _adapters)
+
+
+def resolve_adapter(client: Any) -> Optional[ProviderAdapter]:
+    """Adapter for a client, looked up once per client class"""
+    cls = type(client)
+    try:
+        return _by_type[cls]
+    except KeyError:
+        pass
+
+    adapter = None
+    for klass in cls.__mro__:
+        adapter = next((a for a in _adapters if a.matches(klass)), None)
+        if adapter is not None:
+            break
+
+    _by_type[cls] = adapter
+    return adapter
+
+
+def resolve_method(client: Any, path: str) -> Optional[Tuple[Any, str]]:
+    """(owner, attribute) for a dotted method path, or None if the client lacks it"""
+    *parents, name = path.split(".")
+    owner = client
+    for part in parents:
+        owner = getattr(owner, part, None)
+        if owner is None:
+            return None
+
+    if not callable(getattr(owner, name, None)):
+        return None
+    return owner, name
+
+
+def is_async_method(fn: Any) -> bool:
+    """Whether a client method is a coroutine function, looking through functools.wraps decorators"""
+    return inspect.iscoroutinefunction(inspect.unwrap(fn))
@@ -0,0 +1,162 @@
+"""
+Telemetry replay
+Uploads FileSink exports to the ingest API in large batches, resumably
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .client import TokenTra
+from .errors import TokenTraError
+from .sinks import DROPPED_RECORD, read_events, sink_files
+
+logger = logging.getLogger("tokentra")
+
+
+class Checkpoint:
+    """
+    Per-file replay progress, saved as JSON after every delivered batch
+
+    {"files": {"/abs/path": {"offset": records delivered, "done": bool}}}
+    Saved via a temp file and os.replace, so a crash leaves the previous
+    checkpoint intact; at most the in-flight batches are sent again.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.files = json.load(f).get("files", {})
+
+    def offset(self, file: str) -> Optional[int]:
+        """Records already delivered from a file, or None when it is finished"""
+        entry = self.files.get(file, {})
+        return None if entry.get("done") else entry.get("offset", 0)
+
+    def commit(self, file: str, offset: int, done: bool):
+        self.files[file] = {"offset": offset, "done": done}
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(tmp, self.path)
+
+
+class Replayer:
+    """
+    Streams exported telemetry files to the ingest endpoint
+
+    Files (or directories of FileSink output) are read in order and cut
+    into batches of batch_size events, which up to `concurrency` threads
+    deliver through one client's connection pool, encoder and wire format
+    negotiation. Offsets are checkpointed in file order as batches land,
+    so an interrupted replay resumes where it stopped.
+
+    Example:
+        Replayer(["/var/lib/tokentra/export"], api_key="tt_live_xxx").run()
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        client: Optional[TokenTra] = None,
+        batch_size: int = 5000,
+        concurrency: int = 4,
+        checkpoint: Optional[str] = None,
+        **kwargs,
+    ):
+        self.paths = paths
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.checkpoint = Checkpoint(checkpoint)
+        self.client = client or TokenTra(pool_size=concurrency, prompt_tracking=False, **kwargs)
+
+    def files(self) -> List[str]:
+        """Input files in replay order"""
+        files: List[str] = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                files.extend(sink_files(path))
+            else:
+                files.append(path)
+        return [os.path.abspath(f) for f in files]
+
+    def run(self) -> int:
+        """Replay every file; returns the number of events delivered"""
+        sent = 0
+        # (future, file, offset after the batch, last batch of the file, size)
+        in_flight: Deque[Tuple[Future, str, int, bool, int]] = deque()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tokentra-replay")
+
+        def submit(payload: Dict[str, Any], file: str, offset: int, done: bool):
+            future = pool.submit(self._send, payload)
+            in_flight.append((future, file, offset, done, len(payload["events"])))
+            settle(self.concurrency * 2)
+
+        def settle(limit: int):
+            nonlocal sent
+            while len(in_flight) > limit:
+                future, file, offset, done, size = in_flight.popleft()
+                future.result()
+                self.checkpoint.commit(file, offset, done)
+                sent += size
+                if done:
+                    logger.info(f"Replayed {file} ({offset} records)")
+
+        try:
+            for file in self.files():
+                offset = self.checkpoint.offset(file)
+                if offset is None:
+                    continue
+                if offset:
+                    logger.info(f"Resuming {file} at record {offset}")
+
+                payload: Dict[str, Any] = {"events": []}
+                for record in read_events(file, skip=offset):
+                    offset += 1
+                    if record.get("type") == DROPPED_RECORD:
+                        # Queue-full drops the exporting client saw, reported with this batch
+                        payload["dropped_events"] = payload.get("dropped_events", 0) + record["count"]
+                        continue
+                    payload["events"].append(record)
+                    if len(payload["events"]) >= self.batch_size:
+                        submit(payload, file, offset, False)
+                        payload = {"events": []}
+
+                submit(payload, file, offset, True)
+
+            settle(0)
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            self.client.shutdown()
+
+        pool.shutdown()
+        return sent
+
+    def _send(self, payload: Dict[str, Any]):
+        """Deliver one batch, backing off on retryable failures"""
+        if not payload["events"] and not payload.get("dropped_events"):
+            return
+
+        policy = self.client._retries.policy
+        attempt = 0
+        while True:
+            try:
+                self.client._deliver(payload)
+                return
+            except TokenTraError as e:
+                attempt += 1
+                if not e.retryable or attempt > policy.max_retries:
+                    raise
+                delay = policy.delay(attempt, e)
+                logger.warning(f"Replay batch failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
@@ -0,0 +1,117 @@
+"""
+Retry scheduling for telemetry batches
+Exponential backoff with full jitter, Retry-After support and a retry budget
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from .errors import TokenTraError
+
+
+@dataclass
+class RetryPolicy:
+    """Backoff settings for failed telemetry batches"""
+
+    max_retries: int = 5
+    base_delay: float = 0.5  # seconds
+    max_delay: float = 30.0  # seconds, cap for computed backoff
+    budget: float = 300.0  # seconds a batch may spend waiting for retries
+    max_pending: int = 100  # batches held for retry at once
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            # Server told us when to come back; add a little jitter to avoid herds
+            return retry_after + random.uniform(0, self.base_delay)
+
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+@dataclass(order=True)
+class PendingBatch:
+    """A batch waiting for its next delivery attempt"""
+
+    due: float
+    seq: int
+    events: List[Any] = field(compare=False)
+    attempt: int = field(default=0, compare=False)
+    first_failure: float = field(default=0.0, compare=False)
+
+
+class RetryScheduler:
+    """
+    Min-heap of batches awaiting retry
+
+    The telemetry worker keeps draining new events and only sends a pending
+    batch once its due time has passed.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy()
+        self._heap: List[PendingBatch] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(
+        self,
+        events: List[Any],
+        error: BaseException,
+        previous: Optional[PendingBatch] = None,
+    ) -> Optional[PendingBatch]:
+        """
+        Schedule a failed batch for retry
+
+        Returns the pending entry, or None if the batch must be dropped
+        (non-retryable error, retries or budget exhausted, or too many
+        batches already pending).
+        """
+        if not (isinstance(error, TokenTraError) and error.retryable):
+            return None
+
+        now = time.monotonic()
+        attempt = previous.attempt + 1 if previous else 1
+        first_failure = previous.first_failure if previous else now
+
+        if attempt > self.policy.max_retries:
+            return None
+
+        due = now + self.policy.delay(attempt, error)
+        if due - first_failure > self.policy.budget:
+            return None
+
+        with self._lock:
+            if len(self._heap) >= self.policy.max_pending:
+                return None
+            pending = PendingBatch(due, next(self._seq), events, attempt, first_failure)
+            heapq.heappush(self._heap, pending)
+        return pending
+
+    def next_due(self) -> Optional[float]:
+        """Monotonic time of the earliest pending retry"""
+        return self._heap[0].due if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[PendingBatch]:
+        """Remove and return every batch whose retry time has passed"""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0].due <= now:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def pop_all(self) -> List[PendingBatch]:
+        """Remove and return every pending batch (used on shutdown)"""
+        with self._lock:
+            pending, self._heap = sorted(self._heap), []
+        return pending
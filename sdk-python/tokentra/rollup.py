@@ -0,0 +1,219 @@
+"""
+Client-side telemetry rollups
+Per-window totals by attribution key instead of one event per request
+"""
+
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .client import TelemetryEvent, __version__
+
+# Attribution dimensions a rollup is keyed by (plus the window start)
+ROLLUP_DIMENSIONS = ("provider", "model", "feature", "team", "project", "environment")
+
+
+class LatencySketch:
+    """
+    DDSketch-style quantile sketch
+
+    Values fall into logarithmic buckets of width gamma = (1+a)/(1-a), so any
+    quantile is returned within relative error `alpha` of the true value, and
+    sketches from different windows or processes merge by adding counts.
+    """
+
+    __slots__ = ("alpha", "bins", "zero_count", "count", "sum", "min", "max", "_log_gamma")
+
+    def __init__(self, alpha: float = 0.01):
+        self.alpha = alpha
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other: "LatencySketch"):
+        """Fold another sketch with the same alpha into this one"""
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+
+        gamma = math.exp(self._log_gamma)
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Bucket midpoint in relative terms: within alpha of every value in it
+                return min(max(2 * gamma ** key / (gamma + 1), self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        keys = sorted(self.bins)
+        return {
+            "alpha": self.alpha,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero_count": self.zero_count,
+            "keys": keys,
+            "counts": [self.bins[k] for k in keys],
+        }
+
+
+class Rollup:
+    """Exact totals for one (window, attribution key) bucket"""
+
+    __slots__ = (
+        "window_start", "window_seconds", "key", "count", "error_count",
+        "input_tokens", "output_tokens", "cached_tokens",
+        "input_cost", "output_cost", "cached_cost", "total_cost", "latency_ms",
+    )
+
+    def __init__(self, window_start: float, window_seconds: float, key: Tuple, alpha: float):
+        self.window_start = window_start
+        self.window_seconds = window_seconds
+        self.key = key
+        self.count = 0
+        self.error_count = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.input_cost = 0.0
+        self.output_cost = 0.0
+        self.cached_cost = 0.0
+        self.total_cost = 0.0
+        self.latency_ms = LatencySketch(alpha)
+
+    def add(self, event: TelemetryEvent):
+        self.count += 1
+        if event.is_error:
+            self.error_count += 1
+        self.input_tokens += event.input_tokens
+        self.output_tokens += event.output_tokens
+        self.cached_tokens += event.cached_tokens or 0
+        self.input_cost += event.input_cost
+        self.output_cost += event.output_cost
+        self.cached_cost += event.cached_cost or 0.0
+        self.total_cost += event.total_cost
+        self.latency_ms.add(event.latency_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialized like an event, tagged with type "rollup" """
+        result = {
+            "type": "rollup",
+            "window_start": datetime.fromtimestamp(self.window_start, timezone.utc)
+            .isoformat()
+            .replace("+00:00", "Z"),
+            "window_seconds": self.window_seconds,
+        }
+        for name, value in zip(ROLLUP_DIMENSIONS, self.key):
+            if value is not None:
+                result[name] = value
+        result.update(
+            count=self.count,
+            error_count=self.error_count,
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            total_tokens=self.input_tokens + self.output_tokens,
+            cached_tokens=self.cached_tokens,
+            input_cost=self.input_cost,
+            output_cost=self.output_cost,
+            cached_cost=self.cached_cost,
+            total_cost=self.total_cost,
+            latency_ms=self.latency_ms.to_dict(),
+            sdk_version=__version__,
+            sdk_language="python",
+        )
+        return result
+
+
+class RollupAggregator:
+    """
+    Folds events into per-window rollups between tracking and sending
+
+    Windows are aligned to wall-clock multiples of `window` seconds. Closed
+    windows are handed to the worker by drain(); a forced drain (flush or
+    shutdown) also ships open windows, so one window may arrive in several
+    additive parts. A `raw_sample_rate` fraction of events is additionally
+    kept as raw events (marked is_sample) for debugging.
+    """
+
+    def __init__(self, window: float = 60.0, raw_sample_rate: float = 0.0, alpha: float = 0.01):
+        if window <= 0:
+            raise ValueError("rollup window must be positive")
+        self.window = window
+        self.raw_sample_rate = raw_sample_rate
+        self.alpha = alpha
+        self._rollups: Dict[Tuple, Rollup] = {}
+        self._lock = threading.Lock()
+
+    def add(self, event: TelemetryEvent) -> bool:
+        """Fold an event into its rollup; returns True if it should also be sent raw"""
+        now = time.time()
+        window_start = now - now % self.window
+        key = (
+            event.provider, event.model, event.feature,
+            event.team, event.project, event.environment,
+        )
+
+        with self._lock:
+            rollup = self._rollups.get((window_start, key))
+            if rollup is None:
+                rollup = Rollup(window_start, self.window, key, self.alpha)
+                self._rollups[(window_start, key)] = rollup
+            rollup.add(event)
+
+        if self.raw_sample_rate and random.random() < self.raw_sample_rate:
+            event.is_sample = True
+            return True
+        return False
+
+    def drain(self, force: bool = False) -> List[Rollup]:
+        """Remove and return closed windows (every window when forced)"""
+        cutoff = math.inf if force else time.time() - self.window
+        with self._lock:
+            closed = [k for k in self._rollups if k[0] <= cutoff]
+            return [self._rollups.pop(k) for k in closed]
+
+    def time_to_next_close(self) -> Optional[float]:
+        """Seconds until the oldest open window closes, None if nothing is open"""
+        with self._lock:
+            if not self._rollups:
+                return None
+            oldest = min(k[0] for k in self._rollups)
+        return max(0.0, oldest + self.window - time.time())
+
+    def __len__(self) -> int:
+        return len(self._rollups)
@@ -0,0 +1,146 @@
+"""
+Cost-based model routing
+Rules that rewrite the requested model before a wrapped call is sent
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from .pricing import get_pricing
+
+
+@dataclass
+class RoutingRule:
+    """
+    Route matching requests to another model
+
+    Every condition that is set must match: source `models`, `provider`,
+    attribution (`features`, `teams`, `projects`) and the estimated prompt
+    size. With `only_if_cheaper` the rule is skipped unless the target is
+    no more expensive than the requested model on both input and output
+    prices in the active pricing tables.
+    """
+
+    name: str
+    to: str
+    models: Optional[FrozenSet[str]] = None
+    provider: Optional[str] = None
+    features: Optional[FrozenSet[str]] = None
+    teams: Optional[FrozenSet[str]] = None
+    projects: Optional[FrozenSet[str]] = None
+    min_prompt_tokens: Optional[int] = None
+    max_prompt_tokens: Optional[int] = None
+    only_if_cheaper: bool = True
+
+    def __post_init__(self):
+        for name in ("models", "features", "teams", "projects"):
+            value = getattr(self, name)
+            if isinstance(value, str):
+                setattr(self, name, frozenset((value,)))
+            elif value is not None:
+                setattr(self, name, frozenset(value))
+
+    @property
+    def needs_prompt_size(self) -> bool:
+        return self.min_prompt_tokens is not None or self.max_prompt_tokens is not None
+
+
+class Router:
+    """
+    Evaluates routing rules in order; the first match wins
+
+    Rules are compiled into a per-(provider, model) table of candidates, so
+    a request only checks rules that can apply to its model, and the prompt
+    is only measured when a candidate has a size condition.
+    """
+
+    def __init__(self, rules: Iterable[Union[RoutingRule, Dict[str, Any]]]):
+        self.rules: List[RoutingRule] = [
+            rule if isinstance(rule, RoutingRule) else RoutingRule(**rule) for rule in rules
+        ]
+        self._table: Dict[Tuple[str, str], Tuple[Tuple[RoutingRule, ...], bool]] = {}
+        self._lock = threading.Lock()
+
+    def route(
+        self, provider: str, model: str, attribution: Dict[str, Any], kwargs: Dict[str, Any]
+    ) -> Optional[Tuple[str, str]]:
+        """Return (target_model, rule_name) for the first matching rule, or None"""
+        candidates, needs_size = self._candidates(provider, model)
+        if not candidates:
+            return None
+
+        prompt_tokens = estimate_prompt_tokens(kwargs) if needs_size else 0
+        feature = attribution.get("feature")
+        team = attribution.get("team")
+        project = attribution.get("project")
+
+        for rule in candidates:
+            if rule.features is not None and feature not in rule.features:
+                continue
+            if rule.teams is not None and team not in rule.teams:
+                continue
+            if rule.projects is not None and project not in rule.projects:
+                continue
+            if rule.min_prompt_tokens is not None and prompt_tokens < rule.min_prompt_tokens:
+                continue
+            if rule.max_prompt_tokens is not None and prompt_tokens > rule.max_prompt_tokens:
+                continue
+            if rule.only_if_cheaper and not _is_cheaper(provider, rule.to, model):
+                continue
+            return rule.to, rule.name
+
+        return None
+
+    def _candidates(self, provider: str, model: str) -> Tuple[Tuple[RoutingRule, ...], bool]:
+        key = (provider, model)
+        entry = self._table.get(key)
+        if entry is None:
+            rules = tuple(
+                rule for rule in self.rules
+                if (rule.provider is None or rule.provider == provider)
+                and (rule.models is None or model in rule.models)
+                and rule.to != model
+            )
+            entry = (rules, any(rule.needs_prompt_size for rule in rules))
+            with self._lock:
+                if len(self._table) > 4096:
+                    self._table.clear()
+                self._table[key] = entry
+        return entry
+
+
+def _is_cheaper(provider: str, target: str, model: str) -> bool:
+    target_pricing = get_pricing(provider, target)
+    pricing = get_pricing(provider, model)
+    return (
+        target_pricing.input_per_1m <= pricing.input_per_1m
+        and target_pricing.output_per_1m <= pricing.output_per_1m
+    )
+
+
+def estimate_prompt_tokens(kwargs: Dict[str, Any]) -> int:
+    """Rough prompt size (about 4 characters per token) without tokenizing"""
+    chars = 0
+    for name in ("system", "instructions", "prompt", "input"):
+        chars += _content_chars(kwargs.get(name))
+    for message in kwargs.get("messages") or ():
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        chars += _content_chars(content)
+    return chars // 4
+
+
+def _content_chars(content: Any) -> int:
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, (list, tuple)):
+        total = 0
+        for part in content:
+            if isinstance(part, str):
+                total += len(part)
+            elif isinstance(part, dict) and isinstance(part.get("text"), str):
+                total += len(part["text"])
+        return total
+    return 0
@@ -0,0 +1,60 @@
+"""
+Adaptive sampling of raw telemetry
+Keeps errors and expensive calls, thins cheap calls as the queue fills
+"""
+
+import random
+from dataclasses import dataclass
+
+from .client import TelemetryEvent
+
+
+@dataclass
+class SamplingPolicy:
+    """
+    Decides which raw events to keep under queue pressure
+
+    Errors, calls costing at least `cost_threshold` USD and calls slower
+    than `latency_threshold_ms` are always kept. Everything else is kept
+    with probability 1.0 until the queue is `pressure_start` full, then at
+    a rate falling linearly to `min_rate` as it approaches capacity. Kept
+    events carry sample_weight = 1 / rate so the backend can re-scale
+    totals without bias.
+    """
+
+    cost_threshold: float = 0.01  # USD
+    latency_threshold_ms: int = 10000
+    min_rate: float = 0.01
+    pressure_start: float = 0.5  # fraction of the queue in use
+
+    def __post_init__(self):
+        if not 0.0 < self.min_rate <= 1.0:
+            raise ValueError("min_rate must be in (0, 1]")
+        if not 0.0 <= self.pressure_start < 1.0:
+            raise ValueError("pressure_start must be in [0, 1)")
+
+    def rate(self, fill: float) -> float:
+        """Keep probability for a cheap successful call at this queue fill (0-1)"""
+        if fill <= self.pressure_start:
+            return 1.0
+        headroom = (1.0 - fill) / (1.0 - self.pressure_start)
+        return max(self.min_rate, min(1.0, headroom))
+
+    def sample(self, event: TelemetryEvent, fill: float) -> bool:
+        """Return True to keep the event, setting its sample_weight if sampled"""
+        if (
+            event.is_error
+            or event.total_cost >= self.cost_threshold
+            or event.latency_ms >= self.latency_threshold_ms
+        ):
+            return True
+
+        rate = self.rate(fill)
+        if rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+
+        event.sample_weight = 1.0 / rate
+        return True
+
@@ -0,0 +1,402 @@
+"""
+Telemetry sinks
+Destinations that replace the ingest endpoint, e.g. rotated local files
+"""
+
+import abc
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional
+
+from .errors import TokenTraError
+from .spool import pid_alive
+
+logger = logging.getLogger("tokentra")
+
+try:
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover - optional dependency
+    _zstd = None
+
+SINK_FORMATS = ("jsonl", "parquet")
+PARTIAL_SUFFIX = ".partial"
+_EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+# Stands in the event stream for a batch's "dropped_events" count
+DROPPED_RECORD = "dropped_events"
+_FILE_PID = re.compile(r"^events-\d{8}T\d{6}-(\d+)-\d+\.")
+
+
+class Sink(abc.ABC):
+    """
+    Destination for telemetry batches in place of the ingest endpoint
+
+    write() is called from the telemetry worker with the ingest payload
+    ({"events": [...]}, plus "dropped_events" when the client dropped
+    events since the last batch) and should raise TokenTraError
+    (retryable=True for transient failures) so the normal retry path applies.
+    """
+
+    @abc.abstractmethod
+    def write(self, payload: Dict[str, Any]):
+        """Persist one batch"""
+
+    def close(self):
+        pass
+
+    def after_fork(self):
+        """Called in a forked child before the worker restarts"""
+
+
+class FileSink(Sink):
+    """
+    Writes batches to rotated local files for `python -m tokentra replay`
+
+    format="jsonl" writes one event per line, compressed with gzip, zstd or
+    none; each batch is flushed through the compressor, so a file is
+    readable up to its last batch even after a crash. format="parquet"
+    (needs pyarrow) writes one row group per batch with `compression` as the
+    column codec. The file being written ends in ".partial" and is renamed
+    when it reaches rotate_bytes (uncompressed) or rotate_seconds, and on
+    close. Files are named events-<UTC time>-<pid>-<seq>.<ext>. A batch's
+    dropped_events count is stored as a {"type": "dropped_events", "count": n}
+    record, which replay sends on as the count rather than as an event.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        format: str = "jsonl",
+        compression: str = "gzip",
+        rotate_bytes: int = 64 * 1024 * 1024,
+        rotate_seconds: float = 3600.0,
+    ):
+        if format not in SINK_FORMATS:
+            raise ValueError(f"format must be one of {SINK_FORMATS}")
+        if format == "jsonl" and compression not in _EXTENSIONS:
+            raise ValueError(f"compression must be one of {tuple(_EXTENSIONS)}")
+        if format == "jsonl" and compression == "zstd" and _zstd is None:
+            logger.warning("zstandard not installed, falling back to gzip files")
+            compression = "gzip"
+        if format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise TokenTraError(
+                    "MISSING_DEPENDENCY",
+                    "Parquet files require pyarrow. Install with: pip install tokentra[parquet]",
+                )
+
+        self.directory = directory
+        self.format = format
+        self.compression = compression
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self._lock = threading.Lock()
+        self._writer: Optional[_Writer] = None
+        self._seq = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover_partials()
+
+    def write(self, payload: Dict[str, Any]):
+        events = payload["events"]
+        if payload.get("dropped_events"):
+            events = events + [{"type": DROPPED_RECORD, "count": payload["dropped_events"]}]
+        if not events:
+            return
+
+        with self._lock:
+            try:
+                writer = self._writer
+                if writer is not None and (
+                    writer.bytes >= self.rotate_bytes
+                    or time.monotonic() - writer.opened >= self.rotate_seconds
+                ):
+                    self._finish()
+                    writer = None
+                if writer is None:
+                    writer = self._writer = self._open()
+                writer.write(events)
+            except OSError as e:
+                self._writer = None
+                raise TokenTraError(
+                    "SINK_ERROR", f"Failed to write telemetry to {self.directory}: {e}",
+                    cause=e, retryable=True,
+                )
+
+    def close(self):
+        with self._lock:
+            self._finish()
+
+    def after_fork(self):
+        # The parent still owns (and will finish) its open file; see _OwnedFile
+        self._lock = threading.Lock()
+        self._writer = None
+        self._seq = 0
+
+    def _open(self) -> "_Writer":
+        self._seq += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        extension = ".parquet" if self.format == "parquet" else _EXTENSIONS[self.compression]
+        path = os.path.join(
+            self.directory, f"events-{stamp}-{os.getpid()}-{self._seq:04d}{extension}"
+        )
+        if self.format == "parquet":
+            return _ParquetWriter(path, self.compression)
+        return _JsonlWriter(path, self.compression)
+
+    def _finish(self):
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        try:
+            writer.close()
+            os.replace(writer.path + PARTIAL_SUFFIX, writer.path)
+        except OSError as e:
+            logger.warning(f"Failed to finish telemetry file {writer.path}: {e}")
+
+    def _recover_partials(self):
+        """Finish JSONL files left behind by processes that exited without closing"""
+        for name in os.listdir(self.directory):
+            match = _FILE_PID.match(name)
+            if not (match and name.endswith(PARTIAL_SUFFIX)) or ".parquet" in name:
+                continue
+            if pid_alive(int(match.group(1))):
+                continue
+            path = os.path.join(self.directory, name)
+            os.replace(path, path[: -len(PARTIAL_SUFFIX)])
+            logger.info(f"Recovered telemetry file {name}")
+
+
+class _OwnedFile(io.FileIO):
+    """
+    Unbuffered output file that ignores writes from forked children
+
+    A child inherits the parent's open writer; when it is garbage collected
+    the compressor or Parquet writer would append its trailer to the file
+    the parent is still writing.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path, "wb")
+        self._owner = os.getpid()
+
+    def write(self, data) -> int:
+        if os.getpid() != self._owner:
+            return memoryview(data).nbytes
+        return super().write(data)
+
+
+class _Writer(abc.ABC):
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes = 0
+        self.opened = time.monotonic()
+
+    @abc.abstractmethod
+    def write(self, events: List[Dict[str, Any]]):
+        """Append events to the open file"""
+
+    @abc.abstractmethod
+    def close(self):
+        """Finish the file; it is renamed into place afterwards"""
+
+
+class _JsonlWriter(_Writer):
+    def __init__(self, path: str, compression: str):
+        super().__init__(path)
+        self._raw = _OwnedFile(path + PARTIAL_SUFFIX)
+        if compression == "gzip":
+            self._stream: Any = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+        elif compression == "zstd":
+            self._stream = _zstd.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self._compression = compression
+
+    def write(self, events: List[Dict[str, Any]]):
+        data = "".join(
+            json.dumps(event, separators=(",", ":")) + "\n" for event in events
+        ).encode("utf-8")
+        self._stream.write(data)
+
+        # Make every complete batch decodable from disk
+        if self._compression == "zstd":
+            self._stream.flush(_zstd.FLUSH_BLOCK)
+        else:
+            self._stream.flush()
+        self.bytes += len(data)
+
+    def close(self):
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+
+
+class _ParquetWriter(_Writer):
+    def __init__(self, path: str, compression: str):
+        import pyarrow.parquet as pq
+
+        super().__init__(path)
+        self._schema = parquet_schema()
+        self._columns = _column_types(self._schema)
+        self._file = _OwnedFile(path + PARTIAL_SUFFIX)
+        self._writer = pq.ParquetWriter(
+            self._file, self._schema,
+            compression=None if compression == "none" else compression,
+        )
+
+    def write(self, events: List[Dict[str, Any]]):
+        import pyarrow as pa
+
+        rows = [_parquet_row(event, self._columns) for event in events]
+        try:
+            table = pa.Table.from_pylist(rows, schema=self._schema)
+            self._writer.write_table(table)
+        except (pa.ArrowException, TypeError, ValueError, OverflowError) as e:
+            # Rows the schema cannot hold would fail again: not retryable
+            raise TokenTraError("SINK_ERROR", f"Failed to write telemetry as Parquet: {e}", cause=e)
+        self.bytes += table.nbytes
+
+    def close(self):
+        self._writer.close()
+        self._file.close()
+
+
+def parquet_schema():
+    """Arrow schema for event rows: one column per TelemetryEvent field, plus "extra" """
+    import pyarrow as pa
+
+    from .client import TelemetryEvent
+
+    columns = []
+    for f in fields(TelemetryEvent):
+        if f.type in (int, Optional[int]):
+            arrow_type = pa.int64()
+        elif f.type in (float, Optional[float]):
+            arrow_type = pa.float64()
+        elif f.type is bool:
+            arrow_type = pa.bool_()
+        else:
+            arrow_type = pa.string()  # strings, formatted ids/timestamps, JSON metadata
+        columns.append(pa.field(f.name, arrow_type))
+    # Anything else (rollups, future fields) as a JSON object
+    columns.append(pa.field("extra", pa.string()))
+    return pa.schema(columns)
+
+
+def _column_types(schema) -> Dict[str, tuple]:
+    """Python types each column accepts as-is (exact types: bool is not an int64)"""
+    import pyarrow as pa
+
+    accepted = {pa.int64(): (int,), pa.float64(): (float, int), pa.bool_(): (bool,)}
+    return {
+        field.name: accepted.get(field.type, (str,))
+        for field in schema if field.name != "extra"
+    }
+
+
+def _parquet_row(event: Dict[str, Any], columns: Dict[str, tuple]) -> Dict[str, Any]:
+    """
+    One Parquet row for an event dict
+
+    Values that do not fit their column's type (a rollup's latency sketch
+    in latency_ms, say) go into "extra" with unknown keys, and come back
+    out of it on read.
+    """
+    row: Dict[str, Any] = {}
+    extra: Dict[str, Any] = {}
+    for name, value in event.items():
+        if name == "metadata" and isinstance(value, dict):
+            row[name] = json.dumps(value, separators=(",", ":"))
+        elif value is None or type(value) in columns.get(name, ()):
+            row[name] = value
+        else:
+            extra[name] = value
+    if extra:
+        row["extra"] = json.dumps(extra, separators=(",", ":"))
+    return row
+
+
+def read_events(path: str, skip: int = 0, batch_size: int = 10000) -> Iterator[Dict[str, Any]]:
+    """Events from a FileSink file (any format), skipping the first `skip`"""
+    if path.endswith(".parquet"):
+        yield from _read_parquet(path, skip, batch_size)
+        return
+
+    if path.endswith(".zst"):
+        if _zstd is None:
+            raise TokenTraError("MISSING_DEPENDENCY", f"{path} needs zstandard to read")
+        decompressor: Any = _zstd.ZstdDecompressor().decompressobj()
+    elif path.endswith(".gz"):
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    else:
+        decompressor = None
+
+    index = 0
+    for line in _lines(path, decompressor):
+        if index >= skip and line.strip():
+            yield json.loads(line)
+        index += 1
+
+
+def _lines(path: str, decompressor: Any) -> Iterator[bytes]:
+    """
+    Lines of a possibly compressed file
+
+    Decompresses incrementally rather than through GzipFile, so a file
+    whose writer crashed before the trailer still yields every complete
+    (flushed) line instead of raising at the end.
+    """
+    pending = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            yield from lines
+    if pending.strip():
+        # Writers end every line; the rest was cut off mid-batch
+        logger.warning(f"{path} ends mid-line; skipped {len(pending)} trailing bytes")
+
+
+def _read_parquet(path: str, skip: int, batch_size: int) -> Iterator[Dict[str, Any]]:
+    import pyarrow.parquet as pq
+
+    seen = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        if seen + batch.num_rows <= skip:
+            seen += batch.num_rows
+            continue
+        for row in batch.to_pylist():
+            seen += 1
+            if seen <= skip:
+                continue
+            event = {k: v for k, v in row.items() if v is not None and k != "extra"}
+            if "metadata" in event:
+                event["metadata"] = json.loads(event["metadata"])
+            if row.get("extra"):
+                event.update(json.loads(row["extra"]))
+            yield event
+
+
+def sink_files(directory: str) -> List[str]:
+    """Finished FileSink files in a directory, oldest first"""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith("events-") and not name.endswith(PARTIAL_SUFFIX)
+        and name.endswith((".jsonl", ".jsonl.gz", ".jsonl.zst", ".parquet"))
+    )
+    return [os.path.join(directory, name) for name in names]
@@ -0,0 +1,383 @@
+"""
+Disk-backed write-ahead spool for telemetry
+Append-only segment files that survive restarts and ingest outages
+"""
+
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .errors import TokenTraError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger("tokentra")
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+_LENGTH = struct.Struct("<I")
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_FILE = "cursor"
+_LOCK_FILE = "lock"
+
+# A forked child's spool (pid-<pid>), or one being merged (pid-<pid>.claimed-<pid>)
+_CHILD_DIR = re.compile(r"^pid-(\d+)(?:\.claimed-(\d+))?$")
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this pid exists (pids may be reused)"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock(directory: str) -> Optional[int]:
+    """Exclusive flock on a spool directory; None if another reader holds it"""
+    fd = os.open(os.path.join(directory, _LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _locked(directory: str) -> bool:
+    """Whether a live DiskSpool still owns a directory"""
+    if not os.path.exists(os.path.join(directory, _LOCK_FILE)):
+        return False
+    fd = _lock(directory)
+    if fd is None:
+        return True
+    os.close(fd)
+    return False
+
+
+def open_spool(root: str, **kwargs: Any) -> "DiskSpool":
+    """
+    Open the spool in `root`, or this process's own subdirectory of it
+
+    Only one DiskSpool reads a directory. When another process already owns
+    `root` (workers of a server that each create a client), this process
+    spools to root/pid-<pid> instead, which the owner of `root` adopts once
+    the process has exited.
+    """
+    try:
+        return DiskSpool(root, **kwargs)
+    except TokenTraError as e:
+        if e.code != "SPOOL_LOCKED":
+            raise
+    directory = os.path.join(root, f"pid-{os.getpid()}")
+    logger.info(f"{root} is owned by another process, spooling to {directory}")
+    return DiskSpool(directory, **kwargs)
+
+
+class DiskSpool:
+    """
+    Append-only, segmented on-disk queue of serialized events
+
+    Records are length-prefixed and appended to numbered segment files.
+    The reader walks segments in order through read-only memory maps and
+    only advances the persisted cursor on commit(), so anything not yet
+    delivered is replayed after a restart. A fresh segment is started on
+    every open, which keeps a torn tail from a crash out of new writes.
+    The directory is held with an exclusive flock while the spool is open;
+    opening one another spool holds raises TokenTraError("SPOOL_LOCKED").
+
+    fsync policies:
+        always: fsync after every append (survives power loss, slowest)
+        batch:  fsync when the worker calls sync(), once per drained batch
+        never:  leave durability to the OS (still survives process kills)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync: str = "batch",
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+
+        self.directory = directory
+        self.segment_bytes = min(segment_bytes, max_bytes)
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.evicted_bytes = 0
+
+        self._lock = threading.Lock()
+        self._maps: Dict[int, Tuple[mmap.mmap, int]] = {}
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._owner = _lock(directory)
+        if self._owner is None:
+            raise TokenTraError(
+                "SPOOL_LOCKED", f"Spool directory {directory} is in use by another client"
+            )
+        self._sizes: Dict[int, int] = {
+            seq: os.path.getsize(self._path(seq)) for seq in self._existing_segments()
+        }
+        self._total_bytes = sum(self._sizes.values())
+
+        committed = self._load_cursor()
+        for seq in [s for s in self._sizes if s < committed[0]]:
+            self._remove_segment(seq)
+
+        self._write_seq = max(self._sizes, default=-1) + 1
+        self._open_segment(self._write_seq)
+
+        first = min(self._sizes)
+        self._committed = committed if committed[0] in self._sizes else (first, 0)
+        self._read = self._committed
+
+        replay = self.pending_bytes
+        if replay:
+            logger.info(f"Replaying {replay} bytes of spooled telemetry from {directory}")
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes on disk not yet committed (approximate)"""
+        seq, offset = self._committed
+        return sum(size for s, size in self._sizes.items() if s >= seq) - offset
+
+    def append(self, record: bytes):
+        """Append one serialized event"""
+        data = _LENGTH.pack(len(record)) + record
+
+        with self._lock:
+            if self._sizes[self._write_seq] + len(data) > self.segment_bytes:
+                self._roll()
+
+            self._file.write(data)
+            self._sizes[self._write_seq] += len(data)
+            self._total_bytes += len(data)
+
+            if self.fsync == "always":
+                os.fsync(self._file.fileno())
+
+            if self._total_bytes > self.max_bytes:
+                self._evict_oldest()
+
+    def read(self, max_records: int) -> List[bytes]:
+        """Read up to max_records past the read cursor (uncommitted until commit())"""
+        records: List[bytes] = []
+
+        with self._lock:
+            seq, offset = self._read
+
+            while len(records) < max_records:
+                view = self._map(seq)
+                size = len(view) if view is not None else 0
+
+                if offset + _LENGTH.size <= size:
+                    (length,) = _LENGTH.unpack_from(view, offset)
+                    end = offset + _LENGTH.size + length
+                    if end <= size:
+                        records.append(view[offset + _LENGTH.size:end])
+                        offset = end
+                        continue
+
+                # End of segment, or a torn tail left by a crash
+                later = [s for s in self._sizes if s > seq]
+                if seq == self._write_seq or not later:
+                    break
+                seq, offset = min(later), 0
+
+            self._read = (seq, offset)
+
+        return records
+
+    def commit(self):
+        """Mark everything read so far as delivered"""
+        with self._lock:
+            self._committed = self._read
+            self._save_cursor()
+
+            for seq in [s for s in self._sizes if s < self._committed[0]]:
+                self._remove_segment(seq)
+
+    def rewind(self):
+        """Forget uncommitted reads so they are returned again"""
+        with self._lock:
+            self._read = self._committed
+
+    def sync(self):
+        """fsync the active segment under the 'batch' policy"""
+        if self.fsync == "batch":
+            with self._lock:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        """Flush and release all files and the directory lock (no-op once closed)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._release()
+
+    def detach(self):
+        """
+        Drop a spool inherited through fork() in the child
+
+        Closes the child's copies of the descriptors without syncing. The
+        flock is shared with the parent and stays held by it.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._release()
+
+    def _release(self):
+        self._file.close()
+        for view, _ in self._maps.values():
+            view.close()
+        self._maps.clear()
+        os.close(self._owner)
+
+    def adopt_orphans(self, root: str) -> int:
+        """
+        Merge spools left under `root` by forked children that have exited
+
+        Children (and processes that found `root` owned by another) spool
+        to root/pid-<pid>, which nothing reads once they are gone. A
+        directory still locked by a live spool is left alone. Each orphan is
+        claimed with an atomic rename, so two processes never merge the same
+        one; its pending records are appended here and the directory is
+        removed. Returns the number of records adopted.
+        """
+        adopted = 0
+        for name in sorted(os.listdir(root)):
+            match = _CHILD_DIR.match(name)
+            path = os.path.join(root, name)
+            if not match or path == self.directory or not os.path.isdir(path):
+                continue
+            if pid_alive(int(match.group(2) or match.group(1))) or _locked(path):
+                continue
+
+            claimed = os.path.join(root, f"pid-{match.group(1)}.claimed-{os.getpid()}")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue  # another process claimed it first
+            adopted += self._merge(claimed)
+        return adopted
+
+    def _merge(self, directory: str) -> int:
+        try:
+            orphan = DiskSpool(directory, self.segment_bytes, self.max_bytes, fsync="never")
+        except TokenTraError:
+            return 0  # reopened by its owner since the check
+        count = 0
+        while True:
+            records = orphan.read(1000)
+            if not records:
+                break
+            for record in records:
+                self.append(record)
+            count += len(records)
+        orphan.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+        if count:
+            logger.info(f"Adopted {count} spooled records from {directory}")
+        return count
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:020d}{_SEGMENT_SUFFIX}")
+
+    def _existing_segments(self) -> List[int]:
+        return sorted(
+            int(name[: -len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(_SEGMENT_SUFFIX) and name[: -len(_SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def _open_segment(self, seq: int):
+        # Unbuffered: every append reaches the OS immediately
+        self._file = open(self._path(seq), "ab", buffering=0)
+        self._sizes[seq] = 0
+
+    def _roll(self):
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._write_seq += 1
+        self._open_segment(self._write_seq)
+
+    def _evict_oldest(self):
+        oldest = min(self._sizes)
+        if oldest == self._write_seq:
+            return
+
+        self.evicted_bytes += self._sizes[oldest]
+        logger.warning(f"Telemetry spool over {self.max_bytes} bytes, dropping oldest segment")
+        self._remove_segment(oldest)
+
+        first = min(self._sizes)
+        if self._committed[0] == oldest:
+            self._committed = (first, 0)
+        if self._read[0] == oldest:
+            self._read = (first, 0)
+
+    def _remove_segment(self, seq: int):
+        mapped = self._maps.pop(seq, None)
+        if mapped is not None:
+            mapped[0].close()
+        self._total_bytes -= self._sizes.pop(seq, 0)
+        try:
+            os.remove(self._path(seq))
+        except FileNotFoundError:
+            pass
+
+    def _map(self, seq: int) -> Optional[mmap.mmap]:
+        """Read-only map of a segment, remapped when the active segment grows"""
+        size = self._sizes.get(seq, 0)
+        mapped = self._maps.get(seq)
+        if mapped is not None and mapped[1] >= size:
+            return mapped[0]
+
+        if size == 0:
+            return None
+
+        with open(self._path(seq), "rb") as f:
+            view = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+        if mapped is not None:
+            mapped[0].close()
+        self._maps[seq] = (view, size)
+        return view
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, _CURSOR_FILE)) as f:
+                seq, offset = f.read().split()
+                return int(seq), int(offset)
+        except (FileNotFoundError, ValueError):
+            return -1, 0
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{self._committed[0]} {self._committed[1]}")
+        os.replace(tmp, path)
@@ -0,0 +1,171 @@
+"""
+SDK statistics
+Per-thread sharded counters and histograms, aggregated on read
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+FLUSH_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 30000)
+QUEUE_DEPTH_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+class _Shard:
+    """One thread's private counters; only that thread ever writes to it"""
+
+    __slots__ = ("thread", "counters", "histograms")
+
+    def __init__(
+        self,
+        thread: Optional[threading.Thread],
+        counters: Iterable[str],
+        histograms: Dict[str, int],
+    ):
+        self.thread = thread
+        self.counters = dict.fromkeys(counters, 0)
+        # Per histogram: bucket counts (+1 overflow bucket), then sum
+        self.histograms = {name: [0] * (size + 1) for name, size in histograms.items()}
+
+
+class Stats:
+    """
+    Thread-safe counters and histograms without a hot-path lock
+
+    Each writing thread increments its own shard (found through a
+    threading.local), so concurrent updates never race and never contend.
+    Reads sum all shards; shards of exited threads are folded into a
+    retired total so the shard list does not grow with thread churn.
+    """
+
+    def __init__(
+        self,
+        counters: Iterable[str],
+        histograms: Optional[Dict[str, Sequence[float]]] = None,
+        gauges: Iterable[str] = (),
+    ):
+        self._counter_names = tuple(counters)
+        self._buckets = {name: tuple(bounds) for name, bounds in (histograms or {}).items()}
+        self._gauges = frozenset(gauges)
+        self._sizes = {name: len(bounds) + 1 for name, bounds in self._buckets.items()}
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[_Shard] = []
+        self._retired = self._new_shard(None)
+
+    def incr(self, name: str, value: int = 1):
+        """Add to a counter (negative values allowed for gauges)"""
+        self._shard().counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Record one histogram observation"""
+        slots = self._shard().histograms[name]
+        slots[bisect_left(self._buckets[name], value)] += 1
+        slots[-1] += value
+
+    def counters(self) -> Dict[str, int]:
+        """Aggregated counter values"""
+        totals = dict.fromkeys(self._counter_names, 0)
+        for shard in self._collect():
+            for name, value in shard.counters.items():
+                totals[name] += value
+        return totals
+
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregated histograms with count, sum, mean and bucket-estimated percentiles"""
+        result = {}
+        for name, _, counts, total in self._merged_buckets():
+            count = sum(counts)
+            result[name] = {
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(name, counts, count, 0.50),
+                "p90": self._quantile(name, counts, count, 0.90),
+                "p99": self._quantile(name, counts, count, 0.99),
+            }
+        return result
+
+    def render_openmetrics(self, prefix: str = "tokentra") -> str:
+        """Counters, gauges and histograms in OpenMetrics / Prometheus text format"""
+        lines = []
+
+        for name, value in self.counters().items():
+            metric = f"{prefix}_{name}"
+            if name in self._gauges:
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+            else:
+                lines += [f"# TYPE {metric} counter", f"{metric}_total {value}"]
+
+        for name, bounds, counts, total in self._merged_buckets():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {cumulative}')
+            lines.append(f"{metric}_sum {total}")
+            lines.append(f"{metric}_count {cumulative}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _merged_buckets(self) -> List[Tuple[str, Tuple[float, ...], List[int], float]]:
+        merged = {name: [0] * (size + 1) for name, size in self._sizes.items()}
+        for shard in self._collect():
+            for name, slots in shard.histograms.items():
+                target = merged[name]
+                for i, value in enumerate(slots):
+                    target[i] += value
+        return [
+            (name, self._buckets[name], slots[:-1], slots[-1])
+            for name, slots in merged.items()
+        ]
+
+    def _quantile(self, name: str, counts: List[int], count: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None past the last bound)"""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self._buckets[name], counts):
+            seen += bucket_count
+            if seen >= rank:
+                return float(bound)
+        return None
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._new_shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _new_shard(self, thread: Optional[threading.Thread]) -> _Shard:
+        return _Shard(thread, self._counter_names, self._sizes)
+
+    def _collect(self) -> List[_Shard]:
+        """Live shards plus the retired total, folding in shards of exited threads"""
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    live.append(shard)
+                    continue
+                for name, value in shard.counters.items():
+                    self._retired.counters[name] += value
+                for name, slots in shard.histograms.items():
+                    target = self._retired.histograms[name]
+                    for i, value in enumerate(slots):
+                        target[i] += value
+            self._shards = live
+            return live + [self._retired]
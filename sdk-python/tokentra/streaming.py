@@ -0,0 +1,249 @@
+"""
+Streaming response tracking
+Pass-through proxies that time and meter provider streams without buffering
+"""
+
+import time
+import weakref
+from typing import Any, Callable, Optional
+
+
+class StreamState:
+    """Usage and timing accumulated while a stream is consumed"""
+
+    __slots__ = (
+        "style", "input_tokens", "output_tokens", "cached_tokens",
+        "first_token_at", "last_token_at", "token_chunks", "finished",
+    )
+
+    def __init__(self, style: str):
+        self.style = style  # stream format: "openai", "anthropic" or "responses"
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.first_token_at: Optional[float] = None
+        self.last_token_at: Optional[float] = None
+        self.token_chunks = 0
+        self.finished = False
+
+    def mark_token(self):
+        now = time.time()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.token_chunks += 1
+
+    def observe(self, chunk: Any) -> bool:
+        """
+        Record one stream item
+
+        Returns True if the item only carries usage (OpenAI include_usage
+        trailer with no choices).
+        """
+        if self.style == "anthropic":
+            self._observe_anthropic(chunk)
+            return False
+        if self.style == "responses":
+            self._observe_responses(chunk)
+            return False
+        return self._observe_openai(chunk)
+
+    def _observe_openai(self, chunk: Any) -> bool:
+        usage = getattr(chunk, "usage", None)
+        if usage is None and hasattr(chunk, "x_groq"):
+            # Groq reports usage on the last chunk's x_groq extension
+            usage = getattr(chunk.x_groq, "usage", None)
+        if usage:
+            self.input_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            self.output_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+        if getattr(chunk, "choices", None):
+            self.mark_token()
+            return False
+        return bool(usage)
+
+    def _observe_anthropic(self, event: Any):
+        kind = getattr(event, "type", None)
+
+        if kind == "content_block_delta":
+            self.mark_token()
+        elif kind == "message_start":
+            usage = getattr(getattr(event, "message", None), "usage", None)
+            if usage:
+                self.input_tokens = getattr(usage, "input_tokens", 0) or 0
+                self.cached_tokens = getattr(usage, "cache_read_input_tokens", 0) or 0
+        elif kind == "message_delta":
+            usage = getattr(event, "usage", None)
+            if usage:
+                self.output_tokens = getattr(usage, "output_tokens", 0) or 0
+
+    def _observe_responses(self, event: Any):
+        kind = getattr(event, "type", None)
+
+        if kind == "response.output_text.delta":
+            self.mark_token()
+        elif kind == "response.completed":
+            usage = getattr(getattr(event, "response", None), "usage", None)
+            if usage:
+                self.input_tokens = getattr(usage, "input_tokens", 0) or 0
+                self.output_tokens = getattr(usage, "output_tokens", 0) or 0
+
+    def tokens(self) -> dict:
+        """Token counts in the shape of the provider usage extractors"""
+        if self.style == "anthropic":
+            return {"input": self.input_tokens, "output": self.output_tokens, "cached": self.cached_tokens}
+
+        output = self.output_tokens
+        if not output:
+            # No usage trailer: each content chunk carries roughly one token
+            output = self.token_chunks
+        return {"input": self.input_tokens, "output": output}
+
+    def time_to_first_token_ms(self, start_time: float) -> Optional[int]:
+        if self.first_token_at is None:
+            return None
+        return int((self.first_token_at - start_time) * 1000)
+
+    def inter_token_latency_ms(self) -> Optional[float]:
+        """Mean gap between content chunks after the first"""
+        if self.token_chunks < 2:
+            return None
+        return (self.last_token_at - self.first_token_at) * 1000 / (self.token_chunks - 1)
+
+
+OnStreamDone = Callable[[StreamState, Optional[BaseException]], None]
+
+
+def _report(state: StreamState, on_done: OnStreamDone, error: Optional[BaseException]):
+    """Hand a stream's state to on_done, once"""
+    if not state.finished:
+        state.finished = True
+        on_done(state, error)
+
+
+def _report_when_collected(proxy: Any, state: StreamState, on_done: OnStreamDone) -> weakref.finalize:
+    """
+    Report a stream the caller abandoned (e.g. `break` without close())
+
+    The callback holds only the state and on_done, never the proxy, so
+    the proxy can be collected. Skipped at interpreter exit, when the
+    client is already shut down.
+    """
+    finalizer = weakref.finalize(proxy, _report, state, on_done, None)
+    finalizer.atexit = False
+    return finalizer
+
+
+class StreamProxy:
+    """
+    Iterator proxy around a provider stream
+
+    Chunks are yielded as they arrive; on exhaustion, error, close(),
+    context-manager exit or garbage collection of an abandoned proxy the
+    accumulated StreamState is reported once.
+    When `hide_usage_chunks` is set (the SDK injected include_usage), the
+    usage-only trailer is consumed here so callers see the stream they
+    asked for. Other attributes are forwarded to the wrapped stream.
+    """
+
+    def __init__(
+        self, stream: Any, state: StreamState, on_done: OnStreamDone,
+        hide_usage_chunks: bool = False,
+    ):
+        self._stream = stream
+        self._iterator = iter(stream)
+        self._state = state
+        self._on_done = on_done
+        self._hide_usage_chunks = hide_usage_chunks
+        self._finalizer = _report_when_collected(self, state, on_done)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            try:
+                chunk = next(self._iterator)
+            except StopIteration:
+                self._finish(None)
+                raise
+            except Exception as e:
+                self._finish(e)
+                raise
+
+            if not (self._state.observe(chunk) and self._hide_usage_chunks):
+                return chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish(None)
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+    def _finish(self, error: Optional[BaseException]):
+        self._finalizer.detach()
+        _report(self._state, self._on_done, error)
+
+
+class AsyncStreamProxy:
+    """Async-iterator counterpart of StreamProxy for AsyncOpenAI / AsyncAnthropic"""
+
+    def __init__(
+        self, stream: Any, state: StreamState, on_done: OnStreamDone,
+        hide_usage_chunks: bool = False,
+    ):
+        self._stream = stream
+        self._iterator = stream.__aiter__()
+        self._state = state
+        self._on_done = on_done
+        self._hide_usage_chunks = hide_usage_chunks
+        self._finalizer = _report_when_collected(self, state, on_done)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                chunk = await self._iterator.__anext__()
+            except StopAsyncIteration:
+                self._finish(None)
+                raise
+            except Exception as e:
+                self._finish(e)
+                raise
+
+            if not (self._state.observe(chunk) and self._hide_usage_chunks):
+                return chunk
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                await close()
+        finally:
+            self._finish(None)
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+    def _finish(self, error: Optional[BaseException]):
+        self._finalizer.detach()
+        _report(self._state, self._on_done, error)
@@ -0,0 +1,378 @@
+"""
+TokenTra telemetry transports
+Pooled, keep-alive HTTP delivery of compressed ingest batches
+"""
+
+import abc
+import asyncio
+import gzip
+import json
+import logging
+import socket
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .columnar import COLUMNAR_CONTENT_TYPE, _msgpack, decode_columnar, encode_columnar
+from .errors import NetworkError, TimeoutError
+
+logger = logging.getLogger("tokentra")
+
+try:
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover - optional dependency
+    _zstd = None
+
+COMPRESSION_MODES = ("auto", "gzip", "zstd", "none")
+WIRE_FORMATS = ("auto", "json", "columnar")
+
+
+@dataclass
+class TransportResponse:
+    """Minimal response returned by every transport"""
+
+    status_code: int
+    headers: Mapping[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+
+class Transport(abc.ABC):
+    """
+    Base class for synchronous telemetry transports
+
+    Implementations must be safe to call from the telemetry worker thread
+    and should reuse connections between calls. A transport passed to a
+    client that is later forked is kept in the child, which calls
+    after_fork() before sending again: connections and locks copied from
+    the parent must be dropped there, not closed or reused.
+    """
+
+    @abc.abstractmethod
+    def send(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout: float
+    ) -> TransportResponse:
+        """POST one encoded batch"""
+
+    def close(self):
+        pass
+
+    def after_fork(self):
+        """Called in a forked child before the worker restarts"""
+
+
+class AsyncTransport(abc.ABC):
+    """Base class for asyncio telemetry transports"""
+
+    @abc.abstractmethod
+    async def send(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout: float
+    ) -> TransportResponse:
+        """POST one encoded batch"""
+
+    async def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """requests.Session transport with a persistent keep-alive connection pool"""
+
+    def __init__(self, pool_size: int = 4):
+        self.pool_size = pool_size
+        self._session = self._new_session()
+
+    def send(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout: float
+    ) -> TransportResponse:
+        try:
+            response = self._session.post(url, data=body, headers=headers, timeout=timeout)
+        except requests.Timeout as e:
+            raise TimeoutError(f"Ingest request timed out: {e}")
+        except requests.RequestException as e:
+            raise NetworkError(f"Ingest request failed: {e}", cause=e)
+
+        return TransportResponse(response.status_code, response.headers, response.content)
+
+    def close(self):
+        self._session.close()
+
+    def after_fork(self):
+        # The parent's pooled connections stay with the parent; closing them here would end its TLS sessions
+        self._session = self._new_session()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+class AiohttpTransport(AsyncTransport):
+    """aiohttp transport with a pooled session created inside the running loop"""
+
+    def __init__(self, pool_size: int = 4):
+        self._pool_size = pool_size
+        self._session: Any = None
+
+    async def send(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout: float
+    ) -> TransportResponse:
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._pool_size, keepalive_timeout=60),
+            )
+
+        try:
+            async with self._session.post(
+                url, data=body, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                return TransportResponse(response.status, response.headers, await response.read())
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Ingest request timed out after {timeout}s")
+        except aiohttp.ClientError as e:
+            raise NetworkError(f"Ingest request failed: {e}", cause=e)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class MemoryTransport(Transport):
+    """
+    In-process stand-in for the ingest endpoint
+
+    Records every decoded payload; useful for tests and benchmarks.
+    """
+
+    def __init__(
+        self, status_code: int = 200, accept_encoding: str = "gzip, zstd",
+        accept_post: str = COLUMNAR_CONTENT_TYPE,
+    ):
+        self.status_code = status_code
+        self.accept_encoding = accept_encoding
+        self.accept_post = accept_post
+        self.requests: List[Dict[str, Any]] = []
+
+    def send(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout: float
+    ) -> TransportResponse:
+        self.requests.append({
+            "url": url,
+            "headers": dict(headers),
+            "bytes": len(body),
+            "payload": decode_body(body, headers),
+        })
+        return TransportResponse(
+            self.status_code,
+            {"Accept-Encoding": self.accept_encoding, "Accept-Post": self.accept_post},
+        )
+
+
+# Local aggregator framing: header length, body length, JSON headers, body
+AGGREGATOR_FRAME = struct.Struct("<II")
+AGGREGATOR_STATUS = struct.Struct("<H")
+
+
+class UnixSocketTransport(Transport):
+    """
+    Delivers batches to a local aggregator over a Unix domain socket
+
+    One persistent connection per process; each batch is a single framed
+    write answered by a 2-byte HTTP-style status, so the aggregator can
+    push back with 503 and the normal retry path applies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def send(
+        self, url: str, body: bytes, headers: Dict[str, str], timeout: float
+    ) -> TransportResponse:
+        meta = json.dumps(
+            {k: v for k, v in headers.items() if k in ("Content-Encoding", "Content-Type")}
+        ).encode("utf-8")
+        frame = AGGREGATOR_FRAME.pack(len(meta), len(body)) + meta + body
+
+        with self._lock:
+            try:
+                sock = self._connect(timeout)
+                sock.sendall(frame)
+                (status,) = AGGREGATOR_STATUS.unpack(recv_exact(sock, AGGREGATOR_STATUS.size))
+            except socket.timeout:
+                self._reset()
+                raise TimeoutError(f"Aggregator at {self.path} did not answer within {timeout}s")
+            except OSError as e:
+                self._reset()
+                raise NetworkError(f"Aggregator at {self.path} unreachable: {e}", cause=e)
+
+        return TransportResponse(status)
+
+    def close(self):
+        with self._lock:
+            self._reset()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self._sock = None
+
+    def _connect(self, timeout: float) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(timeout)
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    def _reset(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly `size` bytes, raising ConnectionError on EOF"""
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Reverse a Content-Encoding applied by BodyEncoder"""
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd":
+        if _zstd is None:
+            raise ValueError("zstd body received but zstandard is not installed")
+        return _zstd.ZstdDecompressor().decompress(body)
+    return body
+
+
+def decode_body(body: bytes, headers: Mapping[str, str]) -> Dict[str, Any]:
+    """Decode an ingest request body produced by BodyEncoder"""
+    body = decompress(body, headers.get("Content-Encoding"))
+    if headers.get("Content-Type") == COLUMNAR_CONTENT_TYPE:
+        return decode_columnar(body)
+    return json.loads(body)
+
+
+class BodyEncoder:
+    """
+    Serializes ingest payloads and negotiates wire format and compression
+
+    In "auto" mode batches are gzip-compressed until the endpoint advertises
+    zstd support via its Accept-Encoding response header, and sent as JSON
+    until it lists the columnar msgpack media type in Accept-Post. If the
+    endpoint rejects a format or encoding (HTTP 415), it falls back to JSON
+    or uncompressed bodies for the rest of the session.
+
+    One encoder may be shared by several sending threads: zstd compressors
+    are not thread-safe, so each thread gets its own, and negotiation state
+    is updated under a lock.
+    """
+
+    def __init__(self, compression: str = "auto", min_bytes: int = 1024, wire_format: str = "auto"):
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"compression must be one of {COMPRESSION_MODES}")
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"wire_format must be one of {WIRE_FORMATS}")
+        if compression == "zstd" and _zstd is None:
+            logger.warning("zstandard not installed, falling back to gzip compression")
+            compression = "gzip"
+        if wire_format == "columnar" and _msgpack is None:
+            logger.warning("msgpack not installed, falling back to JSON batches")
+            wire_format = "json"
+
+        self.auto = compression == "auto"
+        self.encoding = "gzip" if self.auto else compression
+        self.min_bytes = min_bytes
+        self.auto_format = wire_format == "auto" and _msgpack is not None
+        self.columnar = wire_format == "columnar"
+        self._zstd_available = _zstd is not None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def encode(self, payload: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+        """Return the wire body and its Content-Type / Content-Encoding headers"""
+        with self._lock:
+            columnar, encoding = self.columnar, self.encoding
+        if columnar:
+            body, headers = encode_columnar(payload), {"Content-Type": COLUMNAR_CONTENT_TYPE}
+        else:
+            body, headers = json.dumps(payload, separators=(",", ":")).encode("utf-8"), {}
+
+        if encoding == "none" or len(body) < self.min_bytes:
+            return body, headers
+        if encoding == "zstd":
+            headers["Content-Encoding"] = "zstd"
+            return self._zstd_compressor().compress(body), headers
+        headers["Content-Encoding"] = "gzip"
+        return gzip.compress(body, compresslevel=5), headers
+
+    def negotiate(self, response: TransportResponse, sent_headers: Dict[str, str]) -> bool:
+        """
+        Update the wire format and encoding from an ingest response
+
+        Returns True if the batch was rejected because of its format or
+        encoding and should be resent as JSON / uncompressed.
+        """
+        with self._lock:
+            return self._negotiate(response, sent_headers)
+
+    def _negotiate(self, response: TransportResponse, sent_headers: Dict[str, str]) -> bool:
+        if response.status_code == 415:
+            if sent_headers.get("Content-Type") == COLUMNAR_CONTENT_TYPE:
+                logger.info("Ingest endpoint rejected columnar batches, falling back to JSON")
+                self.columnar = False
+                self.auto_format = False
+                return True
+
+            sent_encoding = sent_headers.get("Content-Encoding")
+            if sent_encoding:
+                logger.info(f"Ingest endpoint rejected {sent_encoding} bodies, disabling compression")
+                self.encoding = "none"
+                self.auto = False
+                return True
+
+        if response.status_code >= 400:
+            return False
+
+        if self.auto_format and not self.columnar:
+            if COLUMNAR_CONTENT_TYPE in response.headers.get("Accept-Post", ""):
+                self.columnar = True
+
+        if self.auto and self.encoding == "gzip" and self._zstd_available:
+            accepted = response.headers.get("Accept-Encoding", "")
+            if "zstd" in accepted:
+                self.encoding = "zstd"
+
+        return False
+
+    def after_fork(self):
+        """Replace the lock and per-thread compressors copied from the parent"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _zstd_compressor(self) -> Any:
+        """This thread's zstd compressor"""
+        compressor = getattr(self._local, "zstd", None)
+        if compressor is None:
+            compressor = self._local.zstd = _zstd.ZstdCompressor(level=3)
+        return compressor